@@ -1,4 +1,6 @@
 # 1) ここでまずレジストリ定義
+from importlib import import_module
+
 _registry: dict[str, callable] = {}
 
 def register(name: str):
@@ -7,135 +9,37 @@ def register(name: str):
         return fn
     return _wrap
 
-def get(name: str):
-    return _registry.get(name)
-
-# 2) レジストリ定義後にアクションを import & 登録
-
-from actions.draw       import handle_draw
-from actions.move_zone  import handle_move_zone
-from actions.aura       import handle_power_aura, handle_damage_aura, handle_keyword_aura
-from actions.select     import handle_select
-from actions.select_option import handle_select_option
-from actions.destroy    import handle_destroy
-from actions.summon     import handle_summon
-from actions.pay_cost   import handle_pay_cost
-from actions.gain_level import handle_gain_level
-from actions.destroy_level import handle_destroy_level
-from actions.assign_color import handle_assign_color
-from actions.activate_cost import handle_activate_cost
-from actions.player_status import handle_player_status
-from actions.set_player_status import handle_set_player_status
-from actions.transform  import handle_transform
-from actions.counter_change import handle_counter_change
-from actions.apply_damage import handle_apply_damage
-from actions.create_token import handle_create_token
-from actions.call_method import handle_call_method
-from actions.next_summon_buff import handle_next_summon_buff
-from actions.cost_modifier import handle_cost_modifier
-from actions.set_status import handle_set_status
-from actions.handle_turn_end import handle_turn_end
-from actions.process_damage import handle_process_damage
-
-@register("Draw")
-def _draw(card, act, item, owner_id):
-    return handle_draw(card, act, item, owner_id)
-
-@register("PowerAura")
-def _pa(card, act, item, owner_id):
-    return handle_power_aura(card, act, item, owner_id)
-
-@register("DamageAura")
-def _da(card, act, item, owner_id):
-    return handle_damage_aura(card, act, item, owner_id)
-
-@register("KeywordAura")
-def _ka(card, act, item, owner_id):
-    return handle_keyword_aura(card, act, item, owner_id)
-
-@register("Select")
-def _select(card, act, item, owner_id):
-    return handle_select(card, act, item, owner_id)
-
-@register("SelectOption")
-def _select_option(card, act, item, owner_id):
-    return handle_select_option(card, act, item, owner_id)
-
-@register("Destroy")
-def _destroy(card, act, item, owner_id):
-    return handle_destroy(card, act, item, owner_id)
-
-@register("Summon")
-def _summon(card, act, item, owner_id):
-    return handle_summon(card, act, item, owner_id)
-
-@register("PayCost")
-def _pay_cost(card, act, item, owner_id):
-    return handle_pay_cost(card, act, item, owner_id)
-
-@register("GainLevel")
-def _gain_level(card, act, item, owner_id):
-    return handle_gain_level(card, act, item, owner_id)
-
-@register("DestroyLevel")
-def _destroy_level(card, act, item, owner_id):
-    return handle_destroy_level(card, act, item, owner_id)
-
-@register("AssignColor")
-def _assign_color(card, act, item, owner_id):
-    return handle_assign_color(card, act, item, owner_id)
-
-@register("ActivateCost")
-def _activate_cost(card, act, item, owner_id):
-    return handle_activate_cost(card, act, item, owner_id)
-
-@register("PlayerStatus")
-def _player_status(card, act, item, owner_id):
-    return handle_player_status(card, act, item, owner_id)
-
-@register("SetPlayerStatus")
-def _set_player_status(card, act, item, owner_id):
-    return handle_set_player_status(card, act, item, owner_id)
-
-@register("Transform")
-def _transform(card, act, item, owner_id):
-    return handle_transform(card, act, item, owner_id)
-
-@register("CounterChange")
-def _counter_change(card, act, item, owner_id):
-    return handle_counter_change(card, act, item, owner_id)
-
-@register("ApplyDamage")
-def _apply_damage(card, act, item, owner_id):
-    return handle_apply_damage(card, act, item, owner_id)
-
-@register("CreateToken")
-def _create_token(card, act, item, owner_id):
-    return handle_create_token(card, act, item, owner_id)
-
-@register("CallMethod")
-def _call_method(card, act, item, owner_id):
-    return handle_call_method(card, act, item, owner_id)
-
-@register("NextSummonBuff")
-def _next_summon_buff(card, act, item, owner_id):
-    return handle_next_summon_buff(card, act, item, owner_id)
-
-@register("CostModifier")
-def _cost_modifier(card, act, item, owner_id):
-    return handle_cost_modifier(card, act, item, owner_id)
-
-@register("SetStatus")
-def _set_status(card, act, item, owner_id):
-    return handle_set_status(card, act, item, owner_id)
-
-@register("TurnEnd")
-def _turn_end(card, act, item, owner_id):
-    return handle_turn_end(card, act, item, owner_id)
-
-@register("ProcessDamage")
-def _process_damage(card, act, item, owner_id):
-    return handle_process_damage(card, act, item, owner_id)
+# 2) アクション type → (モジュール, ハンドラ関数名) のマニフェスト
+#    モジュールは get() で初めてその type が要求されたときに import する。
+#    @register でモジュール側が自分で登録するもの（BattleBuff）は関数名 None。
+MANIFEST = {
+    "Draw":            ("actions.draw",              "handle_draw"),
+    "PowerAura":       ("actions.aura",              "handle_power_aura"),
+    "DamageAura":      ("actions.aura",              "handle_damage_aura"),
+    "KeywordAura":     ("actions.aura",              "handle_keyword_aura"),
+    "Select":          ("actions.select",            "handle_select"),
+    "SelectOption":    ("actions.select_option",     "handle_select_option"),
+    "Destroy":         ("actions.destroy",           "handle_destroy"),
+    "Summon":          ("actions.summon",            "handle_summon"),
+    "PayCost":         ("actions.pay_cost",          "handle_pay_cost"),
+    "GainLevel":       ("actions.gain_level",        "handle_gain_level"),
+    "DestroyLevel":    ("actions.destroy_level",     "handle_destroy_level"),
+    "AssignColor":     ("actions.assign_color",      "handle_assign_color"),
+    "ActivateCost":    ("actions.activate_cost",     "handle_activate_cost"),
+    "PlayerStatus":    ("actions.player_status",     "handle_player_status"),
+    "SetPlayerStatus": ("actions.set_player_status", "handle_set_player_status"),
+    "Transform":       ("actions.transform",         "handle_transform"),
+    "CounterChange":   ("actions.counter_change",    "handle_counter_change"),
+    "ApplyDamage":     ("actions.apply_damage",      "handle_apply_damage"),
+    "CreateToken":     ("actions.create_token",      "handle_create_token"),
+    "CallMethod":      ("actions.call_method",       "handle_call_method"),
+    "NextSummonBuff":  ("actions.next_summon_buff",  "handle_next_summon_buff"),
+    "CostModifier":    ("actions.cost_modifier",     "handle_cost_modifier"),
+    "SetStatus":       ("actions.set_status",        "handle_set_status"),
+    "TurnEnd":         ("actions.handle_turn_end",   "handle_turn_end"),
+    "ProcessDamage":   ("actions.process_damage",    "handle_process_damage"),
+    "BattleBuff":      ("actions.battle_buff",       None),
+}
 
 # 汎用移動系アクションタイプ → 移動先ゾーン のマッピング
 _zone_map = {
@@ -146,11 +50,44 @@ _zone_map = {
     "MoveDeck": "Deck",
     "MoveToDamageZone": "DamageZone",
 }
+for _action_type in _zone_map:
+    MANIFEST[_action_type] = ("actions.move_zone", "handle_move_zone")
 
-# マッピングをループして、各アクションをデコレータ登録
-for action_type, zone in _zone_map.items():
-    @register(action_type)
-    def _move_handler(card, act, item, owner_id, zone=zone):
+
+def _load(name: str):
+    spec = MANIFEST.get(name)
+    if spec is None:
+        return None
+    module_name, attr = spec
+    mod = import_module(module_name)
+    if attr is None:  # import 時のデコレータで登録済み
+        return _registry.get(name)
+
+    handler = getattr(mod, attr)
+    if name not in _zone_map:
+        return register(name)(handler)
+
+    def _move_handler(card, act, item, owner_id, zone=_zone_map[name]):
         # act に toZone を注入して汎用ハンドラを呼び出し
         act_with_zone = {**act, "toZone": zone}
-        return handle_move_zone(card, act_with_zone, item, owner_id)
+        return handler(card, act_with_zone, item, owner_id)
+    return register(name)(_move_handler)
+
+
+def get(name: str):
+    fn = _registry.get(name)
+    if fn is None:
+        fn = _load(name)
+    return fn
+
+
+def action_names():
+    """登録済み・マニフェスト記載のアクション type（未ロードを含む）"""
+    return sorted(set(MANIFEST) | set(_registry))
+
+
+def load_all():
+    """マニフェストの全アクションを import して登録する（ベンチ・網羅チェック用）"""
+    for name in MANIFEST:
+        get(name)
+    return _registry
@@ -1,5 +1,5 @@
 # actions/assign_color.py
-from helper import resolve_targets, add_status
+from helper import resolve_targets, add_status, get_status
 
 def handle_assign_color(card, act, item, owner_id):
     """
@@ -13,13 +13,9 @@ def handle_assign_color(card, act, item, owner_id):
     for target in targets:
         # カラーコストを付与
         color_key = f"ColorCost_{color}"
-        current_cost = 0
         
         # 既存のカラーコストを取得
-        for status in target.get("statuses", []):
-            if status["key"] == color_key:
-                current_cost = int(status["value"])
-                break
+        current_cost = int(get_status(target, color_key, 0))
         
         # カラーコストを追加
         new_cost = current_cost + value
@@ -16,7 +16,7 @@ def handle(card, act, item, *_):
     # ── 恒常／一時の振り分け ─────────────────────────────
     if dur == -1:
         # 永続：statuses に直接入れる
-        add_status(card, k_mapped, value)
+        add_status(card, k_mapped, value, source_id=act.get("sourceCardId"))
     else:
         # 一時：tempStatuses（期限付き）
         expire_turn = item.get("turnCount", 0) + dur - 1
@@ -1,5 +1,5 @@
 # actions/cost_modifier.py
-from helper import resolve_targets, add_status
+from helper import resolve_targets, add_status, add_temp_status
 
 def handle_cost_modifier(card, act, item, owner_id):
     """
@@ -20,12 +20,8 @@ def handle_cost_modifier(card, act, item, owner_id):
             current_turn = item.get("turnCount", 0)
             expire_turn = current_turn + duration
             
-            temp_statuses = target.setdefault("tempStatuses", [])
-            temp_statuses.append({
-                "key": "CostModifier",
-                "value": str(cost_change),
-                "expireTurn": expire_turn
-            })
+            add_temp_status(target, "CostModifier", cost_change, expire_turn,
+                            source_id=act.get("sourceCardId"))
         
         # コスト修正イベントを生成
         events.append({
@@ -1,5 +1,5 @@
 # actions/counter_change.py
-from helper import resolve_targets, add_status
+from helper import resolve_targets, add_status, get_status
 
 def handle_counter_change(card, act, item, owner_id):
     """
@@ -13,13 +13,9 @@ def handle_counter_change(card, act, item, owner_id):
     for target in targets:
         # 現在のカウンター値を取得
         counter_key = f"{counter_type}Count"
-        current_count = 0
         
         # 既存のカウンターを取得
-        for status in target.get("statuses", []):
-            if status["key"] == counter_key:
-                current_count = int(status["value"])
-                break
+        current_count = int(get_status(target, counter_key, 0))
         
         # カウンターを変更
         new_count = max(0, current_count + change_value)  # 0未満にはならない
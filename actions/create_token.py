@@ -1,6 +1,7 @@
 # actions/create_token.py
-import uuid
-from helper import weighted_random_select, fetch_card_masters, d
+from helper import weighted_random_sample, fetch_card_masters
+from match_rng import match_random
+from token_factory import stamp_tokens
 
 def handle_create_token(card, act, item, owner_id):
     """
@@ -42,77 +43,30 @@ def handle_create_token(card, act, item, owner_id):
     # カードマスターデータを事前に取得
     card_masters = fetch_card_masters(possible_token_ids)
     
-    for _ in range(token_count):
-        # トークンベースIDを決定
-        selected_token_id = ""
-        
-        # 複数候補からランダム選択
-        if token_base_ids:
-            if weights and len(weights) == len(token_base_ids):
-                # 重み付きランダム選択
-                weight_values = [int(w) for w in weights]
-                selected_token_id = weighted_random_select(token_base_ids, weight_values)
-            else:
-                # 重みが指定されていない場合は均等選択
-                selected_token_id = weighted_random_select(token_base_ids, [1] * len(token_base_ids))
+    # トークンベースIDを決定（複数候補は token_count 回分をまとめて抽選）
+    if token_base_ids:
+        if weights and len(weights) == len(token_base_ids):
+            # 重み付きランダム選択
+            weight_values = [int(w) for w in weights]
         else:
-            # 従来の単一トークン生成
-            selected_token_id = token_card_id
-        
-        # 新しいトークンを生成
-        token_id = str(uuid.uuid4())
-        token_card = {
-            "id": token_id,
-            "baseCardId": selected_token_id,
-            "ownerId": owner_id,
-            "zone": target_zone,
-            "isFaceUp": True,
-            "level": d(1),
-            "currentLevel": d(1),
-            "power": d(1000),  # デフォルト値
-            "currentPower": d(1000),
-            "damage": d(0),
-            "currentDamage": d(0),
-            "statuses": [
-                {"key": "IsToken", "value": True}
-            ],
-            "tempStatuses": [],
-            "effectList": []
-        }
-        
-        # カードマスターデータがある場合、基本属性を更新
-        if selected_token_id in card_masters:
-            master_data = card_masters[selected_token_id]
-            
-            # 基本属性の更新
-            if "power" in master_data:
-                token_card["power"] = d(master_data["power"])
-                token_card["currentPower"] = d(master_data["power"])
-            
-            if "damage" in master_data:
-                token_card["damage"] = d(master_data["damage"])
-                token_card["currentDamage"] = d(master_data["damage"])
-            
-            if "level" in master_data:
-                token_card["level"] = d(master_data["level"])
-                token_card["currentLevel"] = d(master_data["level"])
-            
-            # effectList を更新（新しいカードの能力を取得）
-            if "effectList" in master_data:
-                token_card["effectList"] = master_data["effectList"]
-        
-        # マッチのカードリストに追加
-        item["cards"].append(token_card)
-        
+            # 重みが指定されていない場合は均等選択
+            weight_values = [1] * len(token_base_ids)
+        selected_token_ids = weighted_random_sample(token_base_ids, weight_values, token_count, match_random(item))
+    else:
+        # 従来の単一トークン生成
+        selected_token_ids = [token_card_id] * token_count
+    
+    # テンプレートから生成してまとめて item["cards"] に追加
+    for token_card in stamp_tokens(item, selected_token_ids, owner_id, target_zone, card_masters):
         # トークン生成イベントを生成
         events.append({
             "type": "CreateToken",
             "payload": {
-                "tokenId": token_id,
-                "baseCardId": selected_token_id,
+                "tokenId": token_card["id"],
+                "baseCardId": token_card["baseCardId"],
                 "ownerId": owner_id,
                 "zone": target_zone
             }
         })
     
-    return events
\ No newline at end of file
+    return events
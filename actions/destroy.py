@@ -1,12 +1,13 @@
 # actions/destroy.py
 from helper import resolve_targets
+from match_log import log_debug
 
 def handle_destroy(card, act, item, owner_id):
     """
     指定したカードを破壊し墓地へ移動する
     """
     targets = resolve_targets(card, act, item)
-    print(f"handle_destroy: {targets=}")
+    log_debug("handle_destroy", targets=lambda: [t["id"] for t in targets])
     events = []
     
     for target in targets:
@@ -1,4 +1,6 @@
 # actions/draw.py
+import deck_stack
+from match_log import log_debug
 
 def handle_draw(card, act, item, owner_id):
     """
@@ -6,7 +8,7 @@ def handle_draw(card, act, item, owner_id):
     成功した枚数を payload.count に含めた Draw イベントを返す。
     target が "PlayerLeader"/"EnemyLeader" なら対象プレイヤーを切り替え。
     """
-    print(f"Handling Draw action: {act} for card {card['id']} by player {owner_id}")
+    log_debug("handle_draw", cardId=card["id"], value=act.get("value"), target=act.get("target"), ownerId=owner_id)
     # ① 引く回数を取得（デフォルト１）
     try:
         draw_times = int(act.get("value", 1))
@@ -23,17 +25,7 @@ def handle_draw(card, act, item, owner_id):
         player_to_draw = owner_id
 
     # ③ ドロー処理
-    drawn = 0
-    for _ in range(draw_times):
-        deck_card = next(
-            (c for c in item["cards"]
-             if c["ownerId"] == player_to_draw and c["zone"] == "Deck"),
-            None
-        )
-        if not deck_card:
-            break
-        deck_card["zone"] = "Hand"
-        drawn += 1
+    drawn = len(deck_stack.draw(item, player_to_draw, draw_times))
 
     # ④ Draw イベントをまとめて返す
     return [{
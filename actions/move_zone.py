@@ -1,5 +1,6 @@
 ### actions/move_zone.py
 from helper import resolve_targets
+import deck_stack
 
 def handle_move_zone(card, act, item, owner_id):
     """
@@ -16,7 +17,10 @@ def handle_move_zone(card, act, item, owner_id):
     events = []
     for tgt in targets:
         from_zone = tgt.get("zone")
-        tgt["zone"] = to_zone
+        if to_zone == "Deck":
+            deck_stack.insert(item, tgt, act.get("position", "Bottom"))
+        else:
+            tgt["zone"] = to_zone
         events.append({
             "type": act["type"],
             "payload": {"cardId": tgt["id"], "fromZone": from_zone, "toZone": to_zone}
@@ -1,6 +1,16 @@
 # actions/process_damage.py
-from helper import fetch_card_masters, resolve_targets, add_status, add_temp_status
-import random
+import os
+from collections import deque
+
+from helper import fetch_card_masters, has_status
+from match_rng import match_random
+import deck_stack
+from match_log import log_info
+from metrics import count
+
+def _master_id(card):
+    """カードマスターの ID（マッチ上のカードは baseCardId、旧形式は cardId）"""
+    return card.get("baseCardId") or card.get("cardId")
 
 def handle_process_damage(card, act, item, owner_id):
     """
@@ -8,7 +18,7 @@ def handle_process_damage(card, act, item, owner_id):
     1. デッキトップから指定枚数をダメージゾーンに移動
     2. TOカードの使用可否選択
     3. カラー付与（TO使用しない場合）
-    4. 反射ダメージチェイン
+    4. 反射ダメージチェイン（DAMAGE_CHAIN_MAX_HOPS 段まで、サーバー側で連鎖を解決）
     5. OnDamageトリガー
     
     対象指定:
@@ -41,41 +51,69 @@ def handle_process_damage(card, act, item, owner_id):
     if not target_player_ids:
         return []
     
-    events = []
-    
-    # 各対象プレイヤーにダメージを処理
-    for target_id in target_player_ids:
-        target_player = next((p for p in item["players"] if p["id"] == target_id), None)
-        if not target_player:
-            continue
-        
-        # プレイヤー別のダメージ処理を実行
-        damage_events = process_damage_for_player(target_id, damage_value, act, item, owner_id)
-        events.extend(damage_events)
-    
-    return events
+    # 各対象プレイヤーへのダメージを反射チェインごと 1 回で解決
+    hits = [(target_id, damage_value) for target_id in target_player_ids
+            if any(p["id"] == target_id for p in item["players"])]
+    return resolve_damage_chain(item, hits, owner_id)
 
 def process_damage_for_player(target_player_id, damage_value, act, item, owner_id):
     """
-    指定されたプレイヤーに対してダメージ処理を実行
+    指定されたプレイヤーに対してダメージ処理を実行（反射チェインを含む）
+    """
+    return resolve_damage_chain(item, [(target_player_id, damage_value)], owner_id)
+
+def max_damage_hops():
+    """反射で連鎖するダメージの最大段数（最初のダメージを含む）"""
+    return int(os.environ.get("DAMAGE_CHAIN_MAX_HOPS", "8"))
+
+def resolve_damage_chain(item, hits, owner_id, max_hops=None):
+    """
+    ダメージと反射ダメージを 1 回の呼び出しで反復的に解決する。
+      ① 各段: デッキトップからダメージゾーンへ移し、防御側の反射をチェックして
+         次の段（攻撃側へのダメージ）を積む。max_hops 段で打ち切る
+      ② チェイン全体でダメージゾーンに送ったカードのマスターを 1 回で取得
+      ③ 段の順に TO 選択 / カラー付与と OnDamage を並べたイベント列を返す
+    hits: [(対象プレイヤーID, ダメージ量), ...]（攻撃側は owner_id）
     """
+    max_hops = max_damage_hops() if max_hops is None else max_hops
+    queue = deque((target_id, value, owner_id, 1) for target_id, value in hits)
+    hops = []
+    while queue:
+        target_id, value, attacker_id, depth = queue.popleft()
+        # デッキトップから指定枚数を取得（デッキが足りない場合は可能な限り）
+        damage_cards = deck_stack.pop(item, target_id, int(value))
+        if len(damage_cards) < value:
+            value = len(damage_cards)
+        for damage_card in damage_cards:
+            damage_card["zone"] = "DamageZone"
+        reflection = check_reflection_damage(attacker_id, target_id, value, item) if value else []
+        hops.append((target_id, value, damage_cards, reflection))
+        if reflection:
+            if depth < max_hops:
+                queue.append((attacker_id, value, target_id, depth + 1))
+            else:
+                # 打ち切った段のダメージは適用しないので、その ProcessDamage は返さない
+                reflection[:] = [e for e in reflection
+                                 if not (e["type"] == "ProcessDamage" and e["payload"].get("isReflection"))]
+                log_info("damage_chain_limit", hops=len(hops), maxHops=max_hops, targetPlayerId=attacker_id)
+                reflection.append({"type": "DamageChainLimit",
+                                   "payload": {"maxHops": max_hops, "targetPlayerId": attacker_id}})
+    count("DamageChainHops", len(hops))
+
+    # カードマスターデータをまとめて取得
+    card_masters = fetch_card_masters([_master_id(c) for _, _, cards, _ in hops for c in cards])
+
+    events = []
+    for target_id, value, damage_cards, reflection in hops:
+        events.extend(_damage_hop_events(item, target_id, value, damage_cards, reflection, card_masters))
+    return events
+
+def _damage_hop_events(item, target_player_id, damage_value, damage_cards, reflection_events, card_masters):
+    """1 段分のイベント（移動・TO 選択 / カラー付与・反射・OnDamage）"""
     events = []
-    
-    # デッキから指定枚数のカードを取得
-    deck_cards = [c for c in item["cards"] if c["zone"] == "Deck" and c["ownerId"] == target_player_id]
-    if len(deck_cards) < damage_value:
-        damage_value = len(deck_cards)  # デッキが足りない場合は可能な限り
-    
-    # デッキトップから指定枚数を取得（シャッフル済みと仮定）
-    damage_cards = deck_cards[:damage_value]
-    
-    # カードマスターデータを取得
-    card_ids = [c["cardId"] for c in damage_cards]
-    card_masters = fetch_card_masters(card_ids)
     
     # 1. ダメージゾーンに移動
     for damage_card in damage_cards:
-        damage_card["zone"] = "DamageZone"
         events.append({
             "type": "MoveZone",
             "payload": {
@@ -87,7 +125,7 @@ def process_damage_for_player(target_player_id, damage_value, act, item, owner_i
     
     # 2. TOカードの処理
     for damage_card in damage_cards:
-        card_master = card_masters.get(damage_card["cardId"], {})
+        card_master = card_masters.get(_master_id(damage_card), {})
         is_to = card_master.get("isTO", False)
         
         if is_to:
@@ -116,7 +154,7 @@ def process_damage_for_player(target_player_id, damage_value, act, item, owner_i
         else:
             # 通常カードの場合はカラー付与
             available_colors = card_master.get("availableColors", ["Red", "Blue", "Green", "Yellow", "Purple"])
-            assigned_color = random.choice(available_colors)
+            assigned_color = match_random(item).choice(available_colors)
             
             damage_card["assignedColor"] = assigned_color
             events.append({
@@ -127,8 +165,7 @@ def process_damage_for_player(target_player_id, damage_value, act, item, owner_i
                 }
             })
     
-    # 3. 反射ダメージチェック
-    reflection_events = check_reflection_damage(owner_id, target_player_id, damage_value, item)
+    # 3. 反射ダメージ（次の段として resolve_damage_chain が解決済み）
     events.extend(reflection_events)
     
     # 4. OnDamageトリガー
@@ -154,12 +191,7 @@ def check_reflection_damage(attacker_id, defender_id, damage_value, item):
     field_cards = [c for c in item["cards"] if c["zone"] == "Field" and c["ownerId"] == defender_id]
     
     for field_card in field_cards:
-        has_reflect = any(
-            status.get("key") == "IsChainPainReflect" 
-            for status in field_card.get("statuses", [])
-        )
-        
-        if has_reflect:
+        if has_status(field_card, "IsChainPainReflect"):
             # 反射ダメージを攻撃者に与える
             events.append({
                 "type": "ReflectionDamage",
@@ -171,7 +203,7 @@ def check_reflection_damage(attacker_id, defender_id, damage_value, item):
                 }
             })
             
-            # 攻撃者に対して追加のProcessDamageを発火
+            # 攻撃者に対する追加の ProcessDamage（resolve_damage_chain が次の段として解決する）
             events.append({
                 "type": "ProcessDamage",
                 "payload": {
@@ -193,7 +225,7 @@ def process_to_selection_result(damage_card, selected_value, item):
     
     if selected_value == "use":
         # TO効果を発動
-        card_master = fetch_card_masters([damage_card["cardId"]])[damage_card["cardId"]]
+        card_master = fetch_card_masters([_master_id(damage_card)])[_master_id(damage_card)]
         to_effect = card_master.get("toEffect", {})
         
         events.append({
@@ -207,9 +239,9 @@ def process_to_selection_result(damage_card, selected_value, item):
         
     else:
         # TO使用しない場合はカラー付与
-        card_master = fetch_card_masters([damage_card["cardId"]])[damage_card["cardId"]]
+        card_master = fetch_card_masters([_master_id(damage_card)])[_master_id(damage_card)]
         available_colors = card_master.get("availableColors", ["Red", "Blue", "Green", "Yellow", "Purple"])
-        assigned_color = random.choice(available_colors)
+        assigned_color = match_random(item).choice(available_colors)
         
         damage_card["assignedColor"] = assigned_color
         events.append({
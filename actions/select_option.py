@@ -1,5 +1,6 @@
 # actions/select_option.py
 from helper import weighted_random_select
+from match_rng import match_random
 
 def handle_select_option(card, act, item, owner_id):
     """
@@ -28,10 +29,10 @@ def handle_select_option(card, act, item, owner_id):
         if weights and len(weights) == len(options):
             # 重みを整数に変換
             weight_values = [int(w) for w in weights]
-            selected_value = weighted_random_select(options, weight_values)
+            selected_value = weighted_random_select(options, weight_values, match_random(item))
         else:
             # 重みが指定されていない場合は均等選択
-            selected_value = options[0] if len(options) == 1 else weighted_random_select(options, [1] * len(options))
+            selected_value = options[0] if len(options) == 1 else weighted_random_select(options, [1] * len(options), match_random(item))
         
         # choiceResponses に自動追加
         item.setdefault("choiceResponses", []).append({
@@ -0,0 +1,131 @@
+# ai_policy.py
+"""
+同一プロセス内で AI ターンを進めるための方策（policy）。
+
+方策は item を読むだけで状態を書き換えない。lambda_function.play_turn が
+方策の返す行動を通常の Mutation と同じ処理で item に適用していく
+（同一プロセス AI の play_ai_turn と benchmarks.simulate が使う）。
+
+    policy = get_policy("greedy", rng=random.Random(seed))
+    policy.next_action(item, player_id)
+        → {"type": "summon", "cardId": ...}
+        | {"type": "attack", "attackerId": ..., "targetId": ..., "targetIsLeader": bool}
+        | None（メインフェーズを終える）
+    policy.answer(request, item, player_id)
+        → submitChoiceResponse の body と同じ形の dict
+
+新しい方策は @register_policy("name") で登録し、マッチの aiPolicy または
+環境変数 AI_POLICY で選ぶ。
+"""
+import random
+
+from card_view import card_view
+from helper import get_status
+
+_policies: dict[str, type] = {}
+
+
+def register_policy(name: str):
+    def _wrap(cls):
+        _policies[name] = cls
+        return cls
+    return _wrap
+
+
+def get_policy(name: str, rng=None):
+    """name の方策を生成する（rng は乱択する方策が使う。省略時は新しい Random）"""
+    cls = _policies.get(name)
+    return cls(rng) if cls else None
+
+
+def policy_names():
+    return sorted(_policies)
+
+
+def _cards(item, owner_id, zone):
+    return [c for c in item["cards"] if c["ownerId"] == owner_id and c["zone"] == zone]
+
+
+def _attackers(item, player_id):
+    return [c for c in _cards(item, player_id, "Field")
+            if not get_status(c, "HasAttacked", False) and card_view(c).power > 0]
+
+
+def _choice_body(request, player_id, pick):
+    """選択要求への応答。pick(options) で 1 つ選ぶ（Yes/No は pick に任せる）"""
+    options = list(request.get("options") or [])
+    body = {"requestId": request["requestId"], "playerId": player_id}
+    if options:
+        choice = pick(options)
+        body["selectedValue"] = choice
+        if choice not in ("Yes", "No"):
+            body["selectedIds"] = [choice]
+    else:
+        body["selectedIds"] = []
+    return body
+
+
+def unused_level_points(item, player_id):
+    player = next((p for p in item["players"] if p["id"] == player_id), {})
+    return [p for p in player.get("levelPoints", []) if not p.get("isUsed", False)]
+
+
+@register_policy("greedy")
+class GreedyPolicy:
+    """
+    1 手先だけを見る貪欲方策。
+      - 召喚: 払えるコストのうち最もパワーの高い手札から順に出す
+      - 攻撃: 勝てる相手ユニットのうち最もパワーの高いものを倒し、
+              勝てる相手がいなければリーダーを殴る
+      - 選択: Yes/No は Yes、それ以外は先頭の選択肢
+    """
+
+    def __init__(self, rng=None):
+        self.rng = rng
+
+    def next_action(self, item, player_id):
+        budget = len(unused_level_points(item, player_id))
+        hand = [c for c in _cards(item, player_id, "Hand") if card_view(c).cost <= budget]
+        if hand:
+            best = max(hand, key=lambda c: (card_view(c).power, c["id"]))
+            return {"type": "summon", "cardId": best["id"]}
+
+        enemy_id = next(p["id"] for p in item["players"] if p["id"] != player_id)
+        enemies = _cards(item, enemy_id, "Field")
+        for atk in sorted(_attackers(item, player_id), key=lambda c: (-card_view(c).power, c["id"])):
+            power = card_view(atk).power
+            beatable = [e for e in enemies if card_view(e).power < power]
+            if beatable:
+                tgt = max(beatable, key=lambda c: (card_view(c).power, c["id"]))
+                return {"type": "attack", "attackerId": atk["id"], "targetId": tgt["id"],
+                        "targetIsLeader": False}
+            return {"type": "attack", "attackerId": atk["id"], "targetId": None,
+                    "targetIsLeader": True}
+        return None
+
+    def answer(self, request, item, player_id):
+        return _choice_body(request, player_id, lambda opts: "Yes" if "Yes" in opts else opts[0])
+
+
+@register_policy("random")
+class RandomPolicy:
+    """合法手（召喚・攻撃・ターン終了）から一様に選ぶ。負荷生成・バランス検証用"""
+
+    def __init__(self, rng=None):
+        self.rng = rng or random.Random()
+
+    def next_action(self, item, player_id):
+        budget = len(unused_level_points(item, player_id))
+        moves = [{"type": "summon", "cardId": c["id"]}
+                 for c in _cards(item, player_id, "Hand") if card_view(c).cost <= budget]
+        enemy_id = next(p["id"] for p in item["players"] if p["id"] != player_id)
+        enemies = _cards(item, enemy_id, "Field")
+        for atk in _attackers(item, player_id):
+            moves.append({"type": "attack", "attackerId": atk["id"], "targetId": None, "targetIsLeader": True})
+            moves += [{"type": "attack", "attackerId": atk["id"], "targetId": e["id"], "targetIsLeader": False}
+                      for e in enemies]
+        moves.append(None)
+        return self.rng.choice(moves)
+
+    def answer(self, request, item, player_id):
+        return _choice_body(request, player_id, self.rng.choice)
@@ -0,0 +1,88 @@
+# aura_index.py
+"""
+sourceId → そのカードが付けたステータスの逆引き索引（オーラの付け外し用）。
+
+{sourceId: {(対象 cardId, statusKey): 対象カード}} を item["cards"] ごとに持つ。
+最初の参照時に盤面を 1 回走査して statuses / tempStatuses の sourceId から作り、
+以降は helper.add_temp_status / add_status(source_id=...) が record で差分反映する。
+カードは追加されるだけなので、リストが伸びたときは増えた分だけ索引する。
+
+索引が返すのは「候補」で、外す側はカードの実際のリストを見て確かめる
+（期限切れやリストの差し替えで消えたエントリが残っていても害はない）。
+STATE には保存しない（読み込んだ STATE から作り直せる派生データ）。
+"""
+from card_view import card_view
+from metrics import count
+
+# deck_stack と同じくリストの同一性と長さで変化を検出する
+_index = {"cards": None, "len": 0, "ids": {}, "by_source": {}}
+
+
+def _add(card, entry):
+    # 上書きされて shadowed に隠れている付け手も外す対象として索引する
+    for src in [entry.get("sourceId")] + [p.get("sourceId") for p in entry.get("shadowed") or ()]:
+        if src is not None:
+            _index["by_source"].setdefault(src, {})[(card["id"], entry["key"])] = card
+
+
+def _sync(cards):
+    if _index["cards"] is not cards:
+        _index.update(cards=cards, len=0, ids={}, by_source={})
+    start = _index["len"]
+    if start == len(cards):
+        return
+    count("CardScans", len(cards) - start)
+    ids = _index["ids"]
+    for i in range(start, len(cards)):
+        c = cards[i]
+        ids[c["id"]] = c
+        for s in c.get("statuses") or ():
+            _add(c, s)
+        for s in c.get("tempStatuses") or ():
+            _add(c, s)
+    _index["len"] = len(cards)
+
+
+def record(card, entry):
+    """helper から呼ばれる: sourceId 付きのエントリを索引に足す（未作成なら何もしない）"""
+    if _index["cards"] is not None:
+        _add(card, entry)
+
+
+def targets(cards, source_id, key=None):
+    """source_id がステータスを付けた（可能性のある）カード。key を指定するとその key だけ"""
+    _sync(cards)
+    entries = _index["by_source"].get(source_id)
+    if not entries:
+        return []
+    ids = _index["ids"]
+    out = {}
+    for (cid, k), c in entries.items():
+        # 別の item["cards"] のカードが record された場合は ids で弾く
+        if (key is None or k == key) and ids.get(cid) is c:
+            out[id(c)] = c
+    return list(out.values())
+
+
+def _still_applied(card, source_id, key):
+    view = card_view(card)
+    if any(s.get("sourceId") == source_id for s in view.temp_entries(key)):
+        return True
+    s = view.statuses.get(key)
+    return s is not None and (s.get("sourceId") == source_id or
+                              any(p.get("sourceId") == source_id for p in s.get("shadowed") or ()))
+
+
+def discard(card, source_id, key):
+    """card からステータスを外した後に呼ぶ: もう残っていなければ索引から消す"""
+    entries = _index["by_source"].get(source_id)
+    if entries and (card["id"], key) in entries and not _still_applied(card, source_id, key):
+        del entries[(card["id"], key)]
+
+
+def prune(source_id):
+    """source_id のエントリのうち、実際にはもう付いていないものを消す"""
+    entries = _index["by_source"].get(source_id)
+    for (cid, k), c in list((entries or {}).items()):
+        if not _still_applied(c, source_id, k):
+            del entries[(cid, k)]
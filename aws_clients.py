@@ -0,0 +1,97 @@
+# aws_clients.py
+"""
+AWS クライアントの遅延生成と共有。
+
+boto3 の import とクライアント生成はコールドスタートの大部分を占めるが、
+publishClientUpdate のように AWS を一切使わない呼び出しもある。ここでは
+  - boto3 は最初に使われた時点で import する
+  - クライアント / リソース / Table はサービス名（テーブル名）ごとに 1 つだけ作り、
+    lambda_function・helper・trace_recorder・profiler で共有する
+  - 低レベルの DynamoDB クライアントはリソースとは別に作る。リソースの meta.client は
+    高水準の型変換（TypeSerializer）が登録されていて、{"S": ...} 形式の
+    リクエストを二重にラップし、レスポンスもデシリアライズ済みで返すため
+
+モジュール変数には lazy() で作ったプロキシを置く。属性に初めて触れた時点で
+実体を作るので、呼び出し側は table.get_item(...) のまま書ける。
+テストやベンチでは従来どおりモジュール変数ごと差し替えればよい。
+"""
+import os
+import threading
+
+_lock = threading.RLock()  # 生成中に別キーを生成することがある（Table → resource）
+_cache = {}
+
+
+def _get(key, factory):
+    obj = _cache.get(key)
+    if obj is None:
+        with _lock:
+            obj = _cache.get(key)
+            if obj is None:
+                obj = _cache[key] = factory()
+    return obj
+
+
+def resource(service):
+    def _make():
+        import boto3
+        return boto3.resource(service)
+    return _get(("resource", service), _make)
+
+
+def client(service):
+    def _make():
+        import boto3
+        return boto3.client(service)
+    return _get(("client", service), _make)
+
+
+def dynamo_table(env_name):
+    """環境変数 env_name に設定されたテーブルの Table リソース"""
+    name = os.environ[env_name]
+    return _get(("table", name), lambda: resource("dynamodb").Table(name))
+
+
+def created():
+    """生成済みのキー一覧（ベンチ・テスト用）"""
+    return sorted(_cache)
+
+
+def reset():
+    """生成済みのクライアントを破棄する（ベンチ・テスト用）"""
+    with _lock:
+        _cache.clear()
+
+
+class _Lazy:
+    """初めて属性に触れたときに factory() を呼んで実体を作るプロキシ"""
+
+    __slots__ = ("_factory", "_target")
+
+    def __init__(self, factory):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_target", None)
+
+    def _resolve(self):
+        target = self._target
+        if target is None:
+            target = self._factory()
+            object.__setattr__(self, "_target", target)
+        return target
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __repr__(self):
+        state = "resolved" if self._target is not None else "unresolved"
+        return f"<lazy {state} {self._factory!r}>"
+
+
+def resolve(obj):
+    """lazy() のプロキシなら実体を作って返す（それ以外はそのまま）"""
+    return obj._resolve() if isinstance(obj, _Lazy) else obj
+
+
+def lazy(factory, *args):
+    """factory(*args) を初回アクセスまで遅らせるプロキシ"""
+    return _Lazy(lambda: factory(*args))
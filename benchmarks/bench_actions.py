@@ -0,0 +1,192 @@
+# benchmarks/bench_actions.py
+"""
+action_registry に登録された各ハンドラのマイクロベンチマーク。
+
+    python -m benchmarks.bench_actions
+    python -m benchmarks.bench_actions --actions Draw Destroy --sizes 40 400 1000
+    python -m benchmarks.bench_actions --out actions.json
+
+action_registry のマニフェストを全ロードして列挙し、盤面サイズ × 対象枚数ごとに
+apply_action と同じ形（対象ごとに handler(tgt, act, item, owner_id)）で実行する。
+アクション定義は data/results.csv の使用例のうち小さい盤面でエラーなく
+実行できた最初のものを使い、どれも実行できない場合は DEFAULT_ACTS を試す。
+どの定義でも失敗するハンドラは ERROR として報告する。
+
+盤面サイズに対する所要時間の傾き（log-log の最小二乗）が --slope-limit を
+超えるハンドラを SUPERLINEAR として報告し、終了コード 1 を返す。
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import math
+import pickle
+import sys
+import time
+
+from benchmarks.harness import backends, cards_in, generate_match, load_card_masters
+
+DEFAULT_SIZES = [40, 120, 400, 1000]
+DEFAULT_CARDINALITIES = [1, 4, 16]
+SLOPE_LIMIT = 1.3
+NOISE_FLOOR_US = 20.0  # 最大サイズでもこれ未満のハンドラは傾きを判定しない
+
+# CSV の使用例がどれも実行できない（または使用例が無い）アクションの定義
+DEFAULT_ACTS = {
+    "ProcessDamage":    {"type": "ProcessDamage", "target": "EnemyLeader", "value": 1},
+    "TurnEnd":          {"type": "TurnEnd", "target": "Self"},
+    "MoveToDamageZone": {"type": "MoveToDamageZone", "target": ""},
+    "BattleBuff":       {"type": "BattleBuff", "target": "Self", "keyword": "Power", "value": 1000, "duration": 1},
+    "CostModifier":     {"type": "CostModifier", "target": "Self", "value": -1, "duration": -1},
+    "NextSummonBuff":   {"type": "NextSummonBuff", "target": "Self", "keyword": "Power", "value": 1000, "duration": 1},
+    "SetStatus":        {"type": "SetStatus", "target": "Self", "keyword": "SuppressEffect", "value": 1, "duration": -1},
+    "DestroyLevel":     {"type": "DestroyLevel", "target": "PlayerLeader", "keyword": "green", "value": 1},
+}
+
+
+def action_candidates(masters):
+    """アクション type → CSV 上の使用例（重複除去・出現順）+ DEFAULT_ACTS"""
+    from helper import _parse_dynamodb_item
+    found = {}
+    for cid in sorted(masters):
+        for eff in _parse_dynamodb_item(masters[cid]).get("effectList", []):
+            for act in eff.get("actions", []):
+                lst = found.setdefault(act.get("type"), [])
+                if act not in lst:
+                    lst.append(act)
+    for name, act in DEFAULT_ACTS.items():
+        found.setdefault(name, []).append(act)
+    return found
+
+
+def pick_action(handler, candidates, board):
+    """小さい盤面でエラーなく実行できる最初の定義を選ぶ（無ければ先頭とそのエラー）"""
+    first_err = None
+    for act in candidates:
+        _, err = time_handler(handler, act, board, 1, 1)
+        if err is None:
+            return act, None
+        first_err = first_err or err
+    return (candidates[0] if candidates else None), first_err
+
+
+def _targets(item, k):
+    pool = cards_in(item, "p2", "Field") + cards_in(item, "p2", "Hand") + cards_in(item, "p2", "Graveyard")
+    return pool[:k] if len(pool) >= k else None
+
+
+def time_handler(handler, act, base, k, reps):
+    """対象 k 枚に対する 1 回分の所要時間（µs）の中央値。エラー時は None"""
+    samples = []
+    for _ in range(reps):
+        item = pickle.loads(pickle.dumps(base, pickle.HIGHEST_PROTOCOL))
+        src = cards_in(item, "p1", "Field")[0]
+        targets = _targets(item, k)
+        if targets is None:
+            return None, None  # 盤面が小さく対象が足りない組み合わせは計測しない
+        a = dict(act)
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            try:
+                for tgt in targets:
+                    handler(tgt, a, item, src["ownerId"])
+            except Exception as e:
+                return None, f"{type(e).__name__}: {e}"
+            samples.append((time.perf_counter() - t0) * 1e6)
+    samples.sort()
+    return samples[len(samples) // 2], None
+
+
+def loglog_slope(points):
+    """[(size, us), ...] の log-log 回帰の傾き（2 点未満なら None）"""
+    pts = [(math.log(s), math.log(t)) for s, t in points if t and t > 0]
+    if len(pts) < 2:
+        return None
+    mx = sum(x for x, _ in pts) / len(pts)
+    my = sum(y for _, y in pts) / len(pts)
+    den = sum((x - mx) ** 2 for x, _ in pts)
+    return sum((x - mx) * (y - my) for x, y in pts) / den if den else None
+
+
+def run(sizes=DEFAULT_SIZES, cardinalities=DEFAULT_CARDINALITIES, reps=15,
+        names=None, seed=0, slope_limit=SLOPE_LIMIT):
+    import lambda_function  # noqa: F401
+    from action_registry import load_all
+    _registry = load_all()
+
+    masters = load_card_masters()
+    candidates = action_candidates(masters)
+    names = sorted(names or _registry)
+    boards = {n: generate_match(n, masters, seed=seed) for n in sizes}
+
+    results = {}
+    prev = logging.root.manager.disable
+    logging.disable(logging.WARNING)
+    try:
+        with backends(masters):
+            for name in names:
+                handler = _registry[name]
+                act, err = pick_action(handler, candidates.get(name) or [{"type": name, "target": "Self"}],
+                                       boards[min(sizes)])
+                entry = {"act": act, "timings": {}, "error": err}
+                for k in cardinalities:
+                    row = {}
+                    if err is None:
+                        for n in sizes:
+                            us, _ = time_handler(handler, act, boards[n], k, reps)
+                            if us is not None:
+                                row[str(n)] = round(us, 2)
+                    entry["timings"][str(k)] = row
+
+                base_row = entry["timings"][str(cardinalities[0])]
+                slope = loglog_slope([(int(n), us) for n, us in base_row.items()])
+                largest = base_row.get(str(max(sizes)), 0.0)
+                entry["slope"] = round(slope, 3) if slope is not None else None
+                entry["superlinear"] = bool(
+                    slope is not None and slope > slope_limit and largest >= NOISE_FLOOR_US
+                )
+                results[name] = entry
+    finally:
+        logging.disable(prev)
+    return {"meta": {"sizes": sizes, "cardinalities": cardinalities, "reps": reps,
+                     "seed": seed, "slopeLimit": slope_limit},
+            "results": results}
+
+
+def _print_table(report, out=sys.stdout):
+    sizes = report["meta"]["sizes"]
+    k0 = str(report["meta"]["cardinalities"][0])
+    head = " ".join(f"{s:>10}" for s in sizes)
+    print(f"{'action':<18} {head} {'slope':>7}  (µs, targets={k0})", file=out)
+    for name, e in report["results"].items():
+        row = e["timings"].get(k0, {})
+        cells = " ".join(f"{row[str(s)]:>10.1f}" if str(s) in row else f"{'-':>10}" for s in sizes)
+        slope = f"{e['slope']:>7.2f}" if e["slope"] is not None else f"{'-':>7}"
+        mark = "  SUPERLINEAR" if e["superlinear"] else ""
+        err = f"  ERROR {e['error']}" if e["error"] else ""
+        print(f"{name:<18} {cells} {slope}{mark}{err}", file=out)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    ap.add_argument("--targets", type=int, nargs="+", default=DEFAULT_CARDINALITIES)
+    ap.add_argument("--actions", nargs="+", help="対象アクション（既定: 登録済みすべて）")
+    ap.add_argument("-r", "--reps", type=int, default=15)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--slope-limit", type=float, default=SLOPE_LIMIT)
+    ap.add_argument("--out", help="結果 JSON の出力先")
+    a = ap.parse_args(argv)
+
+    report = run(a.sizes, a.targets, a.reps, a.actions, a.seed, a.slope_limit)
+    _print_table(report)
+    if a.out:
+        with open(a.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+            f.write("\n")
+    return 1 if any(e["superlinear"] for e in report["results"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+# benchmarks/bench_cold_start.py
+"""
+コールドスタートのベンチマーク。
+
+    python -m benchmarks.bench_cold_start
+    python -m benchmarks.bench_cold_start -n 10 --out cold.json
+
+毎回新しいインタプリタを起動し、以下を計測する（中央値を表示）:
+  importMs      import lambda_function にかかった時間
+  boto3Loaded   import 直後に boto3 が読み込まれているか
+  actionMods    import 直後に読み込まれている actions.* モジュール数
+  publishMs     最初の publishClientUpdate 呼び出し
+  clientInitMs  DynamoDB Table / Lambda クライアントの生成（初回アクセス時に発生）
+  firstMs       最初の moveCards 呼び出し（40 枚、インメモリ代替）
+  warmMs        2 回目の moveCards 呼び出し
+
+mode=eager は遅延化前と同じく import 時にクライアント生成と全アクションの
+import を済ませた場合の値で、mode=lazy（現在の既定動作）と比較する。
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+MODES = ["lazy", "eager"]
+COLUMNS = ["importMs", "publishMs", "clientInitMs", "firstMs", "warmMs"]
+
+
+def _ms(t0):
+    return round((time.perf_counter() - t0) * 1000.0, 3)
+
+
+def _child(mode):
+    """新しいプロセス内で 1 回分を計測して dict を返す"""
+    import contextlib
+    import io
+    import pickle
+    import random
+
+    from benchmarks import harness  # 環境変数の既定値を設定する（標準ライブラリのみ）
+
+    out = {"mode": mode}
+    t0 = time.perf_counter()
+    import lambda_function
+    if mode == "eager":
+        import action_registry
+        action_registry.load_all()
+        lambda_function.table.name, lambda_function.ai.meta  # noqa: B018  クライアントを生成
+    out["importMs"] = _ms(t0)
+    out["boto3Loaded"] = "boto3" in sys.modules
+    out["actionMods"] = sum(1 for m in sys.modules if m.startswith("actions."))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        lambda_function.lambda_handler(
+            {"info": {"fieldName": "publishClientUpdate"}, "arguments": {"matchId": "cold"}}, None)
+        out["publishMs"] = _ms(t0)
+
+    t0 = time.perf_counter()
+    lambda_function.table.name, lambda_function.ai.meta  # noqa: B018
+    out["clientInitMs"] = _ms(t0)
+
+    from benchmarks.bench_handlers import SCENARIOS
+    masters = harness.load_card_masters()
+    base = harness.generate_match(40, masters)
+    rng = random.Random(0)
+    with harness.backends(masters) as b, contextlib.redirect_stdout(io.StringIO()):
+        for key in ("firstMs", "warmMs"):
+            item = pickle.loads(pickle.dumps(base))
+            args = SCENARIOS["moveCards"](item, rng)
+            b.store(item)
+            t0 = time.perf_counter()
+            lambda_function.lambda_handler({"info": {"fieldName": "moveCards"}, "arguments": args}, None)
+            out[key] = _ms(t0)
+    return out
+
+
+def _spawn(mode):
+    proc = subprocess.run([sys.executable, "-m", "benchmarks.bench_cold_start", "--child", mode],
+                          capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _median(vals):
+    vals = sorted(vals)
+    return vals[len(vals) // 2]
+
+
+def run(n=5, modes=MODES):
+    report = {"meta": {"runs": n}, "results": {}}
+    for mode in modes:
+        samples = [_spawn(mode) for _ in range(n)]
+        row = {c: _median([s[c] for s in samples]) for c in COLUMNS}
+        row["boto3Loaded"] = samples[0]["boto3Loaded"]
+        row["actionMods"] = samples[0]["actionMods"]
+        report["results"][mode] = row
+    return report
+
+
+def _print_table(report, out=sys.stdout):
+    head = " ".join(f"{c:>13}" for c in COLUMNS)
+    print(f"{'mode':<6} {head} {'boto3':>6} {'actions':>8}", file=out)
+    for mode, r in report["results"].items():
+        cells = " ".join(f"{r[c]:>13.1f}" for c in COLUMNS)
+        print(f"{mode:<6} {cells} {str(r['boto3Loaded']):>6} {r['actionMods']:>8}", file=out)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-n", "--runs", type=int, default=5, help="モードごとのプロセス起動回数")
+    ap.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    ap.add_argument("--out", help="結果 JSON の出力先")
+    ap.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    a = ap.parse_args(argv)
+
+    if a.child:
+        print(json.dumps(_child(a.child)))
+        return 0
+
+    report = run(a.runs, a.modes)
+    _print_table(report)
+    if a.out:
+        with open(a.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
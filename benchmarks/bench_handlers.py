@@ -0,0 +1,279 @@
+# benchmarks/bench_handlers.py
+"""
+GraphQL フィールドごとの lambda_handler ベンチマーク。
+
+    python -m benchmarks.bench_handlers                      # 40/120/400/1000 枚
+    python -m benchmarks.bench_handlers --sizes 40 120 -n 50
+    python -m benchmarks.bench_handlers --out benchmarks/baseline.json
+    python -m benchmarks.bench_handlers --baseline benchmarks/baseline.json
+    python -m benchmarks.bench_handlers --check-budgets      # 盤面走査回数の予算チェック
+
+各反復ごとにシナリオ用の STATE をインメモリテーブルに書き戻してから
+lambda_handler を 1 回呼ぶ。レイテンシ計測と割り当て計測（tracemalloc）は
+互いに干渉しないよう別パスで行う。
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import pickle
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from benchmarks.harness import backends, cards_in, generate_match, load_card_masters
+from metrics import counters
+
+DEFAULT_SIZES = [40, 120, 400, 1000]
+FIELDS = ["moveCards", "summonCard", "advancePhase", "declareAttack",
+          "resolveBattle", "submitChoiceResponse"]
+# 1 呼び出しで盤面を何周してよいか（metrics の CardScans / カード枚数、p99）。
+# moveCards / summonCard / advancePhase はパッシブ再評価が場のカードごとに盤面を
+# 走査するため現状 O(n²)（1000 枚で約 90 周）。索引化したら締める。
+SCAN_BUDGETS = {
+    "moveCards":            100,
+    "summonCard":           100,
+    "advancePhase":         100,
+    "declareAttack":        4,
+    "resolveBattle":        8,
+    "submitChoiceResponse": 4,
+}
+REGRESSION_THRESHOLD = 0.10  # p50 / p95 / 割り当てがこの割合以上悪化したら REGRESSION
+
+
+# ---------------- シナリオ ----------------
+# 各関数は (生成済みマッチのコピー, rng) を受け取り、STATE を整えて arguments を返す
+def _scn_move_cards(item, rng):
+    card = rng.choice(cards_in(item, "p1", "Hand"))
+    return {"matchId": item["id"], "moves": [{"cardId": card["id"], "toZone": "Field"}]}
+
+
+def _scn_summon_card(item, rng):
+    card = rng.choice(cards_in(item, "p1", "Hand"))
+    return {"matchId": item["id"], "cardId": card["id"]}
+
+
+def _scn_advance_phase(item, rng):
+    item["phase"] = "End"  # End → Start: OnTurnEnd / run_turn_end / パッシブ再評価を通す
+    return {"matchId": item["id"]}
+
+
+def _scn_declare_attack(item, rng):
+    atk = rng.choice(cards_in(item, "p1", "Field"))
+    tgt = rng.choice(cards_in(item, "p2", "Field"))
+    return {"matchId": item["id"], "attackerId": atk["id"], "targetId": tgt["id"]}
+
+
+def _scn_resolve_battle(item, rng):
+    atk = rng.choice(cards_in(item, "p1", "Field"))
+    tgt = rng.choice(cards_in(item, "p2", "Field"))
+    item["battleStep"] = "AttackAbility"
+    item["pendingBattle"] = {
+        "attackerId": atk["id"], "attackerOwnerId": "p1",
+        "targetId": tgt["id"], "targetOwnerId": "p2",
+        "blockerId": None, "isLeader": False,
+    }
+    return {"matchId": item["id"]}
+
+
+def _scn_submit_choice_response(item, rng):
+    src = rng.choice(cards_in(item, "p1", "Field"))
+    options = [c["id"] for c in cards_in(item, "p2", "Field")]
+    req_id = f"bench-{rng.randrange(1 << 30)}"
+    item["choiceRequests"].append({
+        "requestId": req_id, "playerId": "p1", "promptText": "", "options": options,
+    })
+    item["pendingDeferred"].append({
+        "type": "Destroy", "selectionKey": req_id, "sourceCardId": src["id"],
+    })
+    body = {"requestId": req_id, "playerId": "p1", "selectedIds": [rng.choice(options)]}
+    return {"matchId": item["id"], "json": json.dumps(body)}
+
+
+SCENARIOS = {
+    "moveCards":            _scn_move_cards,
+    "summonCard":           _scn_summon_card,
+    "advancePhase":         _scn_advance_phase,
+    "declareAttack":        _scn_declare_attack,
+    "resolveBattle":        _scn_resolve_battle,
+    "submitChoiceResponse": _scn_submit_choice_response,
+}
+
+
+# ---------------- 計測 ----------------
+def percentile(sorted_vals, q):
+    if not sorted_vals:
+        return 0.0
+    idx = min(len(sorted_vals) - 1, max(0, int(round(q / 100.0 * (len(sorted_vals) - 1)))))
+    return sorted_vals[idx]
+
+
+def _prepare(b, base, field, rng):
+    item = pickle.loads(pickle.dumps(base, pickle.HIGHEST_PROTOCOL))
+    args = SCENARIOS[field](item, rng)
+    b.store(item)
+    return {"info": {"fieldName": field}, "arguments": args}
+
+
+def _call(handler, event):
+    """stdout（構造化ログ）を捨てて 1 回呼ぶ。例外は件数だけ数える"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            handler(event, None)
+            return True
+        except Exception:
+            return False
+
+
+def bench_field(b, base, field, iterations, alloc_iterations, seed):
+    from lambda_function import lambda_handler
+
+    rng = random.Random(seed)
+    timings, scans, errors = [], [], 0
+    for _ in range(iterations):
+        event = _prepare(b, base, field, rng)
+        t0 = time.perf_counter()
+        ok = _call(lambda_handler, event)
+        timings.append((time.perf_counter() - t0) * 1000.0)
+        scans.append(counters().get("CardScans", 0))
+        errors += not ok
+
+    peaks = []
+    rng = random.Random(seed)
+    for _ in range(alloc_iterations):
+        event = _prepare(b, base, field, rng)
+        tracemalloc.start()
+        _call(lambda_handler, event)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peaks.append(peak / 1024.0)
+
+    timings.sort()
+    peaks.sort()
+    scans.sort()
+    n_cards = len(base["cards"])
+    return {
+        "p50Ms":        round(percentile(timings, 50), 3),
+        "p95Ms":        round(percentile(timings, 95), 3),
+        "p99Ms":        round(percentile(timings, 99), 3),
+        "meanMs":       round(sum(timings) / len(timings), 3),
+        "peakAllocKiB": round(percentile(peaks, 50), 1),
+        "cardScans":    percentile(scans, 50),
+        "scanRatio":    round(percentile(scans, 99) / n_cards, 2),
+        "errors":       errors,
+        "iterations":   iterations,
+    }
+
+
+def run(sizes, fields, iterations, alloc_iterations, seed=0):
+    masters = load_card_masters()
+    results = {}
+    prev = logging.root.manager.disable
+    logging.disable(logging.WARNING)  # ランダム盤面で出る警告ログは計測対象外
+    try:
+        with backends(masters) as b:
+            for n in sizes:
+                base = generate_match(n, masters, seed=seed)
+                results[str(n)] = {
+                    f: bench_field(b, base, f, iterations, alloc_iterations, seed) for f in fields
+                }
+    finally:
+        logging.disable(prev)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "iterations": iterations,
+            "allocIterations": alloc_iterations,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+# ---------------- 比較 ----------------
+def over_budget(report, budgets=SCAN_BUDGETS):
+    """(size, field, scanRatio, budget) のうち予算超過のもの"""
+    out = []
+    for size, fields in report["results"].items():
+        for field, r in fields.items():
+            budget = budgets.get(field)
+            if budget is not None and r.get("scanRatio", 0) > budget:
+                out.append((size, field, r["scanRatio"], budget))
+    return out
+
+
+
+def diff(current, baseline, threshold=REGRESSION_THRESHOLD):
+    """(size, field, metric, base, cur, ratio, regressed) のリスト"""
+    rows = []
+    for size, fields in current["results"].items():
+        for field, cur in fields.items():
+            base = baseline.get("results", {}).get(size, {}).get(field)
+            if not base:
+                continue
+            for metric in ("p50Ms", "p95Ms", "p99Ms", "peakAllocKiB"):
+                b, c = base.get(metric), cur.get(metric)
+                if not b:
+                    continue
+                ratio = (c - b) / b
+                regressed = metric in ("p50Ms", "p95Ms", "peakAllocKiB") and ratio > threshold
+                rows.append((size, field, metric, b, c, ratio, regressed))
+    return rows
+
+
+def _print_table(report, out=sys.stdout):
+    print(f"{'size':>5} {'field':<22} {'p50':>9} {'p95':>9} {'p99':>9} {'KiB':>9} {'scans':>6} {'err':>4}",
+          file=out)
+    for size, fields in report["results"].items():
+        for field, r in fields.items():
+            print(f"{size:>5} {field:<22} {r['p50Ms']:>9.3f} {r['p95Ms']:>9.3f} "
+                  f"{r['p99Ms']:>9.3f} {r['peakAllocKiB']:>9.1f} {r['scanRatio']:>6.1f} {r['errors']:>4}",
+                  file=out)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    ap.add_argument("--fields", nargs="+", default=FIELDS, choices=FIELDS)
+    ap.add_argument("-n", "--iterations", type=int, default=100)
+    ap.add_argument("--alloc-iterations", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", help="結果 JSON の出力先")
+    ap.add_argument("--baseline", help="比較するベースライン JSON")
+    ap.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    ap.add_argument("--check-budgets", action="store_true", help="SCAN_BUDGETS 超過で終了コード 1")
+    a = ap.parse_args(argv)
+
+    report = run(a.sizes, a.fields, a.iterations, a.alloc_iterations, a.seed)
+    _print_table(report)
+
+    failed = 0
+    if a.check_budgets:
+        for size, field, ratio, budget in over_budget(report):
+            print(f"OVER BUDGET {size:>5} {field:<22} scanRatio {ratio} > {budget}")
+            failed = 1
+
+    if a.out:
+        with open(a.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+
+    if a.baseline:
+        with open(a.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = diff(report, baseline, a.threshold)
+        print()
+        regressions = 0
+        for size, field, metric, b, c, ratio, regressed in rows:
+            mark = "REGRESSION" if regressed else ""
+            regressions += regressed
+            print(f"{size:>5} {field:<22} {metric:<13} {b:>10.3f} -> {c:>10.3f} {ratio:+7.1%} {mark}")
+        return 1 if regressions or failed else 0
+    return failed
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+# benchmarks/harness.py
+"""
+ベンチマーク・リプレイ用の共通部品。
+
+  - data/results.csv からカードマスターを読み込む（DynamoDB 形式のまま保持）
+  - MemoryTable / MemoryDynamoClient / MemoryLambda: DynamoDB・Lambda の
+    インメモリ代替。STATE は pickle で保持し、get_item のたびに新しい
+    オブジェクトを返す（DynamoDB の逆シリアライズ相当）
+  - generate_match: 指定枚数のマッチを乱数シード付きで生成
+  - to_dynamo: 記録済み JSON を DynamoDB の読み込み結果と同じ形に戻す
+  - backends(): lambda_function / helper のクライアントを差し替える
+"""
+import csv
+import json
+import os
+import pickle
+import random
+from contextlib import contextmanager
+from decimal import Decimal
+
+# lambda_function の import 時に必要な環境変数（実際の AWS には接続しない）
+for _k, _v in {
+    "MATCH_TABLE": "bench-match",
+    "LEADER_MASTER_TABLE": "bench-leader",
+    "CARD_MASTER_TABLE": "bench-card",
+    "AI_LAMBDA_NAME": "bench-ai",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}.items():
+    os.environ.setdefault(_k, _v)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CARD_CSV = os.path.join(ROOT, "data", "results.csv")
+
+BENCH_LEADER_ID = "leader_bench"
+
+# 各プレイヤーの枚数に対するゾーン比率（残りは Deck）
+ZONE_RATIOS = [("Field", 0.08), ("Hand", 0.08), ("Graveyard", 0.15),
+               ("DamageZone", 0.03), ("Counter", 0.02)]
+ZONE_MINIMUMS = {"Field": 3, "Hand": 5}
+
+_NUMERIC = {"colorCostsCount", "counterLevel", "damage", "level", "power", "reviveLevel"}
+_BOOL = {"isPersistentSpell", "isTO"}
+
+
+# ---------------- カードマスター ----------------
+def _to_attr(column, raw):
+    """CSV の 1 セルを DynamoDB の属性値に変換"""
+    if raw.startswith("["):
+        return {"L": json.loads(raw)}
+    if column in _NUMERIC:
+        return {"N": raw or "0"}
+    if column in _BOOL:
+        return {"BOOL": raw == "true"}
+    return {"S": raw}
+
+
+def load_card_masters(path=CARD_CSV):
+    """cardId → DynamoDB 形式のマスター（batch_get_item の Responses と同じ形）"""
+    masters = {}
+    with open(path, encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if not row["effectList"]:
+                row["effectList"] = "[]"
+            masters[row["cardId"]] = {k: _to_attr(k, v) for k, v in row.items()}
+    return masters
+
+
+# ---------------- インメモリ代替 ----------------
+class MemoryTable:
+    """boto3 Table の get_item / put_item / delete_item だけを持つ代替"""
+
+    def __init__(self, key_names):
+        self.key_names = key_names
+        self._rows = {}
+        self.writes = 0
+
+    def _key(self, key):
+        return tuple(key[k] for k in self.key_names)
+
+    def put_item(self, Item):
+        self._rows[self._key(Item)] = pickle.dumps(Item, pickle.HIGHEST_PROTOCOL)
+        self.writes += 1
+        return {}
+
+    def get_item(self, Key):
+        raw = self._rows.get(self._key(Key))
+        return {"Item": pickle.loads(raw)} if raw is not None else {}
+
+    def delete_item(self, Key):
+        self._rows.pop(self._key(Key), None)
+        return {}
+
+    def load(self, **key):
+        """ベンチ側から保存済み STATE を覗くためのヘルパー"""
+        return self.get_item(Key=key).get("Item")
+
+
+class MemoryDynamoClient:
+    """helper.dynamodb（低レベルクライアント）の batch_get_item 代替"""
+
+    def __init__(self, table_name, masters):
+        self.table_name = table_name
+        self.masters = masters
+        self.calls = 0
+
+    def batch_get_item(self, RequestItems):
+        self.calls += 1
+        keys = RequestItems[self.table_name]["Keys"]
+        found = [self.masters[k["cardId"]["S"]] for k in keys if k["cardId"]["S"] in self.masters]
+        return {"Responses": {self.table_name: found}}
+
+
+class MemoryLambda:
+    """AI Lambda 起動の代替（ペイロードサイズだけ記録する）"""
+
+    def __init__(self):
+        self.payload_bytes = []
+
+    def invoke(self, FunctionName, InvocationType, Payload):
+        self.payload_bytes.append(len(Payload))
+        return {"StatusCode": 202}
+
+
+def bench_leader():
+    """自分の場のユニットに +1 するだけの単純なリーダー"""
+    aura = {"condition": "", "actions": [
+        {"type": "PowerAura", "target": "PlayerField", "value": 1, "duration": -1},
+    ]}
+    return {"leaderId": BENCH_LEADER_ID,
+            "evolutionStages": [{"passiveEffects": [aura]} for _ in range(3)]}
+
+
+class Backends:
+    def __init__(self, masters=None):
+        self.masters = masters if masters is not None else load_card_masters()
+        self.table = MemoryTable(["pk", "sk"])
+        self.leader_table = MemoryTable(["leaderId"])
+        self.leader_table.put_item(bench_leader())
+        self.dynamodb = MemoryDynamoClient(os.environ["CARD_MASTER_TABLE"], self.masters)
+        self.ai = MemoryLambda()
+
+    def store(self, item):
+        self.table.put_item(dict(item, pk=item["id"], sk="STATE"))
+
+
+@contextmanager
+def backends(masters=None):
+    """lambda_function / helper の AWS クライアントをインメモリ代替に差し替える"""
+    import helper
+    import lambda_function
+    from token_factory import reset_templates
+
+    b = Backends(masters)
+    saved = (lambda_function.table, lambda_function.leader_table, lambda_function.ai, helper.dynamodb)
+    lambda_function.table = b.table
+    lambda_function.leader_table = b.leader_table
+    lambda_function.ai = b.ai
+    helper.dynamodb = b.dynamodb
+    lambda_function.leader_cache.clear()
+    helper._master_items.clear()
+    reset_templates()
+    try:
+        yield b
+    finally:
+        (lambda_function.table, lambda_function.leader_table,
+         lambda_function.ai, helper.dynamodb) = saved
+        lambda_function.leader_cache.clear()
+        helper._master_items.clear()
+        reset_templates()
+
+
+# ---------------- マッチ生成 ----------------
+def card_instance(master, card_id, owner_id, zone):
+    from helper import _parse_dynamodb_item
+    m = _parse_dynamodb_item(master)
+    return {
+        "id":           card_id,
+        "baseCardId":   m["cardId"],
+        "ownerId":      owner_id,
+        "zone":         zone,
+        "level":        m.get("level", Decimal(0)),
+        "power":        m.get("power", Decimal(0)),
+        "damage":       m.get("damage", Decimal(0)),
+        "effectList":   m.get("effectList", []),
+        "statuses":     [],
+        "tempStatuses": [],
+    }
+
+
+def generate_match(n_cards, masters, *, seed=0, match_id="bench"):
+    """
+    n_cards 枚（2 人で等分）のマッチを生成する。
+    効果の構成は results.csv のカード分布そのまま（重複ありで抽選）。
+    """
+    rng = random.Random(seed)
+    pool = sorted(masters)
+    players = [
+        {"id": "p1", "name": "P1", "leaderId": BENCH_LEADER_ID, "levelPoints": []},
+        {"id": "p2", "name": "P2", "leaderId": BENCH_LEADER_ID, "levelPoints": []},
+    ]
+    cards = []
+    per_player = n_cards // 2
+    for p in players:
+        zones = []
+        for zone, ratio in ZONE_RATIOS:
+            zones += [zone] * max(ZONE_MINIMUMS.get(zone, 0), int(per_player * ratio))
+        zones += ["Deck"] * max(0, per_player - len(zones))
+        for i, zone in enumerate(zones[:per_player]):
+            base = masters[rng.choice(pool)]
+            cards.append(card_instance(base, f"{p['id']}_c{i:04d}", p["id"], zone))
+
+    return {
+        "id":              match_id,
+        "status":          "Battle",
+        "phase":           "Main",
+        "turnPlayerId":    "p1",
+        "turnCount":       Decimal(1),
+        "matchVersion":    Decimal(0),
+        "players":         players,
+        "cards":           cards,
+        "choiceRequests":  [],
+        "choiceResponses": [],
+        "pendingDeferred": [],
+        "updatedAt":       "2024-01-01T00:00:00.000+00:00",
+    }
+
+
+def to_dynamo(obj):
+    """JSON 互換の値を DynamoDB から読んだ形（整数は Decimal）に戻す"""
+    if isinstance(obj, dict):
+        return {k: to_dynamo(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [to_dynamo(v) for v in obj]
+    if isinstance(obj, int) and not isinstance(obj, bool):
+        return Decimal(obj)
+    return obj
+
+
+def cards_in(item, owner_id, zone):
+    return [c for c in item["cards"] if c["ownerId"] == owner_id and c["zone"] == zone]
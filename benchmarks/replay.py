@@ -0,0 +1,178 @@
+# benchmarks/replay.py
+"""
+trace_recorder で記録した呼び出しを現在のコードでオフライン再実行し、
+保存 STATE・レスポンスの意味的な差分と呼び出しごとの時間を報告する。
+
+    python -m benchmarks.replay traces/                 # ディレクトリ配下をすべて
+    python -m benchmarks.replay a.json.gz b.json.gz --ignore requestId
+    python -m benchmarks.replay traces/ --json report.json
+
+DynamoDB / Lambda は benchmarks.harness のインメモリ代替を使う。カードマスターは
+data/results.csv、リーダー定義はトレースに同梱されたものを使う。
+
+比較の既定では updatedAt / timestamp を無視する。乱数・現在時刻に依存する
+効果（ランダム選択・トークン ID など）は記録時と一致しないことがある。
+1 件でも差分があれば終了コード 1。
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import sys
+import time
+
+from benchmarks.harness import backends, load_card_masters, to_dynamo
+from trace_recorder import load_trace, plain
+
+DEFAULT_IGNORE = {"updatedAt", "timestamp"}
+MAX_SHOWN_DIFFS = 5
+
+
+# ---------------- 差分 ----------------
+def _by_id(values):
+    if values and all(isinstance(v, dict) and "id" in v for v in values):
+        return {v["id"]: v for v in values}
+    return None
+
+
+def semantic_diff(expected, actual, ignore=DEFAULT_IGNORE, path="$"):
+    """
+    2 つの JSON 値の差分を "パス: 期待値 != 実際" のリストで返す。
+    id を持つ dict のリスト（cards / players）は並び順ではなく id で対応付ける。
+    """
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        out = []
+        for k in sorted(set(expected) | set(actual)):
+            if k in ignore:
+                continue
+            if k not in actual:
+                out.append(f"{path}.{k}: missing in replay")
+            elif k not in expected:
+                out.append(f"{path}.{k}: unexpected in replay")
+            else:
+                out += semantic_diff(expected[k], actual[k], ignore, f"{path}.{k}")
+        return out
+
+    if isinstance(expected, list) and isinstance(actual, list):
+        e_ids, a_ids = _by_id(expected), _by_id(actual)
+        if e_ids is not None and a_ids is not None:
+            return semantic_diff(e_ids, a_ids, ignore, path)
+        out = []
+        if len(expected) != len(actual):
+            out.append(f"{path}: length {len(expected)} != {len(actual)}")
+        for i, (e, a) in enumerate(zip(expected, actual)):
+            out += semantic_diff(e, a, ignore, f"{path}[{i}]")
+        return out
+
+    if expected != actual:
+        return [f"{path}: {expected!r} != {actual!r}"]
+    return []
+
+
+# ---------------- 再実行 ----------------
+@contextlib.contextmanager
+def _no_recording():
+    saved = {k: os.environ.pop(k) for k in ("TRACE_DIR", "TRACE_BUCKET", "TRACE_RECORD") if k in os.environ}
+    try:
+        yield
+    finally:
+        os.environ.update(saved)
+
+
+def replay_one(trace, masters, ignore=DEFAULT_IGNORE):
+    from lambda_function import lambda_handler
+
+    event = {k: v for k, v in trace["event"].items() if k != "trace"}
+    args = event.get("arguments", {})
+    mid = args.get("matchId") or args.get("id")
+
+    with backends(masters) as b, _no_recording():
+        for leader in (trace.get("leaders") or {}).values():
+            b.leader_table.put_item(to_dynamo(leader))
+        if trace.get("pre"):
+            b.store(to_dynamo(trace["pre"]))
+        writes = b.table.writes
+
+        result = error = None
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                result = lambda_handler(event, None)
+            except Exception as e:
+                error = e
+        replay_ms = (time.perf_counter() - t0) * 1000.0
+
+        post = None
+        if b.table.writes > writes and mid:
+            post = plain(b.table.load(pk=mid, sk="STATE"))
+
+    diffs = []
+    if bool(trace.get("error")) != bool(error):
+        diffs.append(f"$error: {trace.get('error')!r} != {error!r}")
+    diffs += semantic_diff(trace.get("post"), post, ignore, "$post")
+    diffs += semantic_diff(trace.get("result"), plain(result) if result is not None else None,
+                           ignore, "$result")
+    return {
+        "field":      trace.get("field"),
+        "matchId":    mid,
+        "recordedMs": trace.get("durationMs"),
+        "replayMs":   round(replay_ms, 3),
+        "diffs":      diffs,
+    }
+
+
+def iter_trace_paths(paths):
+    for p in paths:
+        if os.path.isdir(p):
+            for root, _, files in os.walk(p):
+                for name in sorted(files):
+                    if name.endswith((".json", ".json.gz")):
+                        yield os.path.join(root, name)
+        else:
+            yield p
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("paths", nargs="+", help="トレースファイルまたはディレクトリ")
+    ap.add_argument("--ignore", nargs="*", default=[], help="追加で無視するキー")
+    ap.add_argument("--json", help="結果 JSON の出力先")
+    a = ap.parse_args(argv)
+
+    ignore = DEFAULT_IGNORE | set(a.ignore)
+    masters = load_card_masters()
+    reports = []
+
+    prev = logging.root.manager.disable
+    logging.disable(logging.WARNING)
+    try:
+        for path in iter_trace_paths(a.paths):
+            rep = replay_one(load_trace(path), masters, ignore)
+            rep["path"] = path
+            reports.append(rep)
+            status = "DIFF" if rep["diffs"] else "OK"
+            print(f"{status:<4} {rep['field'] or '-':<22} recorded {rep['recordedMs'] or 0:>9.3f}ms "
+                  f"replay {rep['replayMs']:>9.3f}ms  {path}")
+            for d in rep["diffs"][:MAX_SHOWN_DIFFS]:
+                print(f"       {d}")
+            if len(rep["diffs"]) > MAX_SHOWN_DIFFS:
+                print(f"       ... {len(rep['diffs']) - MAX_SHOWN_DIFFS} more")
+    finally:
+        logging.disable(prev)
+
+    n_diff = sum(1 for r in reports if r["diffs"])
+    print(f"\n{len(reports)} traces, {n_diff} with diffs, "
+          f"recorded {sum(r['recordedMs'] or 0 for r in reports):.1f}ms, "
+          f"replay {sum(r['replayMs'] for r in reports):.1f}ms")
+
+    if a.json:
+        with open(a.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+    return 1 if n_diff else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+# benchmarks/simulate.py
+"""
+ヘッドレスのマッチシミュレータ（負荷生成・バランス検証用）。
+
+    python -m benchmarks.simulate                          # greedy 同士 100 戦
+    python -m benchmarks.simulate -g 1000 -j 8 --p1 random --p2 greedy
+    python -m benchmarks.simulate -g 200 --profile 25      # 上位 25 関数を表示
+    python -m benchmarks.simulate --json sim.json
+
+data/results.csv のカタログから乱数シード付きでデッキを組み、DynamoDB を介さず
+インメモリの item に対してエンジンの関数（lambda_function.play_turn →
+summon_card / declare_attack / resolve_battle / advance_phase、各所の
+resolve・refresh_passive_auras）で決着まで進める。ゲームはプロセスプールに分散する。
+
+エンジンには勝敗判定が無いため、シミュレータ側で次のルールを置く:
+  - ダメージゾーンの枚数が --damage-limit に達したプレイヤーの負け
+  - ターン開始時に山札が尽きているプレイヤーの負け
+  - --max-turns に達したら引き分け
+
+出力: games/sec・mutations/sec（方策が選んだ 1 手 = 1 mutation）、勝率、
+平均ターン数、ホットパスカウンタの合計（--profile で cProfile の上位関数）。
+同じ --seed なら同じゲーム列になる（カード効果内の乱数もマッチの乱数ストリーム
+match_rng を seed で初期化するので再現する）。
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import marshal
+import multiprocessing
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+from benchmarks.harness import BENCH_LEADER_ID, backends, card_instance, load_card_masters
+
+DECK_SIZE = 40
+HAND_SIZE = 5
+DAMAGE_LIMIT = 7
+MAX_TURNS = 60
+
+_worker = {}
+
+
+# ---------------- マッチ生成 ----------------
+def build_deck(masters, rng, owner_id, size=DECK_SIZE):
+    """カタログから重複ありで size 枚を抽選し、シャッフル済みの山札にする"""
+    pool = sorted(masters)
+    cards = [card_instance(masters[rng.choice(pool)], f"{owner_id}_c{i:03d}", owner_id, "Deck")
+             for i in range(size)]
+    rng.shuffle(cards)
+    return cards
+
+
+def new_match(masters, seed, deck_size=DECK_SIZE, hand_size=HAND_SIZE):
+    from match_rng import seed_match
+    rng = random.Random(seed)
+    players = [
+        {"id": "p1", "name": "AI_sim1", "leaderId": BENCH_LEADER_ID,
+         "levelPoints": [{"color": "COLORLESS", "isUsed": False}]},
+        {"id": "p2", "name": "AI_sim2", "leaderId": BENCH_LEADER_ID, "levelPoints": []},
+    ]
+    cards = []
+    for p in players:
+        deck = build_deck(masters, rng, p["id"], deck_size)
+        for c in deck[:hand_size]:
+            c["zone"] = "Hand"
+        cards += deck
+    item = {
+        "id":              f"sim-{seed}",
+        "status":          "Battle",
+        "phase":           "Start",
+        "turnPlayerId":    "p1",
+        "turnCount":       0,
+        "matchVersion":    0,
+        "players":         players,
+        "cards":           cards,
+        "choiceRequests":  [],
+        "choiceResponses": [],
+        "pendingDeferred": [],
+    }
+    seed_match(item, seed)
+    return item
+
+
+def _zone_count(item, owner_id, zone):
+    return sum(1 for c in item["cards"] if c["ownerId"] == owner_id and c["zone"] == zone)
+
+
+def winner(item, damage_limit):
+    """決着していれば勝者の playerId（引き分けは "draw"）、続行なら None"""
+    ids = [p["id"] for p in item["players"]]
+    lost = [pid for pid in ids if _zone_count(item, pid, "DamageZone") >= damage_limit]
+    turn = item["turnPlayerId"]
+    if item["phase"] == "Start" and _zone_count(item, turn, "Deck") == 0:
+        lost.append(turn)
+    if not lost:
+        return None
+    alive = [pid for pid in ids if pid not in lost]
+    return alive[0] if len(alive) == 1 else "draw"
+
+
+# ---------------- 1 ゲーム ----------------
+def _init_worker(masters):
+    """プロセスごとに 1 回: AWS クライアントをインメモリ代替に差し替えておく"""
+    logging.disable(logging.WARNING)
+    _worker["masters"] = masters
+    _worker["backends"] = backends(masters)
+    _worker["backends"].__enter__()
+
+
+def play_game(task):
+    """task = (seed, p1 方策, p2 方策, damage_limit, max_turns, profile)"""
+    import lambda_function as lf
+    from ai_policy import get_policy
+    from card_view import reset_card_views
+    from metrics import counters, start_invocation
+
+    seed, p1, p2, damage_limit, max_turns, profile = task
+    item = new_match(_worker["masters"], seed)
+    rng = random.Random(seed ^ 0x5EED)
+    policies = {"p1": get_policy(p1, random.Random(rng.random())),
+                "p2": get_policy(p2, random.Random(rng.random()))}
+    hot = Counter()
+    result = {"seed": seed, "winner": None, "turns": 0, "mutations": 0, "events": 0, "error": None}
+
+    prof = None
+    if profile:
+        import cProfile
+        prof = cProfile.Profile()
+        prof.enable()
+    t0 = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            while result["winner"] is None:
+                if item.get("turnCount", 0) >= max_turns:
+                    result["winner"] = "draw"
+                    break
+                pid = item["turnPlayerId"]
+                reset_card_views()           # 1 ターン = 1 呼び出し相当
+                start_invocation("simulate", enabled=False)
+                events = []
+                result["mutations"] += lf.play_turn(item, pid, policies[pid], events)
+                result["events"] += len(events)
+                # play_turn は相手の応答待ちでターンの途中でも戻る
+                result["turns"] += item["turnPlayerId"] != pid
+                hot.update(counters())
+
+                # 相手側に残った選択要求（カウンター確認・TO 選択など）に答える
+                answered = 0
+                for req in list(item.get("choiceRequests") or []):
+                    other = req.get("playerId")
+                    if other != pid and other in policies:
+                        lf.answer_choice(item, policies[other].answer(req, item, other))
+                        answered += 1
+                if item["turnPlayerId"] == pid and not answered:
+                    raise RuntimeError(f"turn of {pid} is stuck waiting for a response")
+                result["winner"] = winner(item, damage_limit)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - t0
+    result["counters"] = dict(hot)
+    if prof:
+        prof.disable()
+        prof.create_stats()
+        result["profile"] = marshal.dumps(prof.stats)
+    return result
+
+
+# ---------------- 集計 ----------------
+def run(games=100, jobs=None, p1="greedy", p2="greedy", seed=0,
+        damage_limit=DAMAGE_LIMIT, max_turns=MAX_TURNS, profile=False):
+    masters = load_card_masters()
+    tasks = [(seed + i, p1, p2, damage_limit, max_turns, profile) for i in range(games)]
+    jobs = jobs or os.cpu_count() or 1
+
+    t0 = time.perf_counter()
+    if jobs == 1:
+        prev = logging.root.manager.disable
+        logging.disable(logging.WARNING)
+        _worker["masters"] = masters
+        try:
+            with backends(masters):
+                results = [play_game(t) for t in tasks]
+        finally:
+            logging.disable(prev)
+    else:
+        with multiprocessing.Pool(jobs, initializer=_init_worker, initargs=(masters,)) as pool:
+            results = list(pool.imap_unordered(play_game, tasks, chunksize=max(1, games // (jobs * 4))))
+    wall = time.perf_counter() - t0
+    results.sort(key=lambda r: r["seed"])
+
+    finished = [r for r in results if not r["error"]]
+    mutations = sum(r["mutations"] for r in results)
+    hot = Counter()
+    for r in results:
+        hot.update(r["counters"])
+    report = {
+        "meta": {"games": games, "jobs": jobs, "p1": p1, "p2": p2, "seed": seed,
+                 "damageLimit": damage_limit, "maxTurns": max_turns},
+        "wallSeconds":   round(wall, 3),
+        "gamesPerSec":   round(games / wall, 2) if wall else None,
+        "mutationsPerSec": round(mutations / wall, 1) if wall else None,
+        "mutations":     mutations,
+        "avgTurns":      round(sum(r["turns"] for r in finished) / len(finished), 2) if finished else None,
+        "outcomes":      dict(Counter(r["winner"] or "error" for r in results)),
+        "errors":        [{"seed": r["seed"], "error": r["error"]} for r in results if r["error"]],
+        "counters":      dict(hot.most_common()),
+    }
+    profiles = [r["profile"] for r in results if r.get("profile")]
+    return report, profiles
+
+
+def _print_profile(profiles, top, out=sys.stdout):
+    import pstats
+    stats = None
+    for raw in profiles:
+        st = pstats.Stats(stream=out)
+        st.stats = marshal.loads(raw)
+        st.get_top_level_stats()
+        if stats is None:
+            stats = st
+        else:
+            stats.add(st)
+    if stats:
+        stats.sort_stats("tottime").print_stats(top)
+
+
+def _print_report(report, out=sys.stdout):
+    m = report["meta"]
+    print(f"{m['games']} games ({m['p1']} vs {m['p2']}, {m['jobs']} procs) in {report['wallSeconds']:.2f}s", file=out)
+    print(f"  games/sec     {report['gamesPerSec']}", file=out)
+    print(f"  mutations/sec {report['mutationsPerSec']}  ({report['mutations']} mutations)", file=out)
+    print(f"  avg turns     {report['avgTurns']}", file=out)
+    print(f"  outcomes      {report['outcomes']}", file=out)
+    for name, n in list(report["counters"].items())[:8]:
+        print(f"  {name:<22} {n}", file=out)
+    for e in report["errors"][:5]:
+        print(f"  ERROR seed={e['seed']}: {e['error']}", file=out)
+
+
+def main(argv=None):
+    from ai_policy import policy_names
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-g", "--games", type=int, default=100)
+    ap.add_argument("-j", "--jobs", type=int, default=None, help="プロセス数（既定: CPU 数）")
+    ap.add_argument("--p1", default="greedy", choices=policy_names())
+    ap.add_argument("--p2", default="greedy", choices=policy_names())
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--damage-limit", type=int, default=DAMAGE_LIMIT)
+    ap.add_argument("--max-turns", type=int, default=MAX_TURNS)
+    ap.add_argument("--profile", type=int, metavar="N", help="cProfile を取り上位 N 関数を表示")
+    ap.add_argument("--json", help="結果 JSON の出力先")
+    a = ap.parse_args(argv)
+
+    report, profiles = run(a.games, a.jobs, a.p1, a.p2, a.seed, a.damage_limit, a.max_turns,
+                           profile=bool(a.profile))
+    _print_report(report)
+    if a.profile:
+        _print_profile(profiles, a.profile)
+    if a.json:
+        with open(a.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
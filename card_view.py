@@ -0,0 +1,133 @@
+# card_view.py
+"""
+カードインスタンスのステータスを key 引きするインメモリビュー。
+
+永続化・GraphQL 上の形は従来どおり statuses / tempStatuses のリスト（CardStatus）。
+ビューはそのリストを key → エントリの dict に索引し、実効パワー等の集計値を
+キャッシュするだけなので、シリアライズ境界で変換し直す必要はない。
+
+helper.add_status / add_temp_status / remove_sourced_status 経由の変更は
+ビューに差分反映される。リストの差し替え（card["tempStatuses"] = [...]）や
+append は、次回参照時にリストの同一性と長さの変化で検出して索引し直す。
+
+それ以外の直接書き込み（tmp[i] = ... のような同じ長さでの置き換え、
+entry["value"] = ... の書き換え）は検出できないのでサポートしない。
+helper を使うか、書いた後に statuses_changed(card) を呼ぶこと。
+"""
+
+# 実効値に加算される tempStatuses のキー
+POWER_BOOST = "TempPowerBoost"
+DAMAGE_BOOST = "TempDamageBoost"
+COST_MODIFIER = "CostModifier"
+
+
+class CardView:
+    __slots__ = ("card", "statuses", "temp", "_boost", "_sts_src", "_sts_len", "_tmp_src", "_tmp_len")
+
+    def __init__(self, card):
+        self.card = card
+        self.reindex()
+
+    # ---------------- 索引 ----------------
+    def reindex(self):
+        card = self.card
+        sts = card.get("statuses")
+        tmp = card.get("tempStatuses")
+        self.statuses = {}
+        for s in sts or ():
+            # add_status と同じく先頭一致を採用
+            self.statuses.setdefault(s["key"], s)
+        self.temp = {}
+        for s in tmp or ():
+            self.temp.setdefault(s["key"], []).append(s)
+        self._boost = {}
+        # 参照を保持しておくことで id 再利用による誤判定を防ぐ
+        self._sts_src, self._sts_len = sts, len(sts or ())
+        self._tmp_src, self._tmp_len = tmp, len(tmp or ())
+
+    def stale(self):
+        card = self.card
+        sts = card.get("statuses")
+        tmp = card.get("tempStatuses")
+        return (sts is not self._sts_src or len(sts or ()) != self._sts_len or
+                tmp is not self._tmp_src or len(tmp or ()) != self._tmp_len)
+
+    # ---------------- 差分反映（helper から呼ばれる） ----------------
+    def status_added(self, entry):
+        self.statuses.setdefault(entry["key"], entry)
+        self._sts_src = self.card["statuses"]
+        self._sts_len += 1
+        self._boost.pop(entry["key"], None)
+
+    def status_changed(self, key):
+        self._boost.pop(key, None)
+
+    def temp_added(self, entry):
+        self.temp.setdefault(entry["key"], []).append(entry)
+        self._tmp_src = self.card["tempStatuses"]
+        self._tmp_len += 1
+        self._boost.pop(entry["key"], None)
+
+    # ---------------- 参照 ----------------
+    def status(self, key, default=None):
+        s = self.statuses.get(key)
+        return default if s is None else s["value"]
+
+    def has(self, key):
+        return key in self.statuses
+
+    def temp_entries(self, key):
+        return self.temp.get(key, ())
+
+    def boost(self, key):
+        """tempStatuses 上の key の合計値（キャッシュ付き）"""
+        v = self._boost.get(key)
+        if v is None:
+            v = self._boost[key] = sum(int(s["value"]) for s in self.temp.get(key, ()))
+        return v
+
+    @property
+    def power(self):
+        return int(self.card.get("power", 0)) + self.boost(POWER_BOOST)
+
+    @property
+    def damage(self):
+        return int(self.card.get("damage", 0)) + self.boost(DAMAGE_BOOST)
+
+    @property
+    def level(self):
+        return int(self.card.get("level", 0))
+
+    @property
+    def cost(self):
+        base = self.card.get("baseData", {}).get("level", self.card.get("level", 0))
+        return int(base) + int(self.status(COST_MODIFIER, 0)) + self.boost(COST_MODIFIER)
+
+
+# id(card) → CardView。Lambda の呼び出しごとに reset_card_views() で破棄する
+_views: dict[int, CardView] = {}
+
+
+def card_view(card):
+    """カードのビューを取得（必要なら索引し直す）"""
+    v = _views.get(id(card))
+    if v is None or v.card is not card:
+        v = _views[id(card)] = CardView(card)
+    elif v.stale():
+        v.reindex()
+    return v
+
+
+def statuses_changed(card):
+    """helper を通さずに statuses / tempStatuses を書き換えた後に呼ぶ（次回参照時に索引し直す）"""
+    v = _views.get(id(card))
+    if v is not None and v.card is card:
+        v._sts_src = v._tmp_src = _CHANGED
+
+
+# stale() で必ず不一致になる目印
+_CHANGED = object()
+
+
+def reset_card_views():
+    _views.clear()
@@ -0,0 +1,119 @@
+# choice_state.py
+"""
+choiceRequests / choiceResponses / pendingDeferred のインメモリ索引。
+
+DynamoDB・GraphQL 上はこれまでどおりのリスト。処理中は keyed() で
+requestId / selectionKey 引きの KeyedEntries に置き換え、存在確認・取得・
+削除を O(1) にする。永続化時は to_persisted()、レスポンス生成時は
+DecimalEncoder がリストに戻す。
+
+リストへの戻し順は追加順のまま（キーが入り混じっていても並べ替えない）。
+"""
+
+# フィールド名 → 索引に使うキー
+KEY_FIELDS = {
+    "choiceRequests":  "requestId",
+    "choiceResponses": "requestId",
+    "pendingDeferred": "selectionKey",
+}
+
+
+class KeyedEntries:
+    """キーで索引したエントリ列。len / iter / 添字 / append は list と同様に使える"""
+    __slots__ = ("key_field", "_slots", "_by_key", "_len")
+
+    def __init__(self, key_field, entries=()):
+        self.key_field = key_field
+        # 追加順のエントリ列。pop したところは _REMOVED にしておき、添字アクセスの前に詰める
+        self._slots: list = []
+        self._by_key: dict = {}   # key → _slots 上の位置のリスト
+        self._len = 0
+        self.extend(entries)
+
+    def _compact(self):
+        if self._len == len(self._slots):
+            return
+        self._slots = [e for e in self._slots if e is not _REMOVED]
+        self._by_key = {}
+        for i, e in enumerate(self._slots):
+            self._by_key.setdefault(e.get(self.key_field), []).append(i)
+
+    # ---------------- list 互換 ----------------
+    def append(self, entry):
+        self._by_key.setdefault(entry.get(self.key_field), []).append(len(self._slots))
+        self._slots.append(entry)
+        self._len += 1
+
+    def extend(self, entries):
+        for e in entries:
+            self.append(e)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        for e in self._slots:
+            if e is not _REMOVED:
+                yield e
+
+    def __getitem__(self, idx):
+        self._compact()
+        return self._slots[idx]
+
+    def __eq__(self, other):
+        if isinstance(other, (KeyedEntries, list, tuple)):
+            return self.to_list() == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"KeyedEntries({self.key_field!r}, {self.to_list()!r})"
+
+    def to_list(self):
+        return list(self)
+
+    # ---------------- キー操作 ----------------
+    def has(self, key):
+        return key in self._by_key
+
+    def get(self, key):
+        return [self._slots[i] for i in self._by_key.get(key, ())]
+
+    def first(self, key):
+        idx = self._by_key.get(key)
+        return self._slots[idx[0]] if idx else None
+
+    def pop(self, key):
+        """key に一致するエントリをすべて取り除いて返す"""
+        idx = self._by_key.pop(key, ())
+        entries = [self._slots[i] for i in idx]
+        for i in idx:
+            self._slots[i] = _REMOVED
+        self._len -= len(entries)
+        return entries
+
+
+# pop 済みの位置の目印
+_REMOVED = object()
+
+
+def keyed(item, field, *, create=True):
+    """
+    item[field] を KeyedEntries にして返す（変換済みならそのまま）。
+    create=False でフィールドが無い場合は item を変更せず空の索引を返す。
+    """
+    cur = item.get(field)
+    if isinstance(cur, KeyedEntries):
+        return cur
+    ke = KeyedEntries(KEY_FIELDS[field], cur or ())
+    if cur is not None or create:
+        item[field] = ke
+    return ke
+
+
+def to_persisted(item):
+    """put_item 用に KeyedEntries をリストへ戻した浅いコピーを返す"""
+    out = dict(item)
+    for field in KEY_FIELDS:
+        if isinstance(out.get(field), KeyedEntries):
+            out[field] = out[field].to_list()
+    return out
@@ -104,14 +104,8 @@ def get_server_implementations() -> Tuple[Set[str], Set[str]]:
     """サーバー側の実装済みハンドラを取得"""
     registered_actions = set()
     
-    # action_registry から登録済みアクションを取得
-    for action_type in [
-        "Draw", "PowerAura", "DamageAura", "KeywordAura", "Select", "SelectOption",
-        "Destroy", "Summon", "PayCost", "GainLevel", "DestroyLevel", "AssignColor",
-        "ActivateCost", "PlayerStatus", "SetPlayerStatus", "Transform", "CounterChange",
-        "ApplyDamage", "CreateToken", "CallMethod", "NextSummonBuff", "CostModifier",
-        "SetStatus", "Bounce", "Discard", "Exile", "MoveField", "MoveDeck", "MoveToDamageZone"
-    ]:
+    # action_registry のマニフェストから登録済みアクションを取得
+    for action_type in action_registry.action_names():
         registered_actions.add(action_type)
     
     # トリガーハンドラは lambda_function.py の handle_trigger で処理される
@@ -0,0 +1,142 @@
+# deck_stack.py
+"""
+プレイヤーごとの山札の並び（デッキスタック）。
+
+item["decks"] = {playerId: [cardId, ...]} を STATE に保存する。リストの末尾が
+山札の一番上で、ドロー・ミル（ダメージゾーン送り）は末尾から k 枚取るだけ
+（盤面全体を走査しない）。カードの zone が正であり、スタックは順序の索引:
+  - スタックに残っていても zone が Deck でない（別経路で移動した）カードは
+    取り出し時に読み飛ばして取り除く
+  - スタックが無いマッチは item["cards"] の並び（先に出てくる Deck のカードが上）から作る
+  - 要求枚数に足りないときだけ 1 回盤面を走査し、スタックに無い Deck のカードを
+    一番下に足す（スタックを通さずに Deck へ置かれたカードの取りこぼし防止）
+
+山札へカードを置く処理（MoveDeck・moveCards・トークン生成）は insert を通す。
+"""
+from metrics import count
+
+DECKS_KEY = "decks"
+
+# id(item["cards"]) ごとの cardId → カード。card_view と同じくリストの同一性と
+# 長さで変化を検出して作り直す（カードは追加されるだけで削除されない）
+_index = {"cards": None, "len": -1, "map": {}}
+
+
+def _card_map(item):
+    cards = item["cards"]
+    if _index["cards"] is not cards or _index["len"] != len(cards):
+        count("CardScans", len(cards))  # 呼び出しごとに 1 回（以降の山札操作で共有）
+        _index.update(cards=cards, len=len(cards), map={c["id"]: c for c in cards})
+    return _index["map"]
+
+
+def _in_deck(card, player_id):
+    return card is not None and card["zone"] == "Deck" and card["ownerId"] == player_id
+
+
+def _build(item, player_id):
+    # 従来の暗黙の順序: item["cards"] で先に出てくるものが上
+    ids = [c["id"] for c in item["cards"] if _in_deck(c, player_id)]
+    ids.reverse()
+    return ids
+
+
+def deck_ids(item, player_id):
+    """player_id の山札の cardId（下 → 上）。無ければ作って item に保存する"""
+    decks = item.get(DECKS_KEY)
+    if decks is None:
+        decks = item[DECKS_KEY] = {}
+    ids = decks.get(player_id)
+    if ids is None:
+        count("DeckRebuilds")
+        ids = decks[player_id] = _build(item, player_id)
+    return ids
+
+
+def _adopt_untracked(item, player_id, ids, taken=()):
+    """スタックに無い Deck のカードを一番下に足す（盤面を 1 回走査）"""
+    count("DeckRebuilds")
+    known = set(ids).union(c["id"] for c in taken)
+    missing = [c["id"] for c in item["cards"] if _in_deck(c, player_id) and c["id"] not in known]
+    missing.reverse()
+    ids[:0] = missing
+    return bool(missing)
+
+
+def peek(item, player_id, n=1):
+    """山札の上から n 枚（上から順）。スタックは変えない（古い要素の掃除のみ）"""
+    ids = deck_ids(item, player_id)
+    cards = _card_map(item)
+    out = []
+    pos = len(ids) - 1
+    adopted = False
+    while len(out) < n:
+        if pos < 0:
+            if adopted or not _adopt_untracked(item, player_id, ids):
+                break
+            adopted, out, pos = True, [], len(ids) - 1
+            continue
+        card = cards.get(ids[pos])
+        if _in_deck(card, player_id):
+            out.append(card)
+        else:
+            del ids[pos]              # 別経路で山札を離れたカード
+        pos -= 1
+    return out
+
+
+def pop(item, player_id, n=1):
+    """山札の上から n 枚を取り除いて返す（上から順）。zone の変更は呼び出し側で行う"""
+    ids = deck_ids(item, player_id)
+    cards = _card_map(item)
+    out = []
+    adopted = False
+    while len(out) < n:
+        if not ids:
+            if adopted or not _adopt_untracked(item, player_id, ids, out):
+                break
+            adopted = True
+            continue
+        card = cards.get(ids.pop())
+        if _in_deck(card, player_id):
+            out.append(card)
+    return out
+
+
+def draw(item, player_id, n=1, to_zone="Hand"):
+    """山札の上から n 枚を to_zone へ移し、移したカードを返す"""
+    cards = pop(item, player_id, n)
+    for c in cards:
+        c["zone"] = to_zone
+    count("DeckDraws", len(cards))
+    return cards
+
+
+def insert(item, card, position="Bottom"):
+    """
+    card を持ち主の山札に置く（zone も Deck にする）。
+    position: "Top" / "Bottom" / 上からの枚数（0 = 一番上）
+    """
+    owner = card["ownerId"]
+    card["zone"] = "Deck"
+    ids = deck_ids(item, owner)
+    if card["id"] in ids:
+        ids.remove(card["id"])
+    if position == "Top":
+        ids.append(card["id"])
+    elif position in (None, "Bottom"):
+        ids.insert(0, card["id"])
+    else:
+        ids.insert(max(0, len(ids) - int(position)), card["id"])
+
+
+def shuffle(item, player_id, rng=None):
+    """山札を切り直す（rng 省略時はマッチの乱数ストリーム）"""
+    if rng is None:
+        from match_rng import match_random
+        rng = match_random(item)
+    cards = _card_map(item)
+    ids = deck_ids(item, player_id)
+    ids[:] = [i for i in ids if _in_deck(cards.get(i), player_id)]
+    rng.shuffle(ids)
+    return ids
@@ -10,6 +10,19 @@ zip -r "$ZIP_FILE" \
   lambda_function.py \
   helper.py \
   action_registry.py \
+  aws_clients.py \
+  ai_policy.py \
+  aura_index.py \
+  card_view.py \
+  choice_state.py \
+  deck_stack.py \
+  match_log.py \
+  match_rng.py \
+  metrics.py \
+  trace_recorder.py \
+  item_size.py \
+  profiler.py \
+  token_factory.py \
   actions/
 
 # Lambda にデプロイ
@@ -3,43 +3,72 @@ from decimal import Decimal
 import json
 import re
 import os
-import boto3
 from typing import List, Dict, Any
 
+from card_view import card_view
+from choice_state import KeyedEntries, keyed
+from match_log import log_debug
+from metrics import span, count
+from aws_clients import lazy, client
+import aura_index
+import deck_stack
+
 class DecimalEncoder(json.JSONEncoder):
     def default(self, obj):
-        return int(obj) if isinstance(obj, Decimal) else super().default(obj)
+        if isinstance(obj, Decimal):
+            return int(obj)
+        if isinstance(obj, KeyedEntries):
+            return obj.to_list()
+        return super().default(obj)
 
 # DynamoDB client for card master fetching
-dynamodb = boto3.client("dynamodb")
+dynamodb = lazy(client, "dynamodb")
 
 # ──────────────────────────────────────────────
 # カードマスター取得
 # ──────────────────────────────────────────────
+# cardId → batch_get_item の生アイテム。マスターは不変なのでコンテナ内で使い回す
+# （パース済みの dict は呼び出し側が書き換えることがあるため、返すたびにパースする）
+_master_items: Dict[str, Dict] = {}
+BATCH_GET_LIMIT = 100     # batch_get_item 1 回あたりのキー上限
+BATCH_GET_ATTEMPTS = 3    # UnprocessedKeys の再要求回数の上限
+
+
+def preload_card_masters(card_ids: List[str]) -> int:
+    """未取得のカードマスターを取得してキャッシュに載せる。新たに載せた件数を返す"""
+    table_name = os.environ["CARD_MASTER_TABLE"]
+    missing = [cid for cid in dict.fromkeys(card_ids) if cid not in _master_items]
+    if not missing:
+        return 0
+    count("CardMasterFetches", len(missing))
+
+    loaded = 0
+    with span("fetch_card_masters"):
+        for i in range(0, len(missing), BATCH_GET_LIMIT):
+            request = {table_name: {"Keys": [{"cardId": {"S": cid}} for cid in missing[i:i + BATCH_GET_LIMIT]]}}
+            for _ in range(BATCH_GET_ATTEMPTS):
+                resp = dynamodb.batch_get_item(RequestItems=request)
+                for item in resp["Responses"].get(table_name, []):
+                    _master_items[item["cardId"]["S"]] = item
+                    loaded += 1
+                request = resp.get("UnprocessedKeys")
+                if not request:
+                    break
+    return loaded
+
+
 def fetch_card_masters(card_ids: List[str]) -> Dict[str, Dict]:
     """
     CARD_MASTER_TABLE からまとめて取得 → { cardId: masterDict }
+    取得済みのマスターはキャッシュから返す。
     """
     if not card_ids:
         return {}
 
-    keys = [{"cardId": {"S": cid}} for cid in set(card_ids)]
-    resp = dynamodb.batch_get_item(
-        RequestItems={
-            os.environ["CARD_MASTER_TABLE"]: {"Keys": keys}
-        }
-    )
-    items = resp["Responses"].get(os.environ["CARD_MASTER_TABLE"], [])
-    
-    # DynamoDB形式のレスポンスを通常の辞書形式に変換
-    result = {}
-    for item in items:
-        card_id = item["cardId"]["S"]
-        # DynamoDB形式のアイテムをパースして通常の辞書形式に変換
-        parsed_item = _parse_dynamodb_item(item)
-        result[card_id] = parsed_item
-    
-    return result
+    preload_card_masters(card_ids)
+    # DynamoDB形式のアイテムをパースして通常の辞書形式に変換
+    return {cid: _parse_dynamodb_item(_master_items[cid])
+            for cid in set(card_ids) if cid in _master_items}
 
 def _parse_dynamodb_item(item: Dict) -> Dict:
     """DynamoDB形式のアイテムを通常の辞書形式に変換"""
@@ -88,20 +117,86 @@ def d(val):
         raise ValueError(f"cannot cast {val!r} to Decimal")
 
 # ---------------- status helpers -------------------
-def add_status(card, key, value):
+def add_status(card, key, value, *, source_id=None):
+    """
+    source_id を渡すと sourceId を記録し、付けた側から外せるようにする。
+    同じ key のエントリが別の付け手（または付け手なし）のものなら、その値と sourceId を
+    エントリの shadowed に積んでから上書きし、remove_sourced_status で元に戻す。
+    """
     sts = card.setdefault("statuses", [])
-    ex = next((s for s in sts if s["key"] == key), None)
-    (ex.__setitem__("value", value) if ex else
-     sts.append({"key": key, "value": value}))
+    view = card_view(card)
+    ex = view.statuses.get(key)
+    if ex:
+        if source_id is not None and ex.get("sourceId") != source_id:
+            prev = {"value": ex["value"]}
+            if ex.get("sourceId") is not None:
+                prev["sourceId"] = ex["sourceId"]
+            ex.setdefault("shadowed", []).append(prev)
+        ex["value"] = value
+        view.status_changed(key)
+        entry = ex
+    else:
+        entry = {"key": key, "value": value}
+        sts.append(entry)
+        view.status_added(entry)
+    if source_id is not None:
+        entry["sourceId"] = source_id
+        aura_index.record(card, entry)
+
+def remove_sourced_status(card, key, source_id):
+    """
+    add_status(source_id=...) で付けた key を外す。戻り値は見える値が変わったか。
+    source_id が上書きしていたなら前の値と sourceId に戻し、エントリを消すのは
+    source_id が作ったエントリのときだけ。下に隠れている分は積み上げから抜くだけ。
+    """
+    view = card_view(card)
+    ex = view.statuses.get(key)
+    if ex is None:
+        return False
+    shadowed = ex.get("shadowed") or []
+    changed = False
+    if ex.get("sourceId") == source_id:
+        if shadowed:
+            prev = shadowed.pop()
+            ex["value"] = prev["value"]
+            if "sourceId" in prev:
+                ex["sourceId"] = prev["sourceId"]
+                aura_index.record(card, ex)
+            else:
+                ex.pop("sourceId", None)
+            view.status_changed(key)
+        else:
+            card["statuses"] = [s for s in card["statuses"] if s is not ex]
+        changed = True
+    else:
+        kept = [p for p in shadowed if p.get("sourceId") != source_id]
+        if len(kept) == len(shadowed):
+            return False
+        shadowed[:] = kept
+    if not shadowed:
+        ex.pop("shadowed", None)
+    aura_index.discard(card, source_id, key)
+    return changed
 
 def add_temp_status(card, key, value, expire_turn, *, source_id=None):
     tmp = card.setdefault("tempStatuses", [])
-    tmp.append({
+    view = card_view(card)
+    entry = {
         "key": key,
         "value": str(value),
         "expireTurn": d(expire_turn),     # -1 = 永続
         "sourceId": source_id or card["id"]
-    })
+    }
+    tmp.append(entry)
+    view.temp_added(entry)
+    aura_index.record(card, entry)
+
+def get_status(card, key, default=None):
+    """statuses から key の値を取得（なければ default）"""
+    return card_view(card).status(key, default)
+
+def has_status(card, key):
+    return card_view(card).has(key)
 
 def keyword_map(k: str) -> str:
     return {
@@ -126,38 +221,86 @@ TARGET_ZONES = [
 
 # ---------------- weighted random selection ----------------
 import random
+from bisect import bisect_left
 
-def weighted_random_select(options: List[str], weights: List[int]) -> str:
+# (options, weights) → (options, 累積重み, 合計)。カード効果の tokenBaseIds / weights や
+# SelectOption の options は定義上の定数なので、一度作った表を使い回す
+_weight_tables: Dict[tuple, tuple] = {}
+WEIGHT_TABLE_CACHE_SIZE = 1024
+
+
+def weighted_table(options: List[str], weights: List[int]):
     """
-    重み付きランダム選択を実行
-    
-    Args:
-        options: 選択肢のリスト
-        weights: 各選択肢の重み（整数）
-    
-    Returns:
-        選択された選択肢
+    重み付き選択の累積表を返す（不正な入力は None）。
+    負の重みを含む場合は累積が単調にならないので表を作らない（None）。
     """
     if not options or not weights or len(options) != len(weights):
-        return ""
-    
-    # 重みの合計を計算
+        return None
+    key = (tuple(options), tuple(weights))
+    table = _weight_tables.get(key)
+    if table is None:
+        cumulative, total = [], 0
+        for w in weights:
+            w = int(w)
+            if w < 0:
+                return None
+            total += w
+            cumulative.append(total)
+        if total <= 0:
+            return None
+        if len(_weight_tables) >= WEIGHT_TABLE_CACHE_SIZE:
+            _weight_tables.clear()
+        table = _weight_tables[key] = (key[0], cumulative, total)
+    return table
+
+
+def _linear_select(options, weights, rng):
+    # 負の重みを含む定義用（従来の線形走査）
     total_weight = sum(weights)
     if total_weight <= 0:
         return ""
-    
-    # 0から合計重みの間でランダム値を生成
-    rand_val = random.randint(1, total_weight)
-    
-    # 重みに基づいて選択肢を決定
+    rand_val = (rng or random).randint(1, total_weight)
     current_weight = 0
     for i, weight in enumerate(weights):
         current_weight += weight
         if rand_val <= current_weight:
             return options[i]
+    return options[0]
+
+
+def weighted_random_select(options: List[str], weights: List[int], rng=None) -> str:
+    """
+    重み付きランダム選択を実行
     
-    # フォールバック（通常ここには来ない）
-    return options[0] if options else ""
+    Args:
+        options: 選択肢のリスト
+        weights: 各選択肢の重み（整数）
+        rng: 乱数源（match_rng.match_random(item) など。省略時は random モジュール）
+    
+    Returns:
+        選択された選択肢
+    """
+    picked = weighted_random_sample(options, weights, 1, rng)
+    return picked[0] if picked else ""
+
+
+def weighted_random_sample(options: List[str], weights: List[int], k: int, rng=None) -> List[str]:
+    """
+    重み付きランダム選択を k 回（復元抽出）まとめて行う。
+    1 回あたり randint(1, 合計) を 1 回引き、累積表を二分探索する
+    （weighted_random_select を k 回呼んだのと同じ結果になる）。
+    入力が不正・合計が 0 以下のときは [""] * k。
+    """
+    if k <= 0:
+        return []
+    table = weighted_table(options, weights)
+    if table is None:
+        if options and weights and len(options) == len(weights) and any(int(w) < 0 for w in weights):
+            return [_linear_select(options, weights, rng) for _ in range(k)]
+        return [""] * k
+    opts, cumulative, total = table
+    randint = (rng or random).randint
+    return [opts[bisect_left(cumulative, randint(1, total))] for _ in range(k)]
 
 # ---------------- choice response cleanup ----------------
 def cleanup_used_choice_response(item: Dict[str, Any], request_id: str) -> None:
@@ -165,26 +308,25 @@ def cleanup_used_choice_response(item: Dict[str, Any], request_id: str) -> None:
     使用済みのchoiceResponseを削除してメモリリークや二重適用を防ぐ
     """
     if "choiceResponses" in item:
-        item["choiceResponses"] = [
-            r for r in item["choiceResponses"] 
-            if r.get("requestId") != request_id
-        ]
+        keyed(item, "choiceResponses").pop(request_id)
 
 # ---------------- target resolution ----------------
 def resolve_targets(src: Dict[str, Any], action: Dict[str, Any], item: Dict[str, Any]) -> List[Dict]:
-    print(f"resolve_targets: {src=}, {action=}, {item=}")
+    count("ResolveTargetsCalls")
+    log_debug("resolve_targets", srcId=src.get("id") if src else None,
+              action=action.get("type"), target=action.get("target"))
     # 1) selectionKey 優先
     sel_key = action.get("selectionKey") or action.get("sourceKey")
     if sel_key:
         # choiceResponses から値を取り出す
-        responses = item.get("choiceResponses", [])
         # 例: {'requestId': sel_key, 'selectedIds': ['c1','c2',...]}
-        resp = next((r for r in responses if r.get("requestId") == sel_key), None)
+        resp = keyed(item, "choiceResponses", create=False).first(sel_key)
         if resp:
             # selectedIds があればそちらを優先、なければ selectedValue を１件として扱う
             ids = resp.get("selectedIds",
                           [resp["selectedValue"]] if resp.get("selectedValue") else [])
             if ids:
+                count("CardScans", len(item["cards"]))
                 targets = [c for c in item["cards"] if c["id"] in ids]
                 cleanup_used_choice_response(item, sel_key)
                 return targets
@@ -207,11 +349,16 @@ def resolve_targets(src: Dict[str, Any], action: Dict[str, Any], item: Dict[str,
     return pool
 
 def get_target_cards(src: Dict, action: Dict, item: Dict) -> List[Dict]:
+    count("GetTargetCardsCalls")
     owner = src["ownerId"]
     target = action.get("target")
     cards = item["cards"]
     if target == "Self":
         return [src]
+    if target == "PlayerDeckTop":
+        # 山札はデッキスタックから上の n 枚だけを見る（盤面を走査しない）
+        return deck_stack.peek(item, owner, int(action.get("value", 1)))
+    count("CardScans", len(cards))  # Self 以外は盤面全体を走査する（未対応ターゲットも含めて数える）
     if target == "PlayerField":
         return [c for c in cards if c["ownerId"] == owner and c["zone"] == "Field"]
     if target == "EnemyField":
@@ -227,8 +374,6 @@ def get_target_cards(src: Dict, action: Dict, item: Dict) -> List[Dict]:
         selected_owner = item.get("variables", {}).get("selectedOwner")
         oid = owner if selected_owner == "Player" else next(p["id"] for p in item["players"] if p["id"] != owner)
         return [c for c in cards if c["ownerId"] == oid and c["zone"] == "Hand"]
-    if target == "PlayerDeckTop":
-        return [c for c in cards if c["ownerId"] == owner and c["zone"] == "Deck"][: int(action.get("value", 1))]
     # パッシブアビリティ対象拡張: Environment ゾーン
     if target == "Environment":
         return [c for c in cards if c["zone"] == "Environment"]
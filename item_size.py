@@ -0,0 +1,221 @@
+# item_size.py
+"""
+STATE アイテムのサイズ見積もりと書き込み前ガード。
+
+DynamoDB の 1 アイテム上限は 400 KB。長いマッチではトークン・tempStatuses・
+使用済みの choiceResponses が溜まり、途中で put_item が失敗しうる。
+
+estimate_size は DynamoDB のサイズ計算（属性名 + 値の UTF-8 バイト数、
+数値は有効桁数から概算、List / Map はオーバーヘッド込み）に沿った概算で、
+実際の値より小さくならないよう切り上げ気味に数える。
+
+書き込み前ポリシー（prepare_for_write）。見積もりが SOFT_LIMIT を超えた
+ときだけ、以下を順に適用する:
+  1. 期限切れの tempStatuses を落とす
+  2. 解決済み（対応する choiceRequests / pendingDeferred が無い）choiceResponses を落とす
+  3. Graveyard / Exile のカードをオーバーフローアイテム（sk=OVERFLOW#n）へ逃がす
+処理中のインメモリ item は変更せず、書き込み用のコピーだけを縮める。
+オーバーフローしたカードは load 時に item["cards"] へ戻す。
+
+オーバーフローアイテムは保存ごとの版を含むキー（sk=OVERFLOW#<版>#n）に書き、
+STATE はその版の sk を overflowKeys に持つ。書き込みは
+チャンク → STATE（ここがコミット点）→ 古い版の削除 の順で、途中で失敗しても
+STATE は常に揃ったチャンクを指す（残るのは参照されないアイテムだけ）。
+STATE を読むものは必ず overflowKeys のチャンクも読むこと（lambda_function.load_match。
+slim モードで STATE を読み直す AI Lambda も同じ手順が必要）。
+"""
+import copy
+import os
+from decimal import Decimal
+
+ITEM_LIMIT       = 400 * 1024
+SOFT_LIMIT       = int(os.environ.get("ITEM_SIZE_SOFT_LIMIT", str(350 * 1024)))
+OVERFLOW_CHUNK   = int(os.environ.get("ITEM_OVERFLOW_CHUNK", str(300 * 1024)))
+OVERFLOW_ZONES   = ("Graveyard", "Exile")
+OVERFLOW_PREFIX  = "OVERFLOW#"
+OVERFLOW_KEYS    = "overflowKeys"
+OVERFLOW_VERSION_BYTES = 6        # 版は 12 桁の 16 進
+
+
+# ---------------- 見積もり ----------------
+def _number_size(n):
+    digits = len(str(n).lstrip("-").replace(".", "").lstrip("0")) or 1
+    return (digits + 1) // 2 + 1
+
+
+def _str_size(s):
+    return len(s) if s.isascii() else len(s.encode("utf-8"))
+
+
+def estimate_size(value):
+    """値 1 つのバイト数（属性名は含まない）"""
+    t = type(value)
+    if t is str:
+        return _str_size(value)
+    if t is dict:
+        total = 3
+        for k, v in value.items():
+            total += _str_size(k) + 1 + estimate_size(v)
+        return total
+    if t is list:
+        total = 3
+        for v in value:
+            total += 1 + estimate_size(v)
+        return total
+    if t is bool or value is None:
+        return 1
+    if t is Decimal or t is int or t is float:
+        return _number_size(value)
+    if isinstance(value, dict):
+        return estimate_size(dict(value))
+    # KeyedEntries などの反復可能
+    return estimate_size(list(value))
+
+
+# effectList はカードマスター由来で、カードのバイト数の大半を占める。
+# baseCardId ごとに (内容のコピー, サイズ) を覚え、内容が一致したときだけ再利用する
+# （比較は見積もりより軽い）。一致しなければ正確に数え直して覚え直す。
+# 同じ baseCardId・同じ効果数でも内容が違えば（効果の上書きなど）必ず数え直すので、
+# キャッシュで見積もりが実際より小さくなることはない。
+_effect_sizes = {}
+
+
+def _effect_size(base, eff):
+    hit = _effect_sizes.get(base)
+    if hit is not None and hit[0] == eff:
+        return hit[1]
+    size = estimate_size(eff)
+    _effect_sizes[base] = (copy.deepcopy(eff), size)
+    return size
+
+
+def card_size(card):
+    """cards リスト内の 1 要素分のバイト数（リスト要素のオーバーヘッド込み）"""
+    eff = card.get("effectList")
+    base = card.get("baseCardId")
+    if not eff or not base or type(eff) is not list:
+        return 1 + estimate_size(card)
+    eff_size = _effect_size(base, eff)
+    total = 4  # リスト要素 1 + Map 3
+    for k, v in card.items():
+        total += _str_size(k) + 1 + (eff_size if k == "effectList" else estimate_size(v))
+    return total
+
+
+def _cards_field(sizes):
+    return len("cards") + 3 + sum(sizes)
+
+
+def field_sizes(item, card_sizes=None):
+    """トップレベル属性ごとのバイト数（属性名込み）。card_sizes は cards の要素ごとのサイズ"""
+    out = {}
+    for k, v in item.items():
+        if k == "cards" and type(v) is list:
+            out[k] = _cards_field(card_sizes if card_sizes is not None else [card_size(c) for c in v])
+        else:
+            out[k] = _str_size(k) + estimate_size(v)
+    return out
+
+
+def item_size(item):
+    return sum(field_sizes(item).values())
+
+
+# ---------------- 縮小ポリシー ----------------
+# card_sizes（cards と同じ並びの要素サイズ）を受け取り、変更したカードの分だけ更新する
+def compact_expired_statuses(item, card_sizes):
+    """期限切れ tempStatuses を除いたカード列にする（変更したカードだけコピー）"""
+    turn = item.get("turnCount", 0)
+    out, dropped = [], 0
+    for i, c in enumerate(item.get("cards", [])):
+        temps = c.get("tempStatuses") or []
+        # expireTurn == turnCount はこのターン中まだ有効（BattleBuff の既定 1 ターン）
+        keep = [s for s in temps if s.get("expireTurn", -1) == -1 or s.get("expireTurn", -1) >= turn]
+        if len(keep) != len(temps):
+            dropped += len(temps) - len(keep)
+            c = {**c, "tempStatuses": keep}
+            card_sizes[i] = card_size(c)
+        out.append(c)
+    item["cards"] = out
+    return dropped
+
+
+def drop_resolved_choices(item):
+    """応答待ちでも保留中でもない choiceResponses を落とす"""
+    live = {r.get("requestId") for r in item.get("choiceRequests", [])}
+    live |= {p.get("selectionKey") for p in item.get("pendingDeferred", [])}
+    responses = list(item.get("choiceResponses", []))
+    keep = [r for r in responses if r.get("requestId") in live]
+    item["choiceResponses"] = keep
+    return len(responses) - len(keep)
+
+
+def split_overflow(item, card_sizes, chunk_bytes=None):
+    """
+    Graveyard / Exile のカードを取り出し、chunk_bytes 以下のチャンクに分ける。
+    戻り値: (チャンク（カードのリスト）のリスト, 残ったカードの card_sizes)
+    """
+    chunk_bytes = OVERFLOW_CHUNK if chunk_bytes is None else chunk_bytes
+    stay, stay_sizes = [], []
+    chunks, cur, cur_size = [], [], 0
+    for c, size in zip(item.get("cards", []), card_sizes):
+        if c.get("zone") not in OVERFLOW_ZONES:
+            stay.append(c)
+            stay_sizes.append(size)
+            continue
+        if cur and cur_size + size > chunk_bytes:
+            chunks.append(cur)
+            cur, cur_size = [], 0
+        cur.append(c)
+        cur_size += size
+    if cur:
+        chunks.append(cur)
+    item["cards"] = stay
+    return chunks, stay_sizes
+
+
+def prepare_for_write(persisted, soft_limit=None):
+    """
+    書き込み用コピー persisted を必要なら縮める（見積もりは全体で 1 回だけ）。
+    戻り値: (persisted, overflow_chunks, report)
+      report = {"before", "after", "fields", "expiredStatuses", "resolvedChoices", "offloadedCards"}
+    """
+    soft_limit = SOFT_LIMIT if soft_limit is None else soft_limit
+    persisted.pop(OVERFLOW_KEYS, None)
+    sizes = [card_size(c) for c in persisted.get("cards") or []]
+    fields = field_sizes(persisted, sizes)
+    before = sum(fields.values())
+    report = {"before": before, "after": before, "fields": fields,
+              "expiredStatuses": 0, "resolvedChoices": 0, "offloadedCards": 0}
+    if before <= soft_limit:
+        return persisted, [], report
+
+    report["expiredStatuses"] = compact_expired_statuses(persisted, sizes)
+    report["resolvedChoices"] = drop_resolved_choices(persisted)
+    if "cards" in fields:
+        fields["cards"] = _cards_field(sizes)
+    fields["choiceResponses"] = len("choiceResponses") + estimate_size(persisted["choiceResponses"])
+
+    chunks = []
+    if sum(fields.values()) > soft_limit and "cards" in fields:
+        chunks, sizes = split_overflow(persisted, sizes)
+        report["offloadedCards"] = sum(len(ch) for ch in chunks)
+        fields["cards"] = _cards_field(sizes)
+        if chunks:  # 書き込み時に付く overflowKeys 分
+            fields[OVERFLOW_KEYS] = len(OVERFLOW_KEYS) + estimate_size(
+                [overflow_sk("0" * 2 * OVERFLOW_VERSION_BYTES, i) for i in range(len(chunks))])
+    report["after"] = sum(fields.values())
+    return persisted, chunks, report
+
+
+def new_overflow_version():
+    """保存ごとの版（同時に保存しても別のキーになるようランダム）"""
+    return os.urandom(OVERFLOW_VERSION_BYTES).hex()
+
+
+def overflow_sk(version, idx):
+    return f"{OVERFLOW_PREFIX}{version}#{idx}"
+
+
+def overflow_key(match_id, version, idx):
+    return {"pk": match_id, "sk": overflow_sk(version, idx)}
@@ -1,28 +1,54 @@
 # lambda_function.py
-import os, json, boto3, logging
+import os, json, logging, time, gzip, base64, copy
+from collections import deque
 from datetime import datetime, timezone
 from decimal import Decimal
 from importlib import import_module
 
 # --- 自前モジュール -----------------------------------------
 from helper import (
-    add_status, add_temp_status, keyword_map, d, resolve_targets,
-    DecimalEncoder, TARGET_ZONES, fetch_card_masters,
+    add_status, add_temp_status, remove_sourced_status, keyword_map, d, resolve_targets,
+    DecimalEncoder, TARGET_ZONES, fetch_card_masters, preload_card_masters,
 )
-from action_registry import get as get_handler  # ここがディスパッチ
-import actions  # noqa  (サイドエフェクトで handler 登録)
+from card_view import card_view, reset_card_views
+from choice_state import keyed, to_persisted
+from match_log import configure_logging, log_debug, log_info
+from metrics import span, count, set_metric, start_invocation, metrics_enabled, flush as flush_metrics
+from item_size import (
+    prepare_for_write, overflow_key, new_overflow_version, ITEM_LIMIT, OVERFLOW_KEYS,
+)
+from profiler import profile_requested, run_profiled
+from trace_recorder import start_trace, capture_pre, capture_post, finish_trace, recording
+from action_registry import get as get_handler, load_all as load_all_actions  # ここがディスパッチ（初回に actions.* を import）
+from match_rng import next_id
+from aws_clients import lazy, client, dynamo_table, resolve as resolve_client
+from ai_policy import get_policy, unused_level_points
+import helper
+import aura_index
+import deck_stack
 
 # --- AWS 初期化 ---------------------------------------------
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-ddb = boto3.resource("dynamodb")
-table = ddb.Table(os.environ["MATCH_TABLE"])
-leader_table = ddb.Table(os.environ["LEADER_MASTER_TABLE"])
-ai = boto3.client("lambda")
+# クライアントは初回アクセス時に生成（publishClientUpdate などでは作らない）
+table = lazy(dynamo_table, "MATCH_TABLE")
+leader_table = lazy(dynamo_table, "LEADER_MASTER_TABLE")
+ai = lazy(client, "lambda")
 leader_cache: dict[str, dict] = {}
 EVOLVE_THRESHOLDS = [4, 7]
 
+# resolve の暴走防止（効果が互いに再トリガーし続ける場合の上限）
+MAX_CHAIN_DEPTH    = int(os.environ.get("MAX_CHAIN_DEPTH", "32"))
+MAX_RESOLVE_EVENTS = int(os.environ.get("MAX_RESOLVE_EVENTS", "2000"))
+# 処理イベント数の上限は盤面の枚数にも比例させる（max(MAX_RESOLVE_EVENTS, 枚数 × これ)）。
+# 盤面全体への効果 1 回で 1 枚あたり「トリガー・AbilityActivated・アクション」の 3 件前後が出る。
+# その 2 段ぶんの連鎖までを正当な解決とみなして 8 とする（ベンチの最大 1000 枚で 8000 件）
+RESOLVE_EVENTS_PER_CARD = int(os.environ.get("RESOLVE_EVENTS_PER_CARD", "8"))
+
+# STATE サイズのフィールド別メトリクス（次元を増やさないよう主要フィールドに限定）
+SIZE_METRIC_FIELDS = ["cards", "players", "choiceRequests", "choiceResponses", "pendingDeferred"]
+
 # ---------------- Utility ------------------------------------
 
 def now_iso():
@@ -33,20 +59,106 @@ def bump(item):
     item["matchVersion"] = item.get("matchVersion", Decimal(0)) + 1
 
 
-def clear_expired(cards, turn_no):
-    for c in cards:
-        c["tempStatuses"] = [
-            s for s in c.get("tempStatuses", []) if s["expireTurn"] == -1 or s["expireTurn"] > turn_no
-        ]
+def load_match(match_id):
+    """STATE を読み込む（オーバーフローしたカードも戻す。存在しなければ None）"""
+    with span("get_item"):
+        item = table.get_item(Key={"pk": match_id, "sk": "STATE"}).get("Item")
+        for sk in (item or {}).get(OVERFLOW_KEYS) or []:
+            chunk = table.get_item(Key={"pk": match_id, "sk": sk}).get("Item")
+            if chunk:
+                item["cards"].extend(chunk.get("cards", []))
+            else:
+                logger.warning(f"load_match: overflow item {sk} of {match_id} is missing")
+    if item:
+        set_metric("CardCount", len(item.get("cards", [])))
+        capture_pre(item)
+    return item
+
+
+def save_match(item):
+    """
+    STATE を保存する（処理中の索引はリスト形に戻してから書き込む）。
+    サイズが上限に近い場合は item_size のポリシーで書き込み用コピーを縮め、
+    Graveyard / Exile を新しい版のオーバーフローアイテムへ分けて書く。
+    古い版は STATE が新しい版を指した後で消す（失敗しても未参照のアイテムが残るだけ）。
+    """
+    pk = item.get("pk") or item["id"]
+    persisted, chunks, report = prepare_for_write(to_persisted(item))
+    prev_keys = item.get(OVERFLOW_KEYS) or []
+
+    with span("put_item"):
+        keys = []
+        version = new_overflow_version() if chunks else None
+        for idx, chunk in enumerate(chunks):
+            key = overflow_key(pk, version, idx)
+            table.put_item(Item={**key, "cards": chunk})
+            keys.append(key["sk"])
+        if keys:
+            persisted[OVERFLOW_KEYS] = keys
+        table.put_item(Item=persisted)  # コミット点
+        for sk in prev_keys:
+            if sk in keys:
+                continue
+            try:
+                table.delete_item(Key={"pk": pk, "sk": sk})
+            except Exception as e:
+                logger.warning(f"save_match: failed to delete stale overflow {sk} of {pk}: {e}")
+    if keys:
+        item[OVERFLOW_KEYS] = keys
+    else:
+        item.pop(OVERFLOW_KEYS, None)
+
+    set_metric("ItemSizeBytes", report["after"], "Bytes")
+    if metrics_enabled():
+        for name in SIZE_METRIC_FIELDS:
+            set_metric(f"ItemBytes_{name}", report["fields"].get(name, 0), "Bytes")
+    if report["after"] != report["before"]:
+        log_info("item_compacted", before=report["before"], after=report["after"],
+                 expiredStatuses=report["expiredStatuses"], resolvedChoices=report["resolvedChoices"],
+                 offloadedCards=report["offloadedCards"])
+    if report["after"] > ITEM_LIMIT:
+        logger.warning(f"save_match: item {pk} still {report['after']} bytes after compaction")
+    capture_post(persisted)
+
+
+def serialize_match_text(item):
+    """STATE を JSON 文字列にする（レスポンスと AI 起動ペイロードで共有）"""
+    with span("serialization"):
+        return json.dumps(item, cls=DecimalEncoder)
+
+
+def serialize_match(item):
+    """レスポンス用に Decimal / 索引を JSON 互換の形へ変換する"""
+    text = serialize_match_text(item)
+    with span("serialization"):
+        return json.loads(text)
+
+
+
+def _is_aura_from(status, source_ids):
+    return status.get("sourceId") in source_ids and status["expireTurn"] == -1
+
+
+def detach_auras_from(source_ids, cards):
+    """source_ids（場を離れたカード）が付けた永続オーラをまとめて外す。外したカード数を返す"""
+    if not source_ids:
+        return 0
+    # 逆引き索引で、その source がステータスを付けたカードだけを見る
+    affected = {id(c): c for src in source_ids for c in aura_index.targets(cards, src)}
+    detached = 0
+    for c in affected.values():
+        tmp = c.get("tempStatuses") or []
+        kept = [s for s in tmp if not _is_aura_from(s, source_ids)]
+        if len(kept) < len(tmp):
+            c["tempStatuses"] = kept
+            detached += 1
+    for src in source_ids:
+        aura_index.prune(src)
+    return detached
 
 
 def detach_auras(leaver, cards):
-    for c in cards:
-        c["tempStatuses"] = [
-            s
-            for s in c.get("tempStatuses", [])
-            if not (s.get("sourceId") == leaver["id"] and s["expireTurn"] == -1)
-        ]
+    detach_auras_from({leaver["id"]}, cards)
 
 # ---------- 超簡易ターゲットセレクター -----------------------
 
@@ -79,186 +191,310 @@ def handle_trigger(card, trig, item):
     
     新しいイベントシーケンス例:
     1. OnSummon → Select(immediate) → choiceRequests 登録 → クライアント応答
-    2. submitChoiceResponse → pendingDeferred から Destroy 実行
+    2. submitChoiceResponse → pendingDeferred の継続レコードから Destroy 実行
     3. Optional効果の場合 → 発動確認 → choiceRequests 登録 → クライアント応答
     """
+    count("HandleTriggerCalls")
     res = []
     hit = False
-    logger.info(f"handle_trigger: card={card['id']} trigger={trig}")
+    log_debug("handle_trigger", cardId=card["id"], trigger=trig)
     
-    for eff in card.get("effectList", []):
+    for eff_idx, eff in enumerate(card.get("effectList", [])):
         if eff.get("trigger") != trig:
             continue
-        logger.info(f"  matched effect: {eff}")
+        log_debug("matched_effect", cardId=card["id"], effectIndex=eff_idx)
         
         # オプション能力の発動確認
         req_id = _check_optional_ability_activation(card, eff, item)
         if req_id:
-            logger.info(f"    -> optional ability confirmation requested for effect: {eff}")
+            log_debug("optional_ability_requested", cardId=card["id"], effectIndex=eff_idx, requestId=req_id)
             # 発動確認が必要な場合、このeffectの処理を保留
-            # pendingDeferred に効果全体を保存
-            effect_copy = dict(eff)
-            effect_copy["sourceCardId"] = card["id"]
-            effect_copy["trigger"] = trig
-            effect_copy["selectionKey"] = req_id
-            effect_copy["effectType"] = "optionalAbility"
-            item.setdefault("pendingDeferred", []).append(effect_copy)
+            # pendingDeferred には効果の先頭を指す継続レコードだけを保存
+            cont = _continuation(card, trig, eff_idx, 0, req_id)
+            cont["effectType"] = "optionalAbility"
+            item.setdefault("pendingDeferred", []).append(cont)
             hit = True
             continue
         
         hit = True
-        
-        # アクションをdeferred フラグで分離
-        immediate_actions = []
-        current_deferred = []
-        
-        for a in eff.get("actions", []):
-            logger.info(f"    processing action: {a}")
-            
-            # deferred フラグをチェック（デフォルトは false）
-            if a.get("deferred", False):
-                logger.info(f"      -> deferred action: {a}")
-                current_deferred.append(a)
-            else:
-                logger.info(f"      -> immediate action: {a}")
-                immediate_actions.append(a)
-        
-        # 即座に実行すべきアクション
-        for a in immediate_actions:
-            # Select アクションの場合は特別処理
-            if a["type"] == "Select":
-                # choiceRequests に登録
-                candidates = resolve_targets(card, a, item)
-                
-                # 選択タイプに応じてoptionsを設定
-                selection_type = a.get("selectionType", "card")
-                if selection_type == "card":
-                    option_ids = [c["id"] for c in candidates]
-                elif selection_type == "levelPoint":
-                    # レベルポイントの選択肢を生成
-                    option_ids = []
-                    for player in item["players"]:
-                        for point in player.get("levelPoints", []):
-                            if not point.get("isUsed", False):
-                                option_ids.append(f"{player['id']}:{point['color']}")
-                else:
-                    option_ids = [c["id"] for c in candidates]
-                
-                item.setdefault("choiceRequests", []).append({
-                    "requestId": a["selectionKey"],
-                    "playerId": card["ownerId"],
-                    "promptText": a.get("prompt", "選択してください"),
-                    "options":    option_ids,
-                    "selectionType": selection_type
-                })
-                # 後続の deferred アクションを pendingDeferred に保存
-                if current_deferred:
-                    for deferred_a in current_deferred:
-                        deferred_action = dict(deferred_a)
-                        deferred_action["sourceCardId"] = card["id"]
-                        deferred_action["trigger"] = trig
-                        deferred_action["selectionKey"] = a["selectionKey"]
-                        deferred_action["selectionType"] = selection_type
-                        item.setdefault("pendingDeferred", []).append(deferred_action)
-                    logger.info(f"    stored {len(current_deferred)} actions in pendingDeferred")
-            # SelectOption アクションの場合は即座に実行
-            elif a["type"] == "SelectOption":
-                # SelectOption を即座に実行
-                res += apply_action(card, a, item, card["ownerId"])
-                # mode="random" の場合は後続アクションを即座に実行、それ以外は pendingDeferred に保存
-                if current_deferred:
-                    if a.get("mode") == "random":
-                        # mode="random" の場合は即座に後続アクションを実行
-                        logger.info(f"    executing {len(current_deferred)} actions immediately (mode=random)")
-                        for deferred_a in current_deferred:
-                            res += apply_action(card, deferred_a, item, card["ownerId"])
-                    else:
-                        # 通常モードの場合は pendingDeferred に保存
-                        for deferred_a in current_deferred:
-                            deferred_action = dict(deferred_a)
-                            deferred_action["sourceCardId"] = card["id"]
-                            deferred_action["trigger"] = trig
-                            deferred_action["selectionKey"] = a.get("selectionKey", "")
-                            item.setdefault("pendingDeferred", []).append(deferred_action)
-                        logger.info(f"    stored {len(current_deferred)} actions in pendingDeferred")
-            else:
-                res += apply_action(card, a, item, card["ownerId"])
+        res += _run_effect_actions(card, eff, eff_idx, trig, item)
     
     if hit:
         res.insert(0, {"type": "AbilityActivated", "payload": {"sourceCardId": card["id"], "trigger": trig}})
-        logger.info(f"  inserted AbilityActivated for {card['id']}")
     
     return res
 
 
-def resolve(initial, item):
+def _run_effect_actions(card, eff, eff_idx, trig, item, start=0):
+    """
+    effect のアクションを start 番目から実行する。
+    handle_trigger とオプション能力の「Yes」応答の両方から使う。
+    eff_idx が None の場合は旧形式（効果のコピー）からの再開。
+    """
+    res = []
+    actions = eff.get("actions", [])
+
+    # アクションをdeferred フラグで分離（デフォルトは false）
+    immediate_actions = []
+    current_deferred = []
+    for j in range(start, len(actions)):
+        a = actions[j]
+        if a.get("deferred", False):
+            current_deferred.append((j, a))
+        else:
+            immediate_actions.append(a)
+    log_debug("effect_actions", cardId=card["id"], effectIndex=eff_idx,
+              immediate=len(immediate_actions), deferred=len(current_deferred))
+
+    # 即座に実行すべきアクション
+    for a in immediate_actions:
+        # Select アクションの場合は choiceRequests に登録
+        if a["type"] == "Select":
+            selection_type = _request_selection(card, a, item)
+            # 後続の deferred アクションを pendingDeferred に保存
+            for j, deferred_a in current_deferred:
+                _defer(card, deferred_a, trig, eff_idx, j, a["selectionKey"], item,
+                       selection_type=selection_type)
+        # SelectOption アクションの場合は即座に実行
+        elif a["type"] == "SelectOption":
+            res += apply_action(card, a, item, card["ownerId"])
+            # mode="random" の場合は後続アクションを即座に実行、それ以外は pendingDeferred に保存
+            if current_deferred:
+                if a.get("mode") == "random":
+                    for _, deferred_a in current_deferred:
+                        res += apply_action(card, deferred_a, item, card["ownerId"])
+                else:
+                    for j, deferred_a in current_deferred:
+                        _defer(card, deferred_a, trig, eff_idx, j, a.get("selectionKey", ""), item)
+        else:
+            res += apply_action(card, a, item, card["ownerId"])
+    return res
+
+
+def _selection_options(card, act, item):
+    """Select アクションの選択肢を生成し (selectionType, options) を返す"""
+    selection_type = act.get("selectionType", "card")
+    if selection_type == "levelPoint":
+        # 未使用のレベルポイントを選択肢にする
+        options = [
+            f"{player['id']}:{point['color']}"
+            for player in item["players"]
+            for point in player.get("levelPoints", [])
+            if not point.get("isUsed", False)
+        ]
+    else:
+        options = [c["id"] for c in resolve_targets(card, act, item)]
+    return selection_type, options
+
+
+def _request_selection(card, act, item):
+    """Select アクションの choiceRequest を登録し selectionType を返す"""
+    selection_type, option_ids = _selection_options(card, act, item)
+    item.setdefault("choiceRequests", []).append({
+        "requestId": act["selectionKey"],
+        "playerId": card["ownerId"],
+        "promptText": act.get("prompt", "選択してください"),
+        "options":    option_ids,
+        "selectionType": selection_type
+    })
+    return selection_type
+
+
+def _continuation(card, trig, eff_idx, act_idx, selection_key):
+    """effectList 内の位置を指す継続レコード（pendingDeferred の1要素）"""
+    cont = {
+        "sourceCardId": card["id"],
+        "trigger": trig,
+        "effectIndex": eff_idx,
+        "actionIndex": act_idx,
+        "selectionKey": selection_key,
+    }
+    if card.get("baseCardId"):
+        cont["baseCardId"] = card["baseCardId"]
+    return cont
+
+
+def _defer(card, act, trig, eff_idx, act_idx, selection_key, item, *, selection_type=None):
+    """deferred アクションを選択待ちとして pendingDeferred に登録する"""
+    if eff_idx is None:
+        # 旧形式の保留効果から再開した場合はアクションをコピーするしかない
+        rec = dict(act)
+        rec.update(sourceCardId=card["id"], trigger=trig, selectionKey=selection_key)
+    else:
+        rec = _continuation(card, trig, eff_idx, act_idx, selection_key)
+        rec["type"] = act["type"]  # 再開時に同じアクションを指しているかの照合用（実体は effectList 側）
+    if selection_type:
+        rec["selectionType"] = selection_type
+    item.setdefault("pendingDeferred", []).append(rec)
+
+
+def _continuation_effect(cont, card):
+    """継続レコードが指す effect を取得（カードに無ければマスターから）"""
+    effects = card.get("effectList")
+    if not effects and cont.get("baseCardId"):
+        master = fetch_card_masters([cont["baseCardId"]]).get(cont["baseCardId"], {})
+        effects = master.get("effectList", [])
+    idx = int(cont["effectIndex"])
+    eff = effects[idx] if effects and idx < len(effects) else None
+    # 保留中に Transform やマスター更新で effectList が変わっていたら別の効果を指している
+    if eff is not None and cont.get("trigger") and eff.get("trigger") != cont["trigger"]:
+        logger.warning(f"Continuation effect mismatch: {cont['sourceCardId']} effect={idx} "
+                       f"trigger={cont['trigger']} now={eff.get('trigger')}")
+        return None
+    return eff
+
+
+def _resume_deferred(cont, source_card, item, player_id):
+    """pendingDeferred の1要素を実行する（継続レコード・旧形式の両対応）"""
+    if "actionIndex" in cont:
+        eff = _continuation_effect(cont, source_card)
+        actions = eff.get("actions", []) if eff else []
+        idx = int(cont["actionIndex"])
+        if idx >= len(actions):
+            logger.warning(f"Continuation target not found: {cont['sourceCardId']} effect={cont['effectIndex']} action={idx}")
+            return []
+        if cont.get("type") and actions[idx].get("type") != cont["type"]:
+            logger.warning(f"Continuation action mismatch: {cont['sourceCardId']} effect={cont['effectIndex']} "
+                           f"action={idx} type={cont['type']} now={actions[idx].get('type')}")
+            return []
+        act = dict(actions[idx])
+        act.update(sourceCardId=cont["sourceCardId"], trigger=cont.get("trigger"),
+                   selectionKey=cont["selectionKey"])
+        if cont.get("selectionType"):
+            act["selectionType"] = cont["selectionType"]
+    else:
+        act = cont
+    handler = get_handler(act["type"])
+    if not handler:
+        logger.warning(f"Handler not found for deferred action type: {act['type']}")
+        return []
+    return handler(source_card, act, item, player_id)
+
+
+def _resolve_select_option_result(pld, item, lookup):
+    """SelectOptionResult: choiceResponses を記録し、該当する pendingDeferred を実行する"""
+    selection_key = pld.get("selectionKey")
+    selected_value = pld.get("selectedValue")
+    player_id = pld.get("playerId")
+    if not (selection_key and selected_value and player_id):
+        return []
+
+    # choiceResponses に選択結果を追加（まだ追加されていない場合）
+    choice_responses = keyed(item, "choiceResponses")
+    if not choice_responses.has(selection_key):
+        choice_responses.append({
+            "requestId": selection_key,
+            "playerId": player_id,
+            "selectedValue": selected_value
+        })
+
+    # pendingDeferred から該当するアクションを取り出して実行
+    out = []
+    for act in keyed(item, "pendingDeferred").pop(selection_key):
+        source_card = lookup(act["sourceCardId"])
+        if source_card:
+            out += _resume_deferred(act, source_card, item, player_id)
+            log_debug("deferred_executed", type=act.get("type"), selectionKey=selection_key)
+        else:
+            logger.warning(f"Source card {act['sourceCardId']} not found for deferred action")
+    return out
+
+
+# イベント種別ごとの追加処理（cardId によるトリガー処理の前に実行）
+_EVENT_HANDLERS = {
+    "SelectOptionResult": _resolve_select_option_result,
+}
+
+
+def _card_lookup(item):
+    """cardId → card の索引。解決中に生成されたトークンは取りこぼし時に追加する"""
+    index = {c["id"]: c for c in item["cards"]}
+
+    def lookup(cid):
+        card = index.get(cid)
+        if card is None and cid is not None:
+            card = find_card(item, cid)
+            if card:
+                index[cid] = card
+        return card
+    return lookup
+
+
+def resolve_event_budget(item):
+    """1 回の resolve で処理するイベント数の上限"""
+    return max(MAX_RESOLVE_EVENTS, RESOLVE_EVENTS_PER_CARD * len(item.get("cards") or ()))
+
+
+def resolve(initial, item, *, max_depth=None, max_events=None):
     """
     イベントを解決し、トリガーイベントを処理する。
     
     処理フロー:
     1. 通常のトリガーイベント（OnSummon、OnEnterFieldなど）
     2. SelectOptionResult イベントの処理（pendingDeferred アクション実行）
-    3. 追加されたイベントの再帰的な処理
+    3. 追加されたイベントの再帰的な処理（FIFO キュー）
+
+    連鎖の深さが max_depth を、処理イベント数が max_events を超えた場合は
+    ChainLimitExceeded イベントを積んで解決を打ち切る。
+    max_events の既定は resolve_event_budget(item)（盤面の枚数に比例）。
     """
+    max_depth = MAX_CHAIN_DEPTH if max_depth is None else max_depth
+    max_events = resolve_event_budget(item) if max_events is None else max_events
+    with span("resolve"):
+        return _resolve_queue(initial, item, max_depth, max_events)
+
+
+def _resolve_queue(initial, item, max_depth, max_events):
     evs = list(initial)
-    i = 0
-    while i < len(evs):
-        event_type = evs[i]["type"]
-        pld = _payload_to_dict(evs[i]["payload"])
-        
-        # SelectOptionResult イベントの特別処理
-        if event_type == "SelectOptionResult":
-            selection_key = pld.get("selectionKey")
-            selected_value = pld.get("selectedValue")
-            player_id = pld.get("playerId")
-            
-            if selection_key and selected_value and player_id:
-                # choiceResponses に選択結果を追加（まだ追加されていない場合）
-                choice_responses = item.get("choiceResponses", [])
-                if not any(r.get("requestId") == selection_key for r in choice_responses):
-                    item.setdefault("choiceResponses", []).append({
-                        "requestId": selection_key,
-                        "playerId": player_id,
-                        "selectedValue": selected_value
-                    })
-                
-                # pendingDeferred から該当するアクションを実行
-                new_pending = []
-                for act in item.get("pendingDeferred", []):
-                    if act.get("selectionKey") == selection_key:
-                        # 該当するアクションを実行
-                        handler = get_handler(act["type"])
-                        if handler:
-                            source_card = next((c for c in item["cards"] if c["id"] == act["sourceCardId"]), None)
-                            if source_card:
-                                evs += handler(source_card, act, item, player_id)
-                                logger.info(f"  executed deferred action {act['type']} for selectionKey {selection_key}")
-                            else:
-                                logger.warning(f"Source card {act['sourceCardId']} not found for deferred action")
-                        else:
-                            logger.warning(f"Handler not found for deferred action type: {act['type']}")
-                    else:
-                        new_pending.append(act)
-                item["pendingDeferred"] = new_pending
-        
+    queue = deque((ev, 0) for ev in evs)
+    lookup = _card_lookup(item)
+    processed = 0
+
+    while queue:
+        ev, depth = queue.popleft()
+        if depth > max_depth or processed >= max_events:
+            reason = "depth" if depth > max_depth else "budget"
+            logger.warning(f"resolve: chain limit exceeded ({reason}) at {ev['type']}")
+            evs.append({
+                "type": "ChainLimitExceeded",
+                "payload": {
+                    "reason": reason,
+                    "eventType": ev["type"],
+                    "depth": depth,
+                    "processed": processed,
+                    "unresolved": len(queue) + 1,
+                }
+            })
+            break
+        processed += 1
+
+        event_type = ev["type"]
+        pld = _payload_to_dict(ev["payload"]) or {}
+
+        new = []
+        special = _EVENT_HANDLERS.get(event_type)
+        if special:
+            new += special(pld, item, lookup)
+
         # 通常のトリガーイベントの処理
-        cid = pld.get("cardId")
-        card = next((c for c in item["cards"] if c["id"] == cid), None)
+        card = lookup(pld.get("cardId"))
         if card:
-            evs += handle_trigger(card, event_type, item)
-        
-        i += 1
+            new += handle_trigger(card, event_type, item)
+
+        if new:
+            evs += new
+            queue.extend((e, depth + 1) for e in new)
     return evs
 
 
 
 def apply_action(card, act, item, owner_id):
+    count("ApplyActionCalls")
     handler = get_handler(act["type"])
     if not handler:
         logger.warning("Unhandled action type: %s", act["type"])
         return []
     
-    logger.info(f"apply_action: card={card['id']} action={act['type']} owner={owner_id}")
 
     # ① 対象を解決する
     # Transform アクション専用の特別処理
@@ -269,14 +505,15 @@ def apply_action(card, act, item, owner_id):
         if not act_for_targets.get("target"):
             act_for_targets["target"] = "Self"  # デフォルトでSelfを対象
         targets = resolve_targets(card, act_for_targets, item)
-        logger.info(f"  Transform action - excluded selectionKey from target resolution")
     else:
         targets = resolve_targets(card, act, item)
     
-    logger.info(f"  targets resolved: {[t['id'] for t in targets]}")
+    log_debug("apply_action", cardId=card["id"] if card else None, action=act["type"],
+              ownerId=owner_id, targets=lambda: [t["id"] for t in targets])
     events = []
 
     # ② 各対象に対してハンドラを実行
+    count("HandlerCalls", len(targets))
     for tgt in targets:
         events += handler(tgt, act, item, owner_id)
 
@@ -291,17 +528,16 @@ def evaluate_condition(cond: str, card: dict, item: dict) -> bool:
     条件式をパースして真偽を返す。
     拡張されたパッシブアビリティ対象用の条件評価機能。
     """
+    count("EvaluateConditionCalls")
     if not cond:
         return True
     
-    print(f"Evaluating condition: {cond} for card {card['id']}")
-    
     # 自分ターンかつ自分フィールド枚数 == N
     if cond.startswith("PlayerTurnAndSelfFieldCount=="):
         try:
             n = int(cond.split("==",1)[1])
         except ValueError:
-            print(f"  Invalid condition format: {cond}")
+            log_debug("invalid_condition", condition=cond)
             return False
         return (item["turnPlayerId"] == card["ownerId"] and
                 sum(1 for c in item["cards"]
@@ -326,7 +562,7 @@ def evaluate_condition(cond: str, card: dict, item: dict) -> bool:
                                       if c["ownerId"] != card["ownerId"] and c["zone"] == "Field")
                 return enemy_field_count <= n
         except ValueError:
-            print(f"  Invalid condition format: {cond}")
+            log_debug("invalid_condition", condition=cond)
             return False
     
     # 自分フィールド枚数の条件評価
@@ -348,7 +584,7 @@ def evaluate_condition(cond: str, card: dict, item: dict) -> bool:
                                        if c["ownerId"] == card["ownerId"] and c["zone"] == "Field")
                 return player_field_count <= n
         except ValueError:
-            print(f"  Invalid condition format: {cond}")
+            log_debug("invalid_condition", condition=cond)
             return False
     
     # Environment ゾーンの条件評価
@@ -367,7 +603,7 @@ def evaluate_condition(cond: str, card: dict, item: dict) -> bool:
                 env_count = sum(1 for c in item["cards"] if c["zone"] == "Environment")
                 return env_count <= n
         except ValueError:
-            print(f"  Invalid condition format: {cond}")
+            log_debug("invalid_condition", condition=cond)
             return False
     
     # ターン数の条件評価
@@ -384,11 +620,11 @@ def evaluate_condition(cond: str, card: dict, item: dict) -> bool:
                 n = int(cond.split("<=",1)[1])
                 return turn_count <= n
         except ValueError:
-            print(f"  Invalid condition format: {cond}")
+            log_debug("invalid_condition", condition=cond)
             return False
     
     # 他の条件式が増えたらここに追加…
-    print(f"  Unknown condition: {cond}")
+    log_debug("unknown_condition", condition=cond, cardId=card["id"])
     return False
 
 # ----------------------
@@ -399,8 +635,9 @@ def refresh_passive_auras(item, events):
     全プレイヤーのリーダーパッシブ効果を再評価し、適用/解除を行う。
     拡張されたゾーンフィルタリングに対応。
     """
-    for p in item["players"]:
-        _process_leader_passive_effects(p, item, events)
+    with span("refresh_passive_auras"):
+        for p in item["players"]:
+            _process_leader_passive_effects(p, item, events)
 
 
 def _process_leader_passive_effects(player, item, events):
@@ -408,22 +645,20 @@ def _process_leader_passive_effects(player, item, events):
     単一プレイヤーのリーダーパッシブ効果を処理する。
     """
     leader_def = get_leader_def(player["leaderId"])
-    print(f"Processing leader {player['leaderId']} for player {player['id']}, leader_def: {leader_def}")
+    log_debug("leader_passive", leaderId=player["leaderId"], playerId=player["id"], found=bool(leader_def))
     if not leader_def:
         return
 
     turn_cnt = item.get("turnCount", 0)
     stage_idx = get_stage_index(turn_cnt)
     stages = leader_def.get("evolutionStages", [])
-    print(f"  Evolution stage index: {stage_idx} (turn {turn_cnt})")
     if stage_idx >= len(stages):
         return
     stage_def = stages[stage_idx]
 
     # すべてのパッシブ効果を評価
-    print(f"  Evaluating passive effects for stage {stage_idx}")
+    log_debug("leader_stage", leaderId=player["leaderId"], stage=stage_idx, turn=turn_cnt)
     for eff in stage_def.get("passiveEffects", []):
-        print(f"    Evaluating effect: {eff}")
         _evaluate_and_apply_passive_effect(eff, player, item, events)
 
 
@@ -437,11 +672,9 @@ def _evaluate_and_apply_passive_effect(effect, player, item, events):
     
     if evaluate_condition(cond, leader_card, item):
         # 条件成立→付与
-        print(f"    Condition met, applying effect: {effect}")
         apply_passive_effect(effect, player, item, events)
     else:
         # 条件不成立→解除
-        print(f"    Condition not met, clearing effect: {effect}")
         clear_passive_from_targets(effect, player, item, events)
 
 
@@ -514,8 +747,8 @@ def apply_passive_effect(eff, player, item, events):
         targets = resolve_targets(dummy, act, item)
         target_zones = _get_target_zones_from_action(act)
         
-        print(f"      Applying passive effect to {len(targets)} targets in zones: {target_zones}")
-        print(f"      Target IDs: {[t['id'] for t in targets]}")
+        log_debug("passive_apply", sourceId=dummy["id"], action=act.get("type"), zones=target_zones,
+                  targets=lambda: [t["id"] for t in targets])
         
         # アビリティ発動ログ
         events.append({
@@ -565,56 +798,63 @@ def clear_passive_from_targets(eff, player, item, events):
             k = battle_buff_action.get("keyword", "Power")
             k_mapped = keyword_map(k)
         
+        # リーダーがこの key を付けたカードが無ければ対象の解決自体を省く
+        affected = {id(c) for c in aura_index.targets(item["cards"], dummy["id"], k_mapped)}
+        if not affected:
+            continue
+
         # 対象カード取得（拡張されたゾーン対応）
         targets = resolve_targets(dummy, act, item)
         target_zones = _get_target_zones_from_action(act)
         
-        print(f"      Clearing passive effect from {len(targets)} targets in zones: {target_zones}")
-        print(f"      Target IDs: {[t['id'] for t in targets]}")
+        log_debug("passive_clear", sourceId=dummy["id"], action=act.get("type"), zones=target_zones,
+                  targets=lambda: [t["id"] for t in targets], affected=len(affected))
 
         for tgt in targets:
+            if id(tgt) not in affected:
+                continue
             # PowerAura/DamageAuraは一時ステータスをクリア（expire_turn=-1で永続だが、tempStatusesに入っている）
             _clear_temp_statuses(tgt, k_mapped, dummy["id"], k, events)
+            # 永続の BattleBuff は statuses に sourceId 付きで入っている
+            _clear_permanent_statuses(tgt, k_mapped, dummy["id"], k, events)
 
 
 def _clear_temp_statuses(target, keyword_mapped, source_id, keyword, events):
     """
     対象カードから一時ステータスを削除する。
     """
-    before = len(target.get("tempStatuses", []))
+    # 該当キーのエントリだけを見て、外すものが無ければリストを作り直さない
+    if not any(s.get("sourceId") == source_id for s in card_view(target).temp_entries(keyword_mapped)):
+        return
     target["tempStatuses"] = [
         s for s in target.get("tempStatuses", [])
-        if not (s["key"] == keyword_mapped and s["sourceId"] == source_id)
+        if not (s["key"] == keyword_mapped and s.get("sourceId") == source_id)
     ]
-    if len(target.get("tempStatuses", [])) < before:
-        events.append({
-            "type": "BattleBuffRemoved",
-            "payload": {
-                "cardId": target["id"],
-                "keyword": keyword,
-                "sourceCardId": source_id
-            }
-        })
+    aura_index.discard(target, source_id, keyword_mapped)
+    events.append({
+        "type": "BattleBuffRemoved",
+        "payload": {
+            "cardId": target["id"],
+            "keyword": keyword,
+            "sourceCardId": source_id
+        }
+    })
 
 
 def _clear_permanent_statuses(target, keyword_mapped, source_id, keyword, events):
     """
-    対象カードから恒常ステータスを削除する。
+    対象カードから恒常ステータスを削除する（上書きしていた値があれば戻す）。
     """
-    before = len(target.get("statuses", []))
-    target["statuses"] = [
-        v for v in target.get("statuses", [])
-        if not (v["key"] == keyword_mapped and v.get("sourceId") == source_id)
-    ]
-    if len(target.get("statuses", [])) < before:
-        events.append({
-            "type": "StatusRemoved",
-            "payload": {
-                "cardId": target["id"],
-                "keyword": keyword,
-                "sourceCardId": source_id
-            }
-        })
+    if not remove_sourced_status(target, keyword_mapped, source_id):
+        return
+    events.append({
+        "type": "StatusRemoved",
+        "payload": {
+            "cardId": target["id"],
+            "keyword": keyword,
+            "sourceCardId": source_id
+        }
+    })
 
 # ---------- Phase helper -------------------------------------
 
@@ -630,17 +870,15 @@ def build_phase(old, new, cur, nxt, *, draw=False):
 
 def do_draw(item, player_id):
     """山札の先頭1枚を手札へ。引けなければ pass"""
-    for c in item["cards"]:
-        if c["ownerId"] == player_id and c["zone"] == "Deck":
-            c["zone"] = "Hand"
-            return True  # 1 枚動かした
-    return False
+    return bool(deck_stack.draw(item, player_id, 1))  # 1 枚動かしたら True
 
 
 # ---------- Card 検索 ---------------------------------------
 
 def find_card(item, card_id):
     """指定されたカードIDに一致するカードを検索"""
+    count("FindCardCalls")
+    count("CardScans", len(item["cards"]))  # 上限（見つかった位置で打ち切る）
     return next((c for c in item["cards"] if c["id"] == card_id), None)
 
 
@@ -649,12 +887,17 @@ def find_card(item, card_id):
 # ------------------------------------------------------------
 
 def calc_total_power(card):
-    """元データ + TempPowerBoost をざっくり合算"""
-    base = int(card.get("power", 0))
-    for s in card.get("tempStatuses", []):
-        if s["key"] == "TempPowerBoost":
-            base += int(s["value"])
-    return base
+    """元データ + TempPowerBoost を合算（card_view のキャッシュを利用）"""
+    return card_view(card).power
+
+
+def _apply_player_damage(atk, act, item):
+    """
+    プレイヤー対象の ProcessDamage を実行する。対象はカードではなくプレイヤーなので
+    apply_action の対象解決は通さず、ハンドラを攻撃側カードを起点に 1 回だけ呼ぶ。
+    """
+    count("ApplyActionCalls")
+    return get_handler("ProcessDamage")(atk, act, item, atk["ownerId"])
 
 
 def resolve_battle(item, events):
@@ -682,9 +925,7 @@ def resolve_battle(item, events):
             "value": dmg,
             "target": "EnemyLeader"
         }
-        events.extend(
-            apply_action(None, process_damage_action, item, atk["ownerId"])
-        )
+        events.extend(_apply_player_damage(atk, process_damage_action, item))
 
     # ----- ② ユニット vs ユニット の場合 -----
     else:
@@ -702,9 +943,7 @@ def resolve_battle(item, events):
                         "value": overflow,
                         "targetPlayerId": tgt["ownerId"]
                     }
-                    events.extend(
-                        apply_action(None, process_damage_action, item, atk["ownerId"])
-                    )
+                    events.extend(_apply_player_damage(atk, process_damage_action, item))
         elif atk_pow < tgt_pow:  # 負け
             destroy_ids.append(atk["id"])
         else:  # 相打ち
@@ -749,7 +988,7 @@ def _check_optional_ability_activation(card, effect, item):
         return False  # オプション能力ではない
     
     # 発動確認のchoiceRequestを生成
-    req_id = f"optional_ability_{card['id']}_{now_iso().replace(':', '').replace('-', '').replace('.', '')}"
+    req_id = next_id(item, f"optional_ability_{card['id']}")
     item.setdefault("choiceRequests", []).append({
         "requestId": req_id,
         "playerId": card["ownerId"],
@@ -775,7 +1014,7 @@ def handle_monster_summon(card, item):
         "payload": {"cardId": card["id"]}
     })
     
-    logger.info(f"Monster summon handled for card {card['id']}")
+    log_debug("summon_monster", cardId=card["id"])
     return events
 
 
@@ -796,7 +1035,7 @@ def handle_persistent_spell(card, item):
         }
     })
     
-    logger.info(f"Persistent spell handled for card {card['id']}")
+    log_debug("summon_persistent_spell", cardId=card["id"])
     return events
 
 
@@ -821,7 +1060,7 @@ def handle_normal_spell(card, item):
         }
     })
     
-    logger.info(f"Normal spell handled for card {card['id']}")
+    log_debug("summon_normal_spell", cardId=card["id"])
     return events
 
 
@@ -844,7 +1083,7 @@ def handle_field_card(card, item):
         }
     })
     
-    logger.info(f"Field card handled for card {card['id']}")
+    log_debug("summon_field_card", cardId=card["id"])
     return events
 
 
@@ -852,7 +1091,7 @@ def notify_summon_card(item, card_id, owner_id):
     """
     カードタイプ別の召喚処理を実行
     """
-    logger.info(f"notify_summon_card called for card {card_id} by owner {owner_id}")
+    log_debug("notify_summon_card", cardId=card_id, ownerId=owner_id)
     
     # カードを取得
     card = next((c for c in item["cards"] if c["id"] == card_id), None)
@@ -878,7 +1117,7 @@ def notify_summon_card(item, card_id, owner_id):
         logger.warning(f"Card {base_card_id} has no cardType, defaulting to Monster")
         card_type = "Monster"
     
-    logger.info(f"Processing card type: {card_type} for card {card_id}")
+    log_debug("card_type", cardId=card_id, cardType=card_type)
     
     # カードタイプ別の処理
     if card_type == "Monster":
@@ -915,10 +1154,540 @@ def notify_summon_card(item, card_id, owner_id):
     return events
 
 
+# =================== ゲーム操作 ===============================
+# Mutation の本体（読み込み・保存・入力検証を除いた部分）。_dispatch と
+# 同一プロセス AI（play_ai_turn）の両方から item に対して直接呼ぶ。
+
+def apply_moves(item, moves):
+    """
+    moveCards の移動をまとめて適用する。戻り値: 解決待ちのトリガーイベント。
+    カードは索引で引き、場を離れたカードのオーラは全移動の後に 1 回の走査で外す
+    （大量の移動でも盤面の走査回数は移動数によらない）。
+    """
+    lookup = _card_lookup(item)
+    trig = []
+    left = set()
+    for mv in moves:
+        cid, toz = mv["cardId"], mv["toZone"]
+        card = lookup(cid)
+        if not card:
+            continue
+        fromz = card["zone"]
+        if toz == "Deck":
+            deck_stack.insert(item, card)  # 山札の一番下へ
+        else:
+            card["zone"] = toz
+        if fromz == "Field" and toz != "Field":
+            left.add(cid)
+        if fromz == "Hand" and toz == "Field":
+            trig.append({"type": "OnPlay", "payload": {"cardId": cid}})
+        if toz == "Field":
+            trig.append({"type": "OnEnterField", "payload": {"cardId": cid}})
+    detached = detach_auras_from(left, item["cards"])
+    log_debug("apply_moves", moves=len(moves), left=len(left), detached=detached)
+    return trig
+
+
+def summon_card(item, card):
+    """カードタイプ別の召喚処理 → 誘発の解決 → パッシブ再評価"""
+    card_events = notify_summon_card(item, card["id"], card["ownerId"])
+    evs = resolve(card_events, item)
+    refresh_passive_auras(item, evs)
+    return evs
+
+
+def _has_trigger(card, trig):
+    return any(eff.get("trigger") == trig for eff in card.get("effectList") or ())
+
+
+def run_turn_end(item):
+    """
+    End → Start のターン終了処理（ターン数の加算を含む）。
+      ① 場の OnTurnEnd 持ちを 1 回の走査で集めて順に発動する
+      ② 期限切れ tempStatuses の削除と攻撃フラグのリセットを 1 回の走査で行い、
+         削除があれば TempStatusExpired を 1 件にまとめて返す
+    攻撃フラグは攻撃済み（HasAttacked が真）のカードだけ書き換える（card_view の索引で判定）。
+    """
+    cur = item["turnPlayerId"]
+    events = []
+    for card in [c for c in item["cards"] if c["zone"] == "Field" and _has_trigger(c, "OnTurnEnd")]:
+        events.extend(handle_trigger(card, "OnTurnEnd", item))
+
+    turn = item["turnCount"] = item.get("turnCount", 0) + 1
+    expired = []
+    reset = 0
+    count("CardScans", len(item["cards"]))
+    for c in item["cards"]:
+        temps = c.get("tempStatuses")
+        if temps:
+            keep = [s for s in temps if s.get("expireTurn", -1) == -1 or s["expireTurn"] > turn]
+            if len(keep) != len(temps):
+                c["tempStatuses"] = keep
+                expired.append({"cardId": c["id"], "expiredCount": len(temps) - len(keep)})
+        if c["ownerId"] == cur and c["zone"] == "Field" and card_view(c).status("HasAttacked", False):
+            add_status(c, "HasAttacked", False)
+            reset += 1
+    if expired:
+        events.append({"type": "TempStatusExpired", "payload": {"turnCount": turn, "cards": expired}})
+    log_debug("turn_end", turnCount=turn, expired=len(expired), attackReset=reset)
+    return events
+
+
+def advance_phase(item):
+    """フェーズを 1 つ進める（Draw は即 Main へ）。戻り値: (events, 新フェーズ, 次プレイヤー)"""
+    cur = item["turnPlayerId"]
+    # 次のターンプレイヤーを決定
+    nxt = next(p for p in item["players"] if p["id"] != cur)
+
+    seq = ["Start", "Draw", "Main", "End"]
+    old = item.get("phase", "Start")
+    new = seq[(seq.index(old) + 1) % len(seq)]
+
+    # 基本イベント
+    events = [
+        {"type": "TurnEnded",    "payload": {"playerId": cur}},
+        {"type": "PhaseChanged", "payload": {"phase": new, "playerId": item["turnPlayerId"]}}
+    ]
+
+    # End → Start でターンプレイヤー交代
+    if new == "Start":
+        # ターンチェンジの前にターン数をインクリメント（End フェーズ後）
+        if old == "End":
+            events.extend(run_turn_end(item))
+        # プレイヤー切り替え
+        item["turnPlayerId"] = nxt["id"]
+    item["phase"] = new
+
+    # 新ターン Start フェーズでリーダーパッシブ適用
+    if new == "Start":
+        refresh_passive_auras(item, events)
+
+        # ターンプレイヤーに {"color": "COLORLESS", "isUsed": False} を追加し、isUsed をすべて False に設定
+        turn_player = next(p for p in item["players"] if p["id"] == item["turnPlayerId"])
+        turn_player.setdefault("levelPoints", []).append({"color": "COLORLESS", "isUsed": False})
+        for point in turn_player["levelPoints"]:
+            point["isUsed"] = False
+
+    # Draw フェーズを即処理して Main へ
+    if new == "Draw":
+        if item.get("turnCount", 0) == 0 or not do_draw(item, item["turnPlayerId"]):
+            events.append({"type": "Draw", "payload": {"playerId": item["turnPlayerId"], "count": 0}})
+        else:
+            events.append({"type": "Draw", "payload": {"playerId": item["turnPlayerId"], "count": 1}})
+
+        # Draw 完了 → Main
+        new = "Main"
+        item["phase"] = "Main"
+        events.append({
+            "type": "PhaseChanged",
+            "payload": {"phase": "Main", "playerId": item["turnPlayerId"]}
+        })
+
+    return events, new, nxt
+
+
+def declare_attack(item, attacker, target, cid_t, is_leader):
+    """攻撃宣言。防御側が AI ならノーブロックで即バトル解決まで進める"""
+    cid_a = attacker["id"]
+    # 2) まず防御側プレイヤーを取得しておく（AI 判定にも使う）
+    defender = next(p for p in item["players"] if p["id"] != attacker["ownerId"])
+
+    # 3) pendingBattle をセット
+    item["pendingBattle"] = {
+        "attackerId":      cid_a,
+        "attackerOwnerId": attacker["ownerId"],
+        "targetId":        cid_t,
+        "targetOwnerId":   (target["ownerId"] if target else defender["id"]),
+        "blockerId":       None,
+        "isLeader":        is_leader,
+    }
+    item["battleStep"] = "BlockChoice"
+
+    # 4) 攻撃宣言イベント
+    events = [{
+        "type": "AttackDeclared",
+        "payload": {
+            "attackerId": cid_a,
+            "targetId"  : cid_t,
+            "isLeader"  : is_leader
+        }
+    }]
+
+    # 5) 相手が AI なら
+    defender = next(p for p in item["players"] if p["id"] != attacker["ownerId"])
+    if defender["name"].startswith("AI_"):
+        # ❶ ノーブロックを即決
+        item["pendingBattle"]["blockerId"] = None
+        events.append({
+        "type": "BlockSet",
+        "payload": {"blockerId": None}
+        })
+
+        # ❷ 「AttackAbility」段階をスキップし、そのまま Resolve へ
+        item["battleStep"] = "Resolve"
+
+        # ❸ Destroy / Damage を計算して events に追加
+        resolve_battle(item, events)          # CleanUp へは進めない
+
+    else:
+        # 人間プレイヤーがブロックを選ぶ場合は従来どおり
+        item["battleStep"] = "AttackAbility"
+
+    # **ここでカウンター発動の選択肢を追加**
+    # defender = 攻撃されたプレイヤー
+    # カウンターゾーンにカードがある場合は、カウンターを発動するか選択肢を出す
+    if any(c for c in item["cards"] if c["ownerId"] == defender["id"] and c["zone"] == "Counter"):  
+        req_id = next_id(item, "counter")
+        item.setdefault("choiceRequests", []).append({
+            "requestId":  req_id,
+            "playerId":   defender["id"],
+            "promptText": "カウンターを発動しますか？",
+            "options":    ["Yes", "No"]
+        })
+
+    return events
+
+
+def resolve_battle_step(item):
+    """AttackAbility → Resolve（Destroy / Damage を積む。CleanUp へは進めない）"""
+    events = []
+    resolve_battle(item, events)
+    item["battleStep"] = "Resolve"
+    return events
+
+
+def resolve_ack(item):
+    """Resolve → CleanUp（攻撃済みフラグを立てて pendingBattle を片付ける）"""
+    # 防御側が AI の場合は declare_attack 内の resolve_battle で既に CleanUp になっている
+    if item.get("battleStep") == "Resolve" or (item.get("battleStep") == "CleanUp" and item.get("pendingBattle")):
+        pb  = item.get("pendingBattle") or {}
+        atk = find_card(item, pb.get("attackerId"))
+        if atk:
+            add_status(atk, "HasAttacked", True)
+
+        item["pendingBattle"] = None
+        item["battleStep"]    = "CleanUp"
+
+
+def answer_choice(item, body):
+    """choiceResponse を登録し、待っていた deferred アクションを実行する"""
+    req_id   = body["requestId"]
+    player_id = body["playerId"]
+    events = []
+
+    # ① choiceResponses に登録
+    keyed(item, "choiceResponses").append(body)
+
+    # ② pendingDeferred から req_id の分だけ取り出す → Destroy 等を実行
+    pending = keyed(item, "pendingDeferred")
+    for act in pending.pop(req_id):
+        source_card = find_card(item, act["sourceCardId"])
+        if not source_card:
+            logger.warning(f"Source card {act['sourceCardId']} not found")
+            continue
+        # オプション能力の発動確認の場合
+        if act.get("effectType") == "optionalAbility":
+            # "No"の場合は何もしない（効果をスキップ）
+            if body.get("selectedValue", "") != "Yes":
+                continue
+            # 発動が選択された場合、継続レコードの位置から効果を実行
+            if "effectIndex" in act:
+                eff_idx = int(act["effectIndex"])
+                eff = _continuation_effect(act, source_card)
+            else:
+                eff_idx, eff = None, act  # 旧形式: 効果全体のコピー
+            if eff:
+                events += _run_effect_actions(source_card, eff, eff_idx, act["trigger"], item,
+                                              start=int(act.get("actionIndex", 0)))
+        else:
+            # 通常のアクション（Select→Destroy等）
+            events += _resume_deferred(act, source_card, item, player_id)
+
+    # ③ choiceRequests / choiceResponses をクリーンアップ
+    keyed(item, "choiceRequests").pop(req_id)
+    keyed(item, "choiceResponses").pop(req_id)
+
+    return events
+
+
+# =================== AI ターン起動 ===========================
+# AI_DISPATCH_MODE で AI Lambda へ渡すペイロードを選ぶ:
+#   full       matchItem に STATE 全体（従来どおり。既定）
+#   compressed matchStateGz に gzip + base64 した STATE
+#   slim       matchId / playerId / matchVersion のみ（AI 側が STATE を読み直す。
+#              overflowKeys のチャンクも load_match と同じ手順で読むこと）
+# どのモードでも matchId / playerId / matchVersion は必ず入る。
+# 非同期 invoke の上限を超える場合は compressed → slim の順に自動で縮める。
+AI_PAYLOAD_LIMIT = 256 * 1024
+AI_DISPATCH_MODES = ("full", "compressed", "slim")
+
+
+def build_ai_payload(match_id, player_id, item, match_text, mode=None):
+    """
+    AI 起動ペイロードを組み立てる。match_text は serialize_match_text の結果を渡す
+    （再シリアライズしない）。戻り値: (payload bytes, 実際に使ったモード)
+    """
+    mode = mode or os.environ.get("AI_DISPATCH_MODE", "full")
+    if mode not in AI_DISPATCH_MODES:
+        mode = "full"
+    head = json.dumps({
+        "matchId":      match_id,
+        "playerId":     player_id,
+        "matchVersion": int(item.get("matchVersion", 0)),
+    })
+
+    if mode == "full":
+        payload = f'{head[:-1]}, "matchItem": {match_text}}}'.encode("utf-8")
+        if len(payload) <= AI_PAYLOAD_LIMIT:
+            return payload, mode
+        mode = "compressed"
+
+    if mode == "compressed":
+        blob = base64.b64encode(gzip.compress(match_text.encode("utf-8"), compresslevel=6)).decode("ascii")
+        payload = f'{head[:-1]}, "matchStateGz": "{blob}"}}'.encode("utf-8")
+        if len(payload) <= AI_PAYLOAD_LIMIT:
+            return payload, mode
+        mode = "slim"
+
+    return head.encode("utf-8"), mode
+
+
+def dispatch_ai_turn(match_id, player_id, item, match_text):
+    payload, mode = build_ai_payload(match_id, player_id, item, match_text)
+    set_metric("AiPayloadBytes", len(payload), "Bytes")
+    log_info("ai_dispatch", playerId=player_id, mode=mode, payloadBytes=len(payload),
+             stateBytes=len(match_text))
+    ai.invoke(
+        FunctionName=os.environ["AI_LAMBDA_NAME"],
+        InvocationType="Event",
+        Payload=payload,
+    )
+    return mode
+
+
+# =================== 同一プロセス AI ===========================
+# AI_EXECUTOR=inprocess（マッチ単位ではマッチの aiExecutor が優先）のとき、AI の
+# ターンを AI Lambda に渡さず、advancePhase の呼び出し内で ai_policy の方策に
+# 従って最後まで進める（召喚・攻撃・バトル解決・フェーズ送り）。保存は
+# advancePhase の 1 回だけ。途中で失敗した場合は item をターン開始時に戻し、
+# そのマッチの aiExecutor を external にして AI Lambda に切り替える。
+AI_EXECUTORS = ("inprocess", "external")
+AI_MAX_STEPS = int(os.environ.get("AI_MAX_STEPS", "200"))
+
+
+def ai_executor(item):
+    mode = item.get("aiExecutor") or os.environ.get("AI_EXECUTOR", "external")
+    return mode if mode in AI_EXECUTORS else "external"
+
+
+def _pay_level_points(item, player_id, cost):
+    for point in unused_level_points(item, player_id)[:max(cost, 0)]:
+        point["isUsed"] = True
+
+
+def _apply_ai_action(item, player_id, act):
+    if act["type"] == "summon":
+        card = find_card(item, act["cardId"])
+        _pay_level_points(item, player_id, card_view(card).cost)
+        return summon_card(item, card)
+    if act["type"] == "attack":
+        attacker = find_card(item, act["attackerId"])
+        target = None if act.get("targetIsLeader") else find_card(item, act["targetId"])
+        return declare_attack(item, attacker, target, act.get("targetId"), bool(act.get("targetIsLeader")))
+    raise ValueError(f"unknown AI action: {act['type']}")
+
+
+def _is_ai(player):
+    return bool(player) and player.get("name", "").startswith("AI_")
+
+
+def waiting_for_opponent(item, player_id):
+    """
+    player_id のターン中に相手の応答を待つ必要があるか。
+    相手宛ての選択要求（カウンター確認など）が残っているか、人間の防御側が
+    ブロック / カウンターを選ぶ段階（BlockChoice / AttackAbility）で止まっている場合。
+    """
+    if any(r.get("playerId") != player_id for r in item.get("choiceRequests") or []):
+        return True
+    if item.get("pendingBattle") and item.get("battleStep") in ("BlockChoice", "AttackAbility"):
+        defender = next((p for p in item["players"] if p["id"] != player_id), None)
+        return not _is_ai(defender)
+    return False
+
+
+def play_turn(item, player_id, policy, events):
+    """
+    ターンが相手に渡るまで方策に従って 1 手ずつ進める。戻り値: 手数（simulate からも使う）
+    相手の応答待ち（waiting_for_opponent）になったらターンの途中でも戻る。
+    """
+    for step in range(AI_MAX_STEPS):
+        if item["turnPlayerId"] != player_id:
+            return step
+
+        # 自分宛ての選択要求から答える
+        own = next((r for r in item.get("choiceRequests") or [] if r.get("playerId") == player_id), None)
+        if own:
+            events += answer_choice(item, policy.answer(own, item, player_id))
+            continue
+
+        # 人間のブロック / カウンターは人間が答えるまで待つ（保存してクライアントに返す）
+        if waiting_for_opponent(item, player_id):
+            return step
+
+        # 攻撃の後始末（相手が AI なら Resolve、人間が resolveBattle した後も Resolve で止まっている）
+        if item.get("pendingBattle"):
+            if item.get("battleStep") in ("Resolve", "CleanUp"):
+                resolve_ack(item)
+                continue
+
+        if item.get("phase") == "Main":
+            act = policy.next_action(item, player_id)
+            if act:
+                log_debug("ai_action", playerId=player_id, **act)
+                events += _apply_ai_action(item, player_id, act)
+                continue
+
+        events += advance_phase(item)[0]
+    raise RuntimeError(f"AI turn did not finish within {AI_MAX_STEPS} steps")
+
+
+def play_ai_turn(item, player_id, events):
+    """
+    AI のターンを同一プロセスで最後まで進め、発生したイベントを events に足す。
+    戻り値: True = 完了、False = 失敗したので AI Lambda に任せる（item は元に戻る）
+    """
+    policy_name = item.get("aiPolicy") or os.environ.get("AI_POLICY", "greedy")
+    policy = get_policy(policy_name)
+    snapshot, n_events = copy.deepcopy(item), len(events)
+    try:
+        if policy is None:
+            raise ValueError(f"unknown AI policy: {policy_name}")
+        with span("ai_turn"):
+            steps = play_turn(item, player_id, policy, events)
+    except Exception as e:
+        logger.warning(f"in-process AI failed, falling back to AI Lambda: {type(e).__name__}: {e}")
+        item.clear()
+        item.update(snapshot)
+        del events[n_events:]
+        item["aiExecutor"] = "external"
+        return False
+    set_metric("AiSteps", steps)
+    log_info("ai_turn", playerId=player_id, policy=policy_name, steps=steps,
+             waiting=item["turnPlayerId"] == player_id)
+    return True
+
+
+def resume_ai_turn(item, events):
+    """
+    人間の応答（resolveBattle / resolveAck / submitChoiceResponse）で同一プロセス AI の
+    待ちが解けたら、そのターンの続きを進める。
+    戻り値: AI Lambda に任せる必要がある playerId（失敗時のみ。それ以外は None）
+    """
+    pid = item.get("turnPlayerId")
+    player = next((p for p in item["players"] if p["id"] == pid), None)
+    if not _is_ai(player) or ai_executor(item) != "inprocess" or waiting_for_opponent(item, pid):
+        return None
+    return None if play_ai_turn(item, pid, events) else pid
+
+
+def _save_and_resume_ai(mid, item, events):
+    """人間の応答系 Mutation の共通の後処理: AI ターンの続き → 保存 → 必要なら AI Lambda 起動"""
+    ai_pid = resume_ai_turn(item, events)
+    item["updatedAt"] = now_iso(); bump(item); save_match(item)
+    match_text = serialize_match_text(item)
+    if ai_pid:
+        dispatch_ai_turn(mid, ai_pid, item, match_text)
+    with span("serialization"):
+        return {"match": json.loads(match_text), "events": events}
+
+
+# =================== ウォームアップ ===========================
+# Provisioned Concurrency / スケジュール起動向け。{"warmup": true} または
+# {"warmup": {"leaderIds": [...], "cardIds": [...]}} を受け取ると、マッチには
+# 触れずにクライアント生成・アクション import・リーダー / カードマスターの
+# 先読みだけを行い、段階ごとの所要時間を返す。
+# 対象の既定値は WARMUP_LEADER_IDS / WARMUP_CARD_IDS（カンマ区切り）。
+
+def is_warmup_event(event):
+    return bool(event.get("warmup")) and "info" not in event
+
+
+def _id_list(spec, key, env_name):
+    ids = spec.get(key) if isinstance(spec, dict) else None
+    if ids is None:
+        ids = [s.strip() for s in os.environ.get(env_name, "").split(",") if s.strip()]
+    return list(ids)
+
+
+def warm_up(event):
+    spec = event.get("warmup")
+    leader_ids = _id_list(spec, "leaderIds", "WARMUP_LEADER_IDS")
+    card_ids = _id_list(spec, "cardIds", "WARMUP_CARD_IDS")
+    configure_logging(event, None, "warmup")
+    start_invocation("warmup")
+    stages, errors = {}, []
+
+    def _stage(name, fn):
+        t0 = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:  # 先読みの失敗は本番呼び出しで再試行されるので記録だけ
+            errors.append(f"{name}: {type(e).__name__}: {e}")
+        stages[name] = round((time.perf_counter() - t0) * 1000.0, 3)
+        set_metric(f"Warmup{name[0].upper()}{name[1:]}Ms", stages[name], "Milliseconds")
+
+    _stage("clients", lambda: [resolve_client(c) for c in (table, leader_table, ai, helper.dynamodb)])
+    _stage("actions", load_all_actions)
+    _stage("leaders", lambda: [get_leader_def(lid) for lid in leader_ids])
+    _stage("cardMasters", lambda: preload_card_masters(card_ids))
+
+    result = {
+        "warmup":      True,
+        "stages":      stages,
+        "leaders":     sum(1 for lid in leader_ids if leader_cache.get(lid)),
+        "cardMasters": sum(1 for cid in set(card_ids) if cid in helper._master_items),
+        "errors":      errors,
+    }
+    log_info("warmup", **result)
+    flush_metrics()
+    return result
+
+
 # =================== Lambda ENTRY =============================
 def lambda_handler(event, context):
+    if is_warmup_event(event):
+        return warm_up(event)
     field=event["info"]["fieldName"]; args=event.get("arguments",{})
-    logger.info("Field %s  Args %s", field, args)
+    reset_card_views()  # 前回呼び出しのカードビューを破棄
+    configure_logging(event, args.get("matchId") or args.get("id"), field)
+    start_invocation(field)
+    start_trace(event, args.get("matchId") or args.get("id"))
+    log_info("invoke")
+
+    result = error = None
+    try:
+        with span("total"):
+            if profile_requested(event, args.get("matchId") or args.get("id")):
+                result, profile_id = run_profiled(_dispatch, field, args,
+                                                  match_id=args.get("matchId") or args.get("id"))
+                log_info("profile_captured", profileId=profile_id)
+                if isinstance(result, dict):
+                    result["profileId"] = profile_id
+            else:
+                result = _dispatch(field, args)
+        if isinstance(result, dict) and isinstance(result.get("events"), list):
+            set_metric("EventCount", len(result["events"]))
+        return result
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        flush_metrics()
+        if recording():
+            finish_trace(event, result, error, leaders={k: v for k, v in leader_cache.items() if v})
+
+
+def _dispatch(field, args):
 
     # publishClientUpdate そのまま返す
     if field=="publishClientUpdate":
@@ -938,7 +1707,7 @@ def lambda_handler(event, context):
             }]
         }
     
-    item = table.get_item(Key={"pk": mid, "sk": "STATE"}).get("Item")
+    item = load_match(mid)
     if not item:
         # マッチが見つからない場合は適切なエラーレスポンスを返す
         return {
@@ -958,41 +1727,27 @@ def lambda_handler(event, context):
     # -------- getMatch ----------------------------------------
     if field == "getMatch":
         match_id = args["id"]
-        resp     = table.get_item(Key={"pk": match_id, "sk": "STATE"})
-        item     = resp.get("Item")
-        return json.loads(json.dumps(item, cls=DecimalEncoder)) if item else None
+        item     = load_match(match_id)
+        return serialize_match(item) if item else None
 
     # -------- moveCards ---------------------------------------
     if field=="moveCards":
-        print(f"MoveCards: {args}")
-        trig=[]
-        for mv in args.get("moves",[]):
-            cid,toz = mv["cardId"],mv["toZone"]
-            card=next((c for c in item["cards"] if c["id"]==cid),None)
-            if not card: continue
-            fromz=card["zone"]; card["zone"]=toz
-            if fromz=="Field" and toz!="Field": detach_auras(card,item["cards"])
-            if fromz=="Hand" and toz=="Field":
-                trig.append({"type":"OnPlay","payload":{"cardId":cid}})
-            if toz=="Field":
-                trig.append({"type":"OnEnterField","payload":{"cardId":cid}})
-
+        trig=apply_moves(item, args.get("moves",[]))
         evs=resolve(trig,item)
         
         item["updatedAt"]=now_iso()
         bump(item)
         refresh_passive_auras(item, evs)
-        table.put_item(Item=item)
-        return {"match":json.loads(json.dumps(item,cls=DecimalEncoder)),
+        save_match(item)
+        return {"match":serialize_match(item),
                 "events":evs}
 
     # -------- summonCard --------------------------------------
     if field=="summonCard":
-        print(f"SummonCard: {args}")
         cid = args.get("cardId")
         if not cid:
             # カードIDがない場合は何もしない
-            return {"match": json.loads(json.dumps(item, cls=DecimalEncoder)), "events": []}
+            return {"match": serialize_match(item), "events": []}
         
         card = next((c for c in item["cards"] if c["id"]==cid), None)
         if not card:
@@ -1004,7 +1759,7 @@ def lambda_handler(event, context):
                     "message": "指定されたカードが見つかりません"
                 }
             }
-            return {"match": json.loads(json.dumps(item, cls=DecimalEncoder)), "events": [error_event]}
+            return {"match": serialize_match(item), "events": [error_event]}
         
         if card["zone"] == "Field":
             # 既にフィールドにある場合はエラーイベントを返す
@@ -1015,98 +1770,35 @@ def lambda_handler(event, context):
                     "message": "カードは既にフィールドに存在します"
                 }
             }
-            return {"match": json.loads(json.dumps(item, cls=DecimalEncoder)), "events": [error_event]}
-        # カードタイプ別の召喚処理を実行
-        card_events = notify_summon_card(item, cid, card["ownerId"])
-        
-        # 生成されたイベントを resolve で処理
-        evs = resolve(card_events, item)
-        
+            return {"match": serialize_match(item), "events": [error_event]}
+        evs = summon_card(item, card)
+
         item["updatedAt"]=now_iso()
         bump(item)
-        refresh_passive_auras(item, evs)
-        table.put_item(Item=item)
-        return {"match":json.loads(json.dumps(item,cls=DecimalEncoder)),
+        save_match(item)
+        return {"match":serialize_match(item),
                 "events":evs}
 
     # -------- advancePhase / endTurn --------------------------
     if field in ("advancePhase", "endTurn"):
-        cur = item["turnPlayerId"]
-        # 次のターンプレイヤーを決定
-        nxt = next(p for p in item["players"] if p["id"] != cur)
-
-        seq = ["Start", "Draw", "Main", "End"]
-        old = item.get("phase", "Start")
-        new = seq[(seq.index(old) + 1) % len(seq)]
-
-        # 基本イベント
-        events = [
-            {"type": "TurnEnded",    "payload": {"playerId": cur}},
-            {"type": "PhaseChanged", "payload": {"phase": new, "playerId": item["turnPlayerId"]}}
-        ]
+        events, new, nxt = advance_phase(item)
 
-        # End → Start でターンプレイヤー交代
-        if new == "Start":
-            # ターンチェンジの前にターン数をインクリメント（End フェーズ後）
-            if old == "End":
-                # OnTurnEnd トリガーを処理（ターン終了時の効果を発動）
-                for card in item["cards"]:
-                    if card["zone"] == "Field":
-                        events.extend(handle_trigger(card, "OnTurnEnd", item))
-                
-                item["turnCount"] = item.get("turnCount", 0) + 1
-                clear_expired(item["cards"], item["turnCount"])
-                # 攻撃フラグリセット
-                for c in item["cards"]:
-                    if c["ownerId"] == item["turnPlayerId"] and c["zone"] == "Field":
-                        add_status(c, "HasAttacked", False)
-            # プレイヤー切り替え
-            item["turnPlayerId"] = nxt["id"]
-        item["phase"] = new
-
-        # 新ターン Start フェーズでリーダーパッシブ適用
-        if new == "Start":
-            refresh_passive_auras(item, events)
-
-            # ターンプレイヤーに {"color": "COLORLESS", "isUsed": False} を追加し、isUsed をすべて False に設定
-            turn_player = next(p for p in item["players"] if p["id"] == item["turnPlayerId"])
-            turn_player.setdefault("levelPoints", []).append({"color": "COLORLESS", "isUsed": False})
-            for point in turn_player["levelPoints"]:
-                point["isUsed"] = False
-
-        # Draw フェーズを即処理して Main へ
-        if new == "Draw":
-            if item.get("turnCount", 0) == 0 or not do_draw(item, item["turnPlayerId"]):
-                events.append({"type": "Draw", "payload": {"playerId": item["turnPlayerId"], "count": 0}})
-            else:
-                events.append({"type": "Draw", "payload": {"playerId": item["turnPlayerId"], "count": 1}})
-
-            # Draw 完了 → Main
-            new = "Main"
-            item["phase"] = "Main"
-            events.append({
-                "type": "PhaseChanged",
-                "payload": {"phase": "Main", "playerId": item["turnPlayerId"]}
-            })
+        # AI のターンになったら同一プロセスで進めるか、AI Lambda を起動する
+        ai_turn = new == "Start" and _is_ai(nxt)
+        if ai_turn and ai_executor(item) == "inprocess":
+            ai_turn = not play_ai_turn(item, nxt["id"], events)
 
         # 永続化＆AI起動
         item["updatedAt"] = now_iso()
         bump(item)
-        table.put_item(Item=item)
-
-        ai_turn = nxt["name"].startswith("AI_")
-        if new == "Start" and ai_turn:
-            ai.invoke(
-                FunctionName=os.environ["AI_LAMBDA_NAME"],
-                InvocationType="Event",
-                Payload=json.dumps({
-                    "matchId":   mid,
-                    "playerId":  nxt["id"],
-                    "matchItem": json.loads(json.dumps(item, cls=DecimalEncoder))
-                }).encode('utf-8')
-            )
-
-        return {"match": json.loads(json.dumps(item, cls=DecimalEncoder)), "events": events}
+        save_match(item)
+
+        match_text = serialize_match_text(item)
+        if ai_turn:
+            dispatch_ai_turn(mid, nxt["id"], item, match_text)
+
+        with span("serialization"):
+            return {"match": json.loads(match_text), "events": events}
     
     # --- declareAttack -----------------------------------
     if field == "declareAttack":
@@ -1117,7 +1809,7 @@ def lambda_handler(event, context):
         # 1) フィールドチェック - 安全な処理
         if not cid_a:
             # 攻撃者IDがない場合は何もしない
-            return {"match": json.loads(json.dumps(item, cls=DecimalEncoder)), "events": []}
+            return {"match": serialize_match(item), "events": []}
         
         attacker = find_card(item, cid_a)
         if not attacker or attacker["zone"] != "Field":
@@ -1129,7 +1821,7 @@ def lambda_handler(event, context):
                     "message": "攻撃者が無効です（存在しないかフィールドにいません）"
                 }
             }
-            return {"match": json.loads(json.dumps(item, cls=DecimalEncoder)), "events": [error_event]}
+            return {"match": serialize_match(item), "events": [error_event]}
 
         if not is_leader:
             target = find_card(item, cid_t)
@@ -1142,72 +1834,18 @@ def lambda_handler(event, context):
                         "message": "ターゲットが無効です（存在しないかフィールドにいません）"
                     }
                 }
-                return {"match": json.loads(json.dumps(item, cls=DecimalEncoder)), "events": [error_event]}
+                return {"match": serialize_match(item), "events": [error_event]}
         else:
             target = None
 
-        # 2) まず防御側プレイヤーを取得しておく（AI 判定にも使う）
-        defender = next(p for p in item["players"] if p["id"] != attacker["ownerId"])
-
-        # 3) pendingBattle をセット
-        item["pendingBattle"] = {
-            "attackerId":      cid_a,
-            "attackerOwnerId": attacker["ownerId"],
-            "targetId":        cid_t,
-            "targetOwnerId":   (target["ownerId"] if target else defender["id"]),
-            "blockerId":       None,
-            "isLeader":        is_leader,
-        }
-        item["battleStep"] = "BlockChoice"
-
-        # 4) 攻撃宣言イベント
-        events = [{
-            "type": "AttackDeclared",
-            "payload": {
-                "attackerId": cid_a,
-                "targetId"  : cid_t,
-                "isLeader"  : is_leader
-            }
-        }]
-
-        # 5) 相手が AI なら
-        defender = next(p for p in item["players"] if p["id"] != attacker["ownerId"])
-        if defender["name"].startswith("AI_"):
-            # ❶ ノーブロックを即決
-            item["pendingBattle"]["blockerId"] = None
-            events.append({
-            "type": "BlockSet",
-            "payload": {"blockerId": None}
-            })
-
-            # ❷ 「AttackAbility」段階をスキップし、そのまま Resolve へ
-            item["battleStep"] = "Resolve"
-
-            # ❸ Destroy / Damage を計算して events に追加
-            resolve_battle(item, events)          # CleanUp へは進めない
-
-        else:
-            # 人間プレイヤーがブロックを選ぶ場合は従来どおり
-            item["battleStep"] = "AttackAbility"
-
-        # **ここでカウンター発動の選択肢を追加**
-        # defender = 攻撃されたプレイヤー
-        # カウンターゾーンにカードがある場合は、カウンターを発動するか選択肢を出す
-        if any(c for c in item["cards"] if c["ownerId"] == defender["id"] and c["zone"] == "Counter"):  
-            req_id = str(now_iso())
-            item.setdefault("choiceRequests", []).append({
-                "requestId":  req_id,
-                "playerId":   defender["id"],
-                "promptText": "カウンターを発動しますか？",
-                "options":    ["Yes", "No"]
-            })
+        events = declare_attack(item, attacker, target, cid_t, is_leader)
 
         bump(item)
         item["updatedAt"] = now_iso()
-        table.put_item(Item=item)
+        save_match(item)
 
         return {
-            "match":  json.loads(json.dumps(item, cls=DecimalEncoder)),
+            "match":  serialize_match(item),
             "events": events
         }
 
@@ -1224,7 +1862,7 @@ def lambda_handler(event, context):
                     "message": "ブロック選択段階ではありません"
                 }
             }
-            return {"match": json.loads(json.dumps(item, cls=DecimalEncoder)), "events": [error_event]}
+            return {"match": serialize_match(item), "events": [error_event]}
 
         if bid:
             blk = find_card(item, bid)
@@ -1237,7 +1875,7 @@ def lambda_handler(event, context):
                         "message": "無効なブロッカーです（存在しないか攻撃者と同じプレイヤーです）"
                     }
                 }
-                return {"match": json.loads(json.dumps(item, cls=DecimalEncoder)), "events": [error_event]}
+                return {"match": serialize_match(item), "events": [error_event]}
         pb["blockerId"] = bid
         item["pendingBattle"] = pb
         item["battleStep"]    = "AttackAbility"
@@ -1246,8 +1884,8 @@ def lambda_handler(event, context):
                 "payload": {"blockerId": bid}}]
 
         bump(item); item["updatedAt"] = now_iso()
-        table.put_item(Item=item)
-        return {"match": json.loads(json.dumps(item, cls=DecimalEncoder)),
+        save_match(item)
+        return {"match": serialize_match(item),
                 "events": events}
 
     # -------- resolveBattle ----------------------------------
@@ -1261,142 +1899,39 @@ def lambda_handler(event, context):
                     "message": "アビリティ発動段階ではありません"
                 }
             }
-            return {"match": json.loads(json.dumps(item, cls=DecimalEncoder)), "events": [error_event]}
+            return {"match": serialize_match(item), "events": [error_event]}
 
-        events = []
-        resolve_battle(item, events)      # Destroy / Damage を積む
-
-        item["battleStep"] = "Resolve"    # ここでは CleanUp へ進めない
-        bump(item); item["updatedAt"] = now_iso()
-        table.put_item(Item=item)
-
-        return {
-            "match":  json.loads(json.dumps(item, cls=DecimalEncoder)),
-            "events": events
-        }
+        events = resolve_battle_step(item)
+        return _save_and_resume_ai(mid, item, events)
 
     if field == "resolveAck":
-        if item.get("battleStep") == "Resolve":
-            pb  = item.get("pendingBattle") or {}
-            atk = find_card(item, pb.get("attackerId"))
-            if atk:
-                add_status(atk, "HasAttacked", True)
-
-            item["pendingBattle"] = None
-            item["battleStep"]    = "CleanUp"
-
-        bump(item); item["updatedAt"] = now_iso()
-        table.put_item(Item=item)
-
-        return {"match": json.loads(json.dumps(item, cls=DecimalEncoder)),
-                "events": []}
+        resolve_ack(item)
+        return _save_and_resume_ai(mid, item, [])
 
 
     # ──────────────── その他 Mutation 群 ────────────────
     if field == "setTurnPlayer":
         item["turnPlayerId"] = args["playerId"]; item["updatedAt"] = now_iso()
-        bump(item); table.put_item(Item=item)
-        return json.loads(json.dumps(item, cls=DecimalEncoder))
+        bump(item); save_match(item)
+        return serialize_match(item)
 
     if field == "updatePhase":
         item["phase"] = args["phase"]; item["updatedAt"] = now_iso()
-        bump(item); table.put_item(Item=item)
-        return json.loads(json.dumps(item, cls=DecimalEncoder))
+        bump(item); save_match(item)
+        return serialize_match(item)
 
     if field == "sendChoiceRequest":
         body = json.loads(args["json"])
         item.setdefault("choiceRequests", []).append(body)
-        item["updatedAt"] = now_iso(); bump(item); table.put_item(Item=item)
-        return json.loads(json.dumps(item, cls=DecimalEncoder))
+        item["updatedAt"] = now_iso(); bump(item); save_match(item)
+        return serialize_match(item)
 
     if field == "submitChoiceResponse":
         body = json.loads(args["json"])
-        req_id   = body["requestId"]
-        player_id = body["playerId"]
-        events = []
-
-        # ① choiceResponses に登録
-        item.setdefault("choiceResponses", []).append(body)
-
-        # ② pendingDeferred を走査 → マッチする Destroy 等を実行
-        new_pending = []
-        for act in item.get("pendingDeferred", []):
-            if act["selectionKey"] == req_id:
-                # オプション能力の発動確認の場合
-                if act.get("effectType") == "optionalAbility":
-                    selected_value = body.get("selectedValue", "")
-                    if selected_value == "Yes":
-                        # 発動が選択された場合、効果のアクションを実行
-                        source_card = next((c for c in item["cards"] if c["id"] == act["sourceCardId"]), None)
-                        if source_card:
-                            # 効果のアクションを処理
-                            for action in act.get("actions", []):
-                                if action["type"] == "Select":
-                                    # Select アクションの場合は choiceRequests に登録
-                                    candidates = resolve_targets(source_card, action, item)
-                                    
-                                    # 選択タイプに応じてoptionsを設定
-                                    selection_type = action.get("selectionType", "card")
-                                    if selection_type == "card":
-                                        option_ids = [c["id"] for c in candidates]
-                                    elif selection_type == "levelPoint":
-                                        # レベルポイントの選択肢を生成
-                                        option_ids = []
-                                        for player in item["players"]:
-                                            for point in player.get("levelPoints", []):
-                                                if not point.get("isUsed", False):
-                                                    option_ids.append(f"{player['id']}:{point['color']}")
-                                    else:
-                                        option_ids = [c["id"] for c in candidates]
-                                    
-                                    item.setdefault("choiceRequests", []).append({
-                                        "requestId": action["selectionKey"],
-                                        "playerId": source_card["ownerId"],
-                                        "promptText": action.get("prompt", "選択してください"),
-                                        "options": option_ids,
-                                        "selectionType": selection_type
-                                    })
-                                    
-                                    # 後続のアクションを pendingDeferred に保存
-                                    remaining_actions = act.get("actions", [])[1:]  # Select以降のアクション
-                                    for deferred_a in remaining_actions:
-                                        if deferred_a.get("deferred", False):
-                                            deferred_action = dict(deferred_a)
-                                            deferred_action["sourceCardId"] = source_card["id"]
-                                            deferred_action["trigger"] = act["trigger"]
-                                            deferred_action["selectionKey"] = action["selectionKey"]
-                                            deferred_action["selectionType"] = selection_type
-                                            new_pending.append(deferred_action)
-                                else:
-                                    # 即座に実行すべきアクション
-                                    events += apply_action(source_card, action, item, player_id)
-                    # "No"の場合は何もしない（効果をスキップ）
-                else:
-                    # 通常のアクション（Select→Destroy等）
-                    handler = get_handler(act["type"])
-                    if handler:
-                        # sourceCardId からカードオブジェクトを取得
-                        source_card = next((c for c in item["cards"] if c["id"] == act["sourceCardId"]), None)
-                        if source_card:
-                            # アクションハンドラーが自然に resolve_targets を呼び出す
-                            events += handler(source_card, act, item, player_id)
-                        else:
-                            logger.warning(f"Source card {act['sourceCardId']} not found")
-                    else:
-                        logger.warning(f"Handler not found for action type: {act['type']}")
-            else:
-                new_pending.append(act)
-        item["pendingDeferred"] = new_pending
-
-        # ③ choiceRequests / choiceResponses をクリーンアップ
-        item["choiceRequests"]  = [r for r in item.get("choiceRequests", [])
-                                   if r["requestId"] != req_id]
-        item["choiceResponses"] = [r for r in item.get("choiceResponses", [])
-                                   if r["requestId"] != req_id]
+        events = answer_choice(item, body)
 
-        # ④ 永続化して返却
-        item["updatedAt"] = now_iso(); bump(item); table.put_item(Item=item)
-        return {"match": json.loads(json.dumps(item, cls=DecimalEncoder)), "events": events}
+        # ④ 永続化して返却（AI ターン中の応答なら AI の続きも進める）
+        return _save_and_resume_ai(mid, item, events)
 
     if field == "updateCardStatuses":
         for upd in args.get("updates", []):
@@ -1404,11 +1939,10 @@ def lambda_handler(event, context):
             card = next((c for c in item["cards"] if c["id"] == cid), None)
             if not card: continue
             add_status(card, key, val)
-        item["updatedAt"] = now_iso(); bump(item); table.put_item(Item=item)
+        item["updatedAt"] = now_iso(); bump(item); save_match(item)
         return {"success": True, "errorMessage": None}
 
     if field == "updateLevelPoints":
-        print(f"UpdateLevelPoints: {args}")
 
         # ① JSON文字列をパース
         raw_points = json.loads(args["json"])  # 例: [{"Color":0,"IsUsed":false}, …]
@@ -1443,7 +1977,7 @@ def lambda_handler(event, context):
         # ⑤ updatedAt を更新してテーブルに保存
         item["updatedAt"] = now_iso()
         bump(item)
-        table.put_item(Item=item)
+        save_match(item)
 
         # ⑥ 必要なフィールドだけ返却
         return {
@@ -1457,7 +1991,7 @@ def lambda_handler(event, context):
 
     # 未サポート - 安全な処理
     return {
-        "match": json.loads(json.dumps(item, cls=DecimalEncoder)),
+        "match": serialize_match(item),
         "events": [{
             "type": "UnsupportedField",
             "payload": {
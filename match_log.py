@@ -0,0 +1,56 @@
+# match_log.py
+"""
+ホットパス用の構造化ログ（JSON 1 行 / ID などのスカラーのみ）。
+
+log_debug は呼び出しごとに有効化判定済みのフラグを見るだけで、無効時は
+文字列化を一切行わない。値に callable を渡すと有効時にだけ評価される。
+
+有効化条件（lambda_handler 冒頭の configure_logging で判定）:
+  - event["debug"] が真
+  - DEBUG_MATCH_IDS（カンマ区切り）に matchId が含まれる（"*" で全件）
+  - LOG_SAMPLE_RATE（0.0〜1.0）の確率でサンプリング
+"""
+import json
+import os
+import random
+
+_ctx = {"debug": False, "matchId": None, "field": None}
+
+
+def configure_logging(event=None, match_id=None, field=None):
+    """呼び出し単位でデバッグログの有効／無効を決める"""
+    event = event or {}
+    allow = {m.strip() for m in os.environ.get("DEBUG_MATCH_IDS", "").split(",") if m.strip()}
+    try:
+        rate = float(os.environ.get("LOG_SAMPLE_RATE", "0"))
+    except ValueError:
+        rate = 0.0
+
+    _ctx["matchId"] = match_id
+    _ctx["field"] = field
+    _ctx["debug"] = bool(
+        event.get("debug")
+        or (match_id and (match_id in allow or "*" in allow))
+        or (rate > 0 and random.random() < rate)
+    )
+    return _ctx["debug"]
+
+
+def debug_enabled():
+    return _ctx["debug"]
+
+
+def _emit(level, msg, fields):
+    rec = {"level": level, "msg": msg, "matchId": _ctx["matchId"], "field": _ctx["field"]}
+    for k, v in fields.items():
+        rec[k] = v() if callable(v) else v
+    print(json.dumps(rec, ensure_ascii=False, default=str))
+
+
+def log_debug(msg, **fields):
+    if _ctx["debug"]:
+        _emit("DEBUG", msg, fields)
+
+
+def log_info(msg, **fields):
+    _emit("INFO", msg, fields)
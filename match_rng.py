@@ -0,0 +1,114 @@
+# match_rng.py
+"""
+マッチごとの決定的な乱数ストリーム。
+
+item["rng"] = {"seed": <64bit 整数>, "n": <これまでに引いた回数>} だけを保存し、
+n 回目の値は splitmix64(seed + n * 黄金比定数) で求める（カウンタ方式）。
+Random の内部状態（約 2.5KB）を持ち回らずに済み、seed と n が同じなら
+同じ値が出るので、リプレイ・シミュレーション・AI 先読みのキャッシュ・
+不具合の再現に乱数の結果を個別に保存する必要がない。
+
+    rng = match_random(item)
+    rng.choice(colors)             # 1 回引くごとに item["rng"]["n"] が 1 進む
+    rng.randint(1, total)
+    next_id(item, "token")         # → "token_<seed のハッシュ>_<n>"（next_ids で k 個まとめて）
+
+seed が無いマッチは最初に引いた時点で os.urandom から初期化する。
+シミュレータやテストでは seed_match(item, seed) で明示的に与える。
+"""
+import hashlib
+import os
+
+STATE_KEY = "rng"
+
+_MASK = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+
+
+def _mix(z):
+    """splitmix64 の出力関数"""
+    z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9 & _MASK
+    z = (z ^ (z >> 27)) * 0x94D049BB133111EB & _MASK
+    return z ^ (z >> 31)
+
+
+def seed_match(item, seed=None):
+    """item の乱数ストリームを seed（省略時はランダム）で初期化する"""
+    if seed is None:
+        seed = int.from_bytes(os.urandom(8), "big")
+    state = item[STATE_KEY] = {"seed": int(seed) & _MASK, "n": 0}
+    return state
+
+
+def _state(item):
+    state = item.get(STATE_KEY)
+    if not state:
+        state = seed_match(item)
+    return state
+
+
+def next_u64(item):
+    """ストリームを 1 つ進めて 64bit の値を返す"""
+    state = _state(item)
+    n = int(state["n"]) + 1   # DynamoDB から読んだ値は Decimal
+    state["n"] = n
+    return _mix((int(state["seed"]) + n * _GOLDEN) & _MASK)
+
+
+class MatchRandom:
+    """random モジュールのうちエンジンが使う部分だけを item のストリームで提供する"""
+
+    __slots__ = ("item",)
+
+    def __init__(self, item):
+        self.item = item
+
+    def _below(self, n):
+        # 64bit 値 × n の上位ビット（偏りは n / 2**64 以下）
+        return (next_u64(self.item) * n) >> 64
+
+    def random(self):
+        return (next_u64(self.item) >> 11) * (1.0 / (1 << 53))
+
+    def randint(self, a, b):
+        if b < a:
+            raise ValueError(f"empty range for randint({a}, {b})")
+        return a + self._below(b - a + 1)
+
+    def choice(self, seq):
+        if not seq:
+            raise IndexError("Cannot choose from an empty sequence")
+        return seq[self._below(len(seq))]
+
+    def shuffle(self, seq):
+        for i in range(len(seq) - 1, 0, -1):
+            j = self._below(i + 1)
+            seq[i], seq[j] = seq[j], seq[i]
+
+
+def match_random(item):
+    return MatchRandom(item)
+
+
+def _id_tag(seed):
+    """seed の一方向ハッシュ（8 桁）。ID から seed を逆算・絞り込みできないようにする"""
+    digest = hashlib.blake2b(int(seed).to_bytes(8, "big"), digest_size=4, person=b"match-id")
+    return digest.hexdigest()
+
+
+def next_ids(item, prefix, k):
+    """
+    マッチ内で一意な ID を k 個（uuid4 / 時刻の代わり）。
+    カウンタ n を k 進めるだけで乱数は引かない。seed のハッシュから作った接頭辞を
+    付けるので別マッチの ID とも衝突しにくい（ID はクライアントに見えるため、
+    seed のビットそのものは載せない）。
+    """
+    state = _state(item)
+    n = int(state["n"])
+    state["n"] = n + k
+    tag = f"{prefix}_{_id_tag(state['seed'])}_"
+    return [f"{tag}{i}" for i in range(n + 1, n + k + 1)]
+
+
+def next_id(item, prefix):
+    return next_ids(item, prefix, 1)[0]
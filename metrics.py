@@ -0,0 +1,142 @@
+# metrics.py
+"""
+呼び出し単位のタイミング計測（span）と CloudWatch Embedded Metric Format 出力。
+
+METRICS_ENABLED=1 のときだけ計測する。無効時の span() は共有の no-op
+コンテキストを返すだけなので、計測点を残したままでもほぼコストはかからない。
+
+    start_invocation("summonCard")
+    with span("resolve"):
+        ...
+    set_metric("CardCount", len(item["cards"]))
+    flush()   # EMF 1 行を stdout へ
+
+count() はホットパス用のカウンタで、計測の有効／無効に関係なく常に数える
+（dict の加算 1 回のみ）。counters() でベンチマーク・テストから参照でき、
+flush 時には CardCount と合わせて EMF に載る。
+"""
+import json
+import os
+import time
+from contextlib import nullcontext
+
+NAMESPACE = os.environ.get("METRICS_NAMESPACE", "BattleSync")
+
+# 盤面サイズのディメンション（カード枚数の上限 → ラベル）
+_BOARD_BUCKETS = [(40, "S"), (120, "M"), (400, "L"), (1000, "XL")]
+
+_NOOP = nullcontext()
+
+_state = {
+    "enabled": False,
+    "field": None,
+    "spans": {},     # 名前 → 累積ミリ秒
+    "metrics": {},   # 名前 → (値, 単位)
+}
+
+_counts = {}         # カウンタ名 → 回数（呼び出しごとにリセット）
+
+
+def metrics_enabled():
+    return _state["enabled"]
+
+
+def start_invocation(field, *, enabled=None):
+    """呼び出し開始時に計測状態を初期化する"""
+    if enabled is None:
+        enabled = os.environ.get("METRICS_ENABLED", "").lower() in ("1", "true", "yes")
+    _state["enabled"] = enabled
+    _state["field"] = field
+    _state["spans"] = {}
+    _state["metrics"] = {}
+    _counts.clear()
+
+
+class _Span:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        ms = (time.perf_counter() - self.t0) * 1000.0
+        spans = _state["spans"]
+        spans[self.name] = spans.get(self.name, 0.0) + ms
+        return False
+
+
+def span(name):
+    """with span("resolve"): ... の形で区間時間を累積する"""
+    if not _state["enabled"]:
+        return _NOOP
+    return _Span(name)
+
+
+def set_metric(name, value, unit="Count"):
+    if _state["enabled"]:
+        _state["metrics"][name] = (value, unit)
+
+
+def count(name, n=1):
+    _counts[name] = _counts.get(name, 0) + n
+
+
+def counters():
+    return dict(_counts)
+
+
+def board_bucket(card_count):
+    for limit, label in _BOARD_BUCKETS:
+        if card_count <= limit:
+            return label
+    return "XXL"
+
+
+def build_emf():
+    """現在の計測値から EMF ドキュメント（dict）を組み立てる"""
+    root = {"fieldName": _state["field"] or "unknown"}
+    defs = []
+    for name, ms in _state["spans"].items():
+        key = f"{name}Ms"
+        root[key] = round(ms, 3)
+        defs.append({"Name": key, "Unit": "Milliseconds"})
+    for name, (value, unit) in _state["metrics"].items():
+        root[name] = value
+        defs.append({"Name": name, "Unit": unit})
+
+    for name, value in _counts.items():
+        root[name] = value
+        defs.append({"Name": name, "Unit": "Count"})
+
+    dimensions = [["fieldName"]]
+    if "CardCount" in _state["metrics"]:
+        card_count = _state["metrics"]["CardCount"][0]
+        root["boardSize"] = board_bucket(card_count)
+        dimensions.append(["fieldName", "boardSize"])
+        if card_count and "CardScans" in _counts:
+            # 1 呼び出しで盤面を何周したか（O(n²) の検出用）
+            root["ScanRatio"] = round(_counts["CardScans"] / card_count, 2)
+            defs.append({"Name": "ScanRatio", "Unit": "None"})
+
+    root["_aws"] = {
+        "Timestamp": int(time.time() * 1000),
+        "CloudWatchMetrics": [{
+            "Namespace": NAMESPACE,
+            "Dimensions": dimensions,
+            "Metrics": defs,
+        }],
+    }
+    return root
+
+
+def flush():
+    """有効時のみ EMF を 1 行出力する（Lambda では stdout が CloudWatch に送られる）"""
+    if not _state["enabled"]:
+        return None
+    doc = build_emf()
+    print(json.dumps(doc, ensure_ascii=False))
+    return doc
@@ -0,0 +1,95 @@
+# profiler.py
+"""
+1 呼び出し単位のオンデマンド cProfile。
+
+有効化条件（どちらか）:
+  - event["profile"] が真
+  - PROFILE_MATCH_IDS（カンマ区切り）に matchId が含まれる
+かつ出力先が設定されていること:
+  - PROFILE_DIR    ローカルディレクトリ
+  - PROFILE_BUCKET S3（PROFILE_PREFIX 配下）
+
+出力は pstats 互換（marshal した stats 辞書）を gzip したもの。
+    import gzip, marshal, pstats
+    st = pstats.Stats(); st.stats = marshal.loads(gzip.open(path).read()); st.sort_stats("cumtime").print_stats(30)
+または python -m profiler <path> で上位を表示できる。
+
+条件に当たらない通常の呼び出しでは判定だけで、計測は一切行わない。
+"""
+import cProfile
+import gzip
+import logging
+import marshal
+import os
+import sys
+import uuid
+from datetime import datetime, timezone
+
+from aws_clients import lazy, client
+
+logger = logging.getLogger()
+
+_s3 = lazy(client, "s3")
+
+
+def profile_requested(event, match_id):
+    if not (os.environ.get("PROFILE_DIR") or os.environ.get("PROFILE_BUCKET")):
+        return False
+    allow = {m.strip() for m in os.environ.get("PROFILE_MATCH_IDS", "").split(",") if m.strip()}
+    return bool((event or {}).get("profile") or (match_id and match_id in allow))
+
+
+def run_profiled(fn, *args, match_id=None):
+    """
+    fn(*args) を cProfile 下で実行する。
+    戻り値: (fn の戻り値, profile_id)。書き出しに失敗した場合 profile_id は None
+    """
+    pr = cProfile.Profile()
+    pr.enable()
+    try:
+        result = fn(*args)
+    finally:
+        pr.disable()
+        profile_id = _save(pr, match_id)
+    return result, profile_id
+
+
+def _save(pr, match_id):
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    profile_id = f"{match_id or 'none'}-{stamp}-{uuid.uuid4().hex[:8]}"
+    try:
+        pr.create_stats()
+        body = gzip.compress(marshal.dumps(pr.stats))
+        _write(profile_id, body)
+        return profile_id
+    except Exception as e:  # プロファイル保存の失敗で本処理を落とさない
+        logger.warning(f"profiler: failed to write profile: {e}")
+        return None
+
+
+def _write(profile_id, body):
+    name = f"{profile_id}.pstats.gz"
+    profile_dir = os.environ.get("PROFILE_DIR")
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        with open(os.path.join(profile_dir, name), "wb") as f:
+            f.write(body)
+        return
+
+    _s3.put_object(Bucket=os.environ["PROFILE_BUCKET"],
+                   Key=os.environ.get("PROFILE_PREFIX", "profiles/") + name,
+                   Body=body, ContentType="application/octet-stream")
+
+
+def load_stats(path):
+    """保存したプロファイルを pstats.Stats として読み込む"""
+    import pstats
+    st = pstats.Stats()
+    with gzip.open(path, "rb") as f:
+        st.stats = marshal.loads(f.read())
+    st.get_top_level_stats()
+    return st
+
+
+if __name__ == "__main__":
+    load_stats(sys.argv[1]).sort_stats("cumulative").print_stats(int(sys.argv[2]) if len(sys.argv) > 2 else 30)
@@ -0,0 +1,58 @@
+# tests/test_ai_dispatch.py
+import sys
+import os
+import base64
+import gzip
+import json
+from unittest.mock import patch
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.harness import backends, generate_match, load_card_masters
+
+
+def _match(n=40):
+    return generate_match(n, load_card_masters(), match_id="m1")
+
+
+def test_payload_modes_share_serialized_state():
+    from lambda_function import build_ai_payload, serialize_match_text
+    item = _match()
+    text = serialize_match_text(item)
+
+    full, mode = build_ai_payload("m1", "p2", item, text, "full")
+    body = json.loads(full)
+    assert mode == "full" and body["matchItem"] == json.loads(text)
+    assert (body["matchId"], body["playerId"], body["matchVersion"]) == ("m1", "p2", 0)
+
+    packed, mode = build_ai_payload("m1", "p2", item, text, "compressed")
+    body = json.loads(packed)
+    assert mode == "compressed" and "matchItem" not in body
+    assert gzip.decompress(base64.b64decode(body["matchStateGz"])).decode() == text
+    assert len(packed) < len(full)
+
+    slim, mode = build_ai_payload("m1", "p2", item, text, "slim")
+    assert mode == "slim" and json.loads(slim) == {"matchId": "m1", "playerId": "p2", "matchVersion": 0}
+
+
+def test_oversized_full_payload_is_downgraded():
+    from lambda_function import build_ai_payload, serialize_match_text
+    item = _match(400)
+    text = serialize_match_text(item)
+    with patch("lambda_function.AI_PAYLOAD_LIMIT", len(text) // 2):
+        _, mode = build_ai_payload("m1", "p2", item, text, "full")
+    assert mode == "compressed"
+    with patch("lambda_function.AI_PAYLOAD_LIMIT", 200):
+        payload, mode = build_ai_payload("m1", "p2", item, text, "full")
+    assert mode == "slim" and len(payload) <= 200
+
+
+def test_advance_phase_dispatches_slim_payload():
+    from lambda_function import lambda_handler
+    item = _match()
+    item["phase"] = "End"
+    item["players"][1]["name"] = "AI_bot"
+    with backends() as b, patch.dict(os.environ, {"AI_DISPATCH_MODE": "slim", "AI_LAMBDA_NAME": "ai"}):
+        b.store(item)
+        result = lambda_handler({"info": {"fieldName": "advancePhase"}, "arguments": {"matchId": "m1"}}, None)
+    assert result["match"]["turnPlayerId"] == "p2"
+    assert len(b.ai.payload_bytes) == 1 and b.ai.payload_bytes[0] < 200
@@ -0,0 +1,103 @@
+# tests/test_ai_inprocess.py
+import sys
+import os
+import json
+from unittest.mock import patch
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.harness import backends, cards_in, generate_match, load_card_masters
+
+
+def _ai_match(executor="inprocess"):
+    item = generate_match(120, load_card_masters(), match_id="m1")
+    item["phase"] = "End"
+    item["players"][1]["name"] = "AI_bot"
+    item["players"][1]["levelPoints"] = [{"color": "COLORLESS", "isUsed": False} for _ in range(3)]
+    item["aiExecutor"] = executor
+    return item
+
+
+def _call(field, **args):
+    from lambda_function import lambda_handler
+    return lambda_handler({"info": {"fieldName": field}, "arguments": {"matchId": "m1", **args}}, None)
+
+
+def _advance(b, item):
+    b.store(item)
+    writes = b.table.writes
+    result = _call("advancePhase")
+    return result, b.table.writes - writes
+
+
+def _answer_as_human(b):
+    """人間（p1）として応答待ちに答え続け、ターンが戻るまでのイベントを返す"""
+    events = []
+    for _ in range(100):
+        state = b.table.load(pk="m1", sk="STATE")
+        if state["turnPlayerId"] == "p1":
+            return events
+        req = next((r for r in state["choiceRequests"] if r["playerId"] == "p1"), None)
+        if req:
+            body = {"requestId": req["requestId"], "playerId": "p1", "selectedValue": "No"}
+            result = _call("submitChoiceResponse", json=json.dumps(body))
+        else:
+            assert state["battleStep"] == "AttackAbility"
+            result = _call("resolveBattle")
+        events += result["events"]
+    raise AssertionError("AI turn did not hand back")
+
+
+def test_greedy_plays_whole_turn_in_process():
+    item = _ai_match()
+    hand_before = len(cards_in(item, "p2", "Hand"))
+    with backends() as b, patch.dict(os.environ, {"AI_LAMBDA_NAME": "ai"}):
+        result, _ = _advance(b, item)
+        # 人間への攻撃では応答待ちで戻り、人間の応答ごとに AI の続きが進む
+        events = result["events"] + _answer_as_human(b)
+        saved = b.table.load(pk="m1", sk="STATE")
+
+    assert b.ai.payload_bytes == []
+    assert saved["turnPlayerId"] == "p1" and saved["phase"] == "Start"
+    types = [e["type"] for e in events]
+    assert "AttackDeclared" in types
+    assert types.count("TurnEnded") == 4  # 人間の End → AI の Start / Draw / Main / End
+    assert len(cards_in(saved, "p2", "Hand")) < hand_before + 1
+    assert saved["pendingBattle"] is None
+
+
+def test_failure_falls_back_to_ai_lambda():
+    item = _ai_match()
+    with backends() as b, patch.dict(os.environ, {"AI_LAMBDA_NAME": "ai"}), \
+         patch("ai_policy.GreedyPolicy.next_action", side_effect=RuntimeError("boom")):
+        result, writes = _advance(b, item)
+        saved = b.table.load(pk="m1", sk="STATE")
+
+    assert writes == 1 and len(b.ai.payload_bytes) == 1
+    assert saved["aiExecutor"] == "external"
+    assert result["match"]["turnPlayerId"] == "p2" and result["match"]["phase"] == "Start"
+    assert "AttackDeclared" not in [e["type"] for e in result["events"]]
+
+
+def test_external_is_default():
+    item = _ai_match(executor=None)
+    del item["aiExecutor"]
+    with backends() as b, patch.dict(os.environ, {"AI_LAMBDA_NAME": "ai"}):
+        _advance(b, item)
+    assert len(b.ai.payload_bytes) == 1
+
+
+def test_attack_on_human_waits_for_block_and_counter():
+    item = _ai_match()
+    counter = next(c for c in item["cards"] if c["ownerId"] == "p1" and c["zone"] == "Hand")
+    counter["zone"] = "Counter"
+    with backends() as b, patch.dict(os.environ, {"AI_LAMBDA_NAME": "ai"}):
+        _, writes = _advance(b, item)
+        saved = b.table.load(pk="m1", sk="STATE")
+
+    # 人間の防御側がブロック / カウンターを選べる状態で保存して返る
+    assert writes == 1 and b.ai.payload_bytes == []
+    assert saved["turnPlayerId"] == "p2" and saved["phase"] == "Main"
+    assert saved["pendingBattle"]["targetOwnerId"] == "p1"
+    assert saved["battleStep"] == "AttackAbility"
+    req = next(r for r in saved["choiceRequests"] if r["playerId"] == "p1")
+    assert req["options"] == ["Yes", "No"]
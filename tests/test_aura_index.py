@@ -0,0 +1,101 @@
+# tests/test_aura_index.py
+import sys
+import os
+from unittest.mock import patch
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import aura_index
+from helper import add_status, add_temp_status
+from metrics import counters, start_invocation
+
+
+def _match(n=10):
+    cards = [{"id": f"c{i}", "ownerId": "p1", "zone": "Field", "statuses": [], "tempStatuses": []}
+             for i in range(n)]
+    cards[3]["tempStatuses"].append({"key": "TempPowerBoost", "value": "100", "expireTurn": -1, "sourceId": "L1"})
+    return {"players": [{"id": "p1", "leaderId": "L1"}], "cards": cards}
+
+
+def test_index_built_once_then_maintained_by_helpers():
+    item = _match()
+    cards = item["cards"]
+    start_invocation("test", enabled=False)
+    assert aura_index.targets(cards, "L1") == [cards[3]]
+
+    add_temp_status(cards[5], "TempDamageBoost", 1, -1, source_id="L1")
+    add_status(cards[7], "TempPowerBoost", 200, source_id="L1")
+    add_status(cards[8], "HasAttacked", True)  # source 無しは索引しない
+    cards.append({"id": "t", "ownerId": "p1", "zone": "Field", "statuses": [],
+                  "tempStatuses": [{"key": "TempGail", "value": "1", "expireTurn": -1, "sourceId": "L1"}]})
+
+    assert {c["id"] for c in aura_index.targets(cards, "L1")} == {"c3", "c5", "c7", "t"}
+    assert [c["id"] for c in aura_index.targets(cards, "L1", "TempPowerBoost")] == ["c3", "c7"]
+    assert cards[7]["statuses"][0]["sourceId"] == "L1"
+    # 初回の 1 回 + 追加されたカードの分だけ
+    assert counters()["CardScans"] == len(cards)
+
+
+def test_detach_touches_only_affected_cards():
+    from lambda_function import detach_auras_from
+    item = _match()
+    cards = item["cards"]
+    aura_index.targets(cards, "L1")
+    untouched = [c["tempStatuses"] for c in cards]
+
+    start_invocation("test", enabled=False)
+    assert detach_auras_from({"L1"}, cards) == 1
+    assert cards[3]["tempStatuses"] == []
+    assert all(c["tempStatuses"] is t for i, (c, t) in enumerate(zip(cards, untouched)) if i != 3)
+    assert aura_index.targets(cards, "L1") == []
+    assert counters().get("CardScans", 0) == 0
+
+
+def test_clear_passive_skips_unaffected_and_clears_permanent():
+    import lambda_function
+    item = _match()
+    cards = item["cards"]
+    player = item["players"][0]
+    add_status(cards[1], "TempPowerBoost", 300, source_id="L1")
+    eff = {"actions": [{"type": "BattleBuff", "target": "PlayerField", "keyword": "Power", "duration": -1}]}
+
+    events = []
+    lambda_function.clear_passive_from_targets(eff, player, item, events)
+    assert [e["type"] for e in events] == ["StatusRemoved", "BattleBuffRemoved"]
+    assert cards[1]["statuses"] == [] and cards[3]["tempStatuses"] == []
+
+    # もう何も付いていなければ対象の解決もしない
+    with patch("lambda_function.resolve_targets") as resolve:
+        lambda_function.clear_passive_from_targets(eff, player, item, events)
+    resolve.assert_not_called()
+
+
+def test_clear_passive_restores_overwritten_status():
+    import lambda_function
+    item = _match()
+    cards = item["cards"]
+    player = item["players"][0]
+    add_status(cards[1], "TempPowerBoost", 100)                  # 元から付いている
+    add_status(cards[2], "TempPowerBoost", 200, source_id="X")   # 別の付け手
+    add_status(cards[1], "TempPowerBoost", 300, source_id="L1")
+    add_status(cards[2], "TempPowerBoost", 300, source_id="L1")
+    assert cards[1]["statuses"][0]["value"] == 300
+    eff = {"actions": [{"type": "BattleBuff", "target": "PlayerField", "keyword": "Power", "duration": -1}]}
+
+    lambda_function.clear_passive_from_targets(eff, player, item, [])
+    assert cards[1]["statuses"] == [{"key": "TempPowerBoost", "value": 100}]
+    assert cards[2]["statuses"] == [{"key": "TempPowerBoost", "value": 200, "sourceId": "X"}]
+    # 戻った付け手はそのまま外せる
+    assert aura_index.targets(cards, "X") == [cards[2]]
+    assert aura_index.targets(cards, "L1", "TempPowerBoost") == []
+
+
+def test_remove_hidden_source_keeps_visible_value():
+    from helper import remove_sourced_status, get_status
+    card = {"id": "c", "statuses": [], "tempStatuses": []}
+    add_status(card, "TempPowerBoost", 200, source_id="X")
+    add_status(card, "TempPowerBoost", 300, source_id="L1")
+    # 隠れている X を先に外しても見える値は変わらず、L1 を外すとエントリごと消える
+    assert remove_sourced_status(card, "TempPowerBoost", "X") is False
+    assert get_status(card, "TempPowerBoost") == 300
+    assert remove_sourced_status(card, "TempPowerBoost", "L1") is True
+    assert card["statuses"] == []
@@ -0,0 +1,22 @@
+# tests/test_bench_actions.py
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.bench_actions import loglog_slope, run
+
+
+def test_loglog_slope():
+    assert abs(loglog_slope([(10, 5.0), (100, 50.0), (1000, 500.0)]) - 1.0) < 1e-9
+    assert abs(loglog_slope([(10, 1.0), (100, 100.0)]) - 2.0) < 1e-9
+    assert loglog_slope([(10, 1.0)]) is None
+
+
+def test_run_enumerates_registry():
+    from action_registry import _registry
+    report = run(sizes=[40, 120], cardinalities=[1], reps=1, names=["Draw", "Destroy", "Bounce"])
+    assert set(report["results"]) == {"Draw", "Destroy", "Bounce"}
+    for e in report["results"].values():
+        assert e["error"] is None
+        assert set(e["timings"]["1"]) == {"40", "120"}
+    assert set(_registry) >= {"Draw", "Destroy", "Bounce", "BattleBuff", "ProcessDamage"}
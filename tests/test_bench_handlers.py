@@ -0,0 +1,43 @@
+# tests/test_bench_handlers.py
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.harness import generate_match, load_card_masters, cards_in
+from benchmarks.bench_handlers import FIELDS, run, diff
+
+
+def test_generate_match_sizes():
+    masters = load_card_masters()
+    item = generate_match(120, masters, seed=1)
+    assert len(item["cards"]) == 120
+    assert len({c["id"] for c in item["cards"]}) == 120
+    for pid in ("p1", "p2"):
+        assert len(cards_in(item, pid, "Field")) >= 3
+        assert len(cards_in(item, pid, "Hand")) >= 5
+
+
+def test_run_all_fields_small_board():
+    """全フィールドがエラーなく 1 周できること"""
+    report = run([40], FIELDS, iterations=2, alloc_iterations=1)
+    res = report["results"]["40"]
+    assert set(res) == set(FIELDS)
+    for r in res.values():
+        assert r["errors"] == 0
+        assert r["p50Ms"] > 0 and r["peakAllocKiB"] > 0
+
+
+def test_diff_flags_regression():
+    base = {"results": {"40": {"moveCards": {"p50Ms": 1.0, "p95Ms": 2.0, "p99Ms": 3.0, "peakAllocKiB": 100.0}}}}
+    cur = {"results": {"40": {"moveCards": {"p50Ms": 1.5, "p95Ms": 2.0, "p99Ms": 9.0, "peakAllocKiB": 100.0}}}}
+    flagged = {(m) for _, _, m, _, _, _, reg in diff(cur, base) if reg}
+    assert flagged == {"p50Ms"}
+
+
+def test_scan_budgets_small_board():
+    """metrics のカウンタから盤面走査回数を取り、予算内であること"""
+    from benchmarks.bench_handlers import over_budget
+    report = run([120], FIELDS, iterations=3, alloc_iterations=0)
+    for r in report["results"]["120"].values():
+        assert r["cardScans"] > 0
+    assert over_budget(report) == []
@@ -0,0 +1,75 @@
+# tests/test_card_view.py
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from card_view import card_view, reset_card_views, statuses_changed
+from helper import add_status, add_temp_status, get_status, has_status
+
+
+def _card():
+    return {"id": "c1", "ownerId": "p1", "zone": "Field", "power": 1000, "damage": 1,
+            "statuses": [], "tempStatuses": []}
+
+
+def test_status_lookup_and_update():
+    """add_status で追加・更新した値がビューから引けること"""
+    reset_card_views()
+    card = _card()
+    add_status(card, "CounterCount", 1)
+    add_status(card, "CounterCount", 3)
+
+    assert get_status(card, "CounterCount") == 3
+    assert has_status(card, "CounterCount")
+    assert not has_status(card, "IsChainPainReflect")
+    # 永続化される形はリストのまま
+    assert card["statuses"] == [{"key": "CounterCount", "value": 3}]
+
+
+def test_effective_power_cache_invalidation():
+    """tempStatuses の追加でキャッシュ済みの実効パワーが更新されること"""
+    reset_card_views()
+    card = _card()
+    assert card_view(card).power == 1000
+
+    add_temp_status(card, "TempPowerBoost", 500, -1, source_id="leader1")
+    assert card_view(card).power == 1500
+
+    add_temp_status(card, "TempDamageBoost", 2, -1)
+    assert card_view(card).damage == 3
+    assert card_view(card).power == 1500
+
+
+def test_external_list_changes_are_detected():
+    """helper を通らないリストの差し替えや append も検出して索引し直すこと"""
+    reset_card_views()
+    card = _card()
+    add_temp_status(card, "TempPowerBoost", 500, 1)
+    assert card_view(card).power == 1500
+
+    # clear_expired 等と同じくリストを作り直す
+    card["tempStatuses"] = []
+    assert card_view(card).power == 1000
+
+    # 直接 append する
+    card["tempStatuses"].append({"key": "TempPowerBoost", "value": "200", "expireTurn": 1})
+    assert card_view(card).power == 1200
+
+    # call_method の SetPower など基礎値の変更
+    card["power"] = 3000
+    assert card_view(card).power == 3200
+
+
+def test_in_place_writes_need_statuses_changed():
+    """同じ長さでの置き換えや値の直接書き換えは statuses_changed で知らせること"""
+    reset_card_views()
+    card = _card()
+    add_temp_status(card, "TempPowerBoost", 500, 1)
+    add_status(card, "CostModifier", 1)
+    assert card_view(card).power == 1500 and card_view(card).cost == 1
+
+    card["tempStatuses"][0] = {"key": "TempPowerBoost", "value": "100", "expireTurn": 1}
+    card["statuses"][0]["value"] = 2
+    statuses_changed(card)
+    assert card_view(card).power == 1100
+    assert card_view(card).cost == 2
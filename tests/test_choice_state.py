@@ -0,0 +1,93 @@
+# tests/test_choice_state.py
+import sys
+import os
+import json
+from unittest.mock import patch
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from choice_state import KeyedEntries, keyed, to_persisted
+from helper import DecimalEncoder
+
+
+def test_keyed_entries_list_compat():
+    """len / 添字 / 反復が list と同じように使え、キー操作ができること"""
+    item = {"pendingDeferred": [
+        {"type": "Destroy", "selectionKey": "a"},
+        {"type": "Bounce", "selectionKey": "b"},
+        {"type": "Exile", "selectionKey": "a"},
+    ]}
+    pending = keyed(item, "pendingDeferred")
+
+    assert item["pendingDeferred"] is pending
+    assert len(pending) == 3
+    assert pending.has("a") and not pending.has("c")
+    # キーが入り混じっていても追加順のまま
+    assert [p["type"] for p in pending] == ["Destroy", "Bounce", "Exile"]
+    assert [pending[i]["type"] for i in range(len(pending))] == ["Destroy", "Bounce", "Exile"]
+
+    popped = pending.pop("a")
+    assert [p["type"] for p in popped] == ["Destroy", "Exile"]
+    assert len(pending) == 1
+    assert pending[0]["selectionKey"] == "b" and pending[-1]["selectionKey"] == "b"
+    pending.append({"type": "Draw", "selectionKey": "a"})
+    assert [p["type"] for p in pending] == ["Bounce", "Draw"]
+    assert pending.first("a")["type"] == "Draw"
+
+
+def test_keyed_without_create_does_not_touch_item():
+    item = {}
+    assert keyed(item, "choiceResponses", create=False).first("x") is None
+    assert "choiceResponses" not in item
+
+
+def test_serialization_boundary():
+    """永続化・レスポンスではリスト形に戻ること"""
+    item = {"id": "m1", "choiceRequests": [{"requestId": "r1", "options": []}]}
+    keyed(item, "choiceRequests")
+
+    persisted = to_persisted(item)
+    assert isinstance(persisted["choiceRequests"], list)
+    assert isinstance(item["choiceRequests"], KeyedEntries)
+    assert json.loads(json.dumps(item, cls=DecimalEncoder))["choiceRequests"] == [
+        {"requestId": "r1", "options": []}
+    ]
+
+
+def test_submit_choice_response_keyed_cleanup():
+    """submitChoiceResponse が該当キーだけを実行・削除し、リストで保存すること"""
+    from lambda_function import lambda_handler
+
+    item = {
+        "id": "m1",
+        "matchVersion": 0,
+        "players": [{"id": "p1", "name": "P1"}, {"id": "p2", "name": "P2"}],
+        "cards": [
+            {"id": "src", "ownerId": "p1", "zone": "Field"},
+            {"id": "t1", "ownerId": "p2", "zone": "Field"},
+            {"id": "t2", "ownerId": "p2", "zone": "Field"},
+        ],
+        "choiceRequests": [
+            {"requestId": "k1", "playerId": "p1", "promptText": "", "options": ["t1", "t2"]},
+            {"requestId": "k2", "playerId": "p1", "promptText": "", "options": ["t2"]},
+        ],
+        "choiceResponses": [],
+        "pendingDeferred": [
+            {"type": "Destroy", "selectionKey": "k1", "sourceCardId": "src"},
+            {"type": "Destroy", "selectionKey": "k2", "sourceCardId": "src"},
+        ],
+    }
+    event = {
+        "info": {"fieldName": "submitChoiceResponse"},
+        "arguments": {"matchId": "m1", "json": json.dumps(
+            {"requestId": "k1", "playerId": "p1", "selectedIds": ["t1"]})},
+    }
+    with patch("lambda_function.table") as mock_table:
+        mock_table.get_item.return_value = {"Item": item}
+        result = lambda_handler(event, None)
+        saved = mock_table.put_item.call_args.kwargs["Item"]
+
+    assert [e["payload"]["cardId"] for e in result["events"] if e["type"] == "Destroy"] == ["t1"]
+    assert [r["requestId"] for r in result["match"]["choiceRequests"]] == ["k2"]
+    assert result["match"]["choiceResponses"] == []
+    assert isinstance(saved["pendingDeferred"], list)
+    assert [p["selectionKey"] for p in saved["pendingDeferred"]] == ["k2"]
@@ -1,6 +1,6 @@
 # tests/test_create_token_random.py
 import pytest
-from unittest.mock import patch
+from unittest.mock import ANY, patch
 import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -22,9 +22,9 @@ def test_create_token_with_weighted_selection():
     item = {"cards": []}
     owner_id = "player1"
     
-    # Mock weighted_random_select to return predictable results
-    with patch('actions.create_token.weighted_random_select') as mock_select:
-        mock_select.side_effect = ["token_B", "token_C"]
+    # Mock weighted_random_sample to return predictable results
+    with patch('actions.create_token.weighted_random_sample') as mock_select:
+        mock_select.return_value = ["token_B", "token_C"]
         
         events = handle_create_token(card, act, item, owner_id)
         
@@ -41,9 +41,11 @@ def test_create_token_with_weighted_selection():
         assert item["cards"][0]["baseCardId"] == "token_B"
         assert item["cards"][1]["baseCardId"] == "token_C"
         
-        # weighted_random_select が正しく呼び出されることを確認
-        assert mock_select.call_count == 2
-        mock_select.assert_any_call(["token_A", "token_B", "token_C"], [10, 30, 60])
+        # weighted_random_sample が生成数分まとめて 1 回呼び出されることを確認
+        assert mock_select.call_count == 1
+        mock_select.assert_called_with(["token_A", "token_B", "token_C"], [10, 30, 60], 2, ANY)
+        # 乱数源はマッチのストリーム
+        assert mock_select.call_args.args[3].item is item
 
 def test_create_token_without_weights():
     """重み指定なしの複数候補からのトークン生成のテスト"""
@@ -59,8 +61,8 @@ def test_create_token_without_weights():
     item = {"cards": []}
     owner_id = "player1"
     
-    with patch('actions.create_token.weighted_random_select') as mock_select:
-        mock_select.return_value = "token_X"
+    with patch('actions.create_token.weighted_random_sample') as mock_select:
+        mock_select.return_value = ["token_X"]
         
         events = handle_create_token(card, act, item, owner_id)
         
@@ -68,7 +70,8 @@ def test_create_token_without_weights():
         assert events[0]["payload"]["baseCardId"] == "token_X"
         
         # 均等重み（[1, 1]）で呼び出されることを確認
-        mock_select.assert_called_with(["token_X", "token_Y"], [1, 1])
+        mock_select.assert_called_with(["token_X", "token_Y"], [1, 1], 1, ANY)
+        assert mock_select.call_args.args[3].item is item
 
 def test_create_token_traditional_single():
     """従来の単一トークン生成のテスト"""
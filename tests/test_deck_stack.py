@@ -0,0 +1,92 @@
+# tests/test_deck_stack.py
+import sys
+import os
+from unittest.mock import patch
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import deck_stack
+from match_rng import seed_match
+
+
+def _match(n=6):
+    cards = [{"id": f"h{i}", "ownerId": "p1", "zone": "Hand"} for i in range(2)]
+    cards += [{"id": f"d{i}", "ownerId": "p1", "zone": "Deck"} for i in range(n)]
+    cards += [{"id": f"e{i}", "ownerId": "p2", "zone": "Deck"} for i in range(n)]
+    return {"players": [{"id": "p1"}, {"id": "p2"}], "cards": cards}
+
+
+def _zone(item, cid):
+    return next(c["zone"] for c in item["cards"] if c["id"] == cid)
+
+
+def test_stack_built_from_list_order_and_persisted():
+    item = _match()
+    # 従来どおり item["cards"] で先に出てくるカードが山札の上
+    assert [c["id"] for c in deck_stack.peek(item, "p1", 3)] == ["d0", "d1", "d2"]
+    assert item["decks"]["p1"] == ["d5", "d4", "d3", "d2", "d1", "d0"]
+    assert "p2" not in item["decks"]
+
+
+def test_draw_and_pop_take_from_top():
+    item = _match()
+    drawn = deck_stack.draw(item, "p1", 2)
+    assert [c["id"] for c in drawn] == ["d0", "d1"]
+    assert _zone(item, "d0") == "Hand"
+    assert item["decks"]["p1"][-1] == "d2"
+
+    # 足りなければあるだけ
+    rest = deck_stack.pop(item, "p1", 10)
+    assert [c["id"] for c in rest] == ["d2", "d3", "d4", "d5"]
+    for c in rest:
+        c["zone"] = "DamageZone"  # pop は zone を変えない（移動は呼び出し側）
+    assert deck_stack.draw(item, "p1", 1) == []
+
+
+def test_cards_moved_elsewhere_are_skipped():
+    item = _match()
+    deck_stack.deck_ids(item, "p1")
+    # スタックを通さずに山札から離れたカード
+    next(c for c in item["cards"] if c["id"] == "d0")["zone"] = "Graveyard"
+    assert [c["id"] for c in deck_stack.peek(item, "p1", 2)] == ["d1", "d2"]
+    assert "d0" not in item["decks"]["p1"]
+
+
+def test_untracked_deck_cards_are_adopted_at_bottom():
+    item = _match(2)
+    deck_stack.draw(item, "p1", 2)
+    # スタックを通さずに Deck に置かれたカード
+    item["cards"].append({"id": "x", "ownerId": "p1", "zone": "Deck"})
+    assert [c["id"] for c in deck_stack.draw(item, "p1", 1)] == ["x"]
+
+
+def test_insert_positions_and_shuffle():
+    item = _match(3)
+    hand = [c for c in item["cards"] if c["zone"] == "Hand"]
+    deck_stack.insert(item, hand[0], "Top")
+    deck_stack.insert(item, hand[1], 1)
+    assert [c["id"] for c in deck_stack.peek(item, "p1", 5)] == ["h0", "h1", "d0", "d1", "d2"]
+    deck_stack.insert(item, hand[0])  # 既に山札にあるカードは置き直す
+    assert item["decks"]["p1"][0] == "h0" and item["decks"]["p1"].count("h0") == 1
+
+    seed_match(item, 4)
+    before = sorted(item["decks"]["p1"])
+    deck_stack.shuffle(item, "p1")
+    assert sorted(item["decks"]["p1"]) == before
+
+
+def test_actions_use_deck_stack():
+    from actions.draw import handle_draw
+    from actions.process_damage import process_damage_for_player
+    from helper import resolve_targets
+
+    item = _match()
+    events = handle_draw({"id": "src"}, {"value": 2}, item, "p1")
+    assert events[0]["payload"]["count"] == 2 and _zone(item, "d1") == "Hand"
+
+    top = resolve_targets({"id": "src", "ownerId": "p1"}, {"type": "MoveDeck", "target": "PlayerDeckTop", "value": 2}, item)
+    assert [c["id"] for c in top] == ["d2", "d3"]
+
+    masters = {f"e{i}": {"availableColors": ["Red"]} for i in range(6)}
+    with patch('actions.process_damage.fetch_card_masters', return_value=masters):
+        process_damage_for_player("p2", 2, {}, item, "p1")
+    assert [_zone(item, f"e{i}") for i in range(3)] == ["DamageZone", "DamageZone", "Deck"]
@@ -0,0 +1,109 @@
+# tests/test_deferred_continuation.py
+import sys
+import os
+import json
+from unittest.mock import patch
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from lambda_function import handle_trigger, lambda_handler
+
+
+def _item(optional=False):
+    return {
+        "id": "m1",
+        "matchVersion": 0,
+        "players": [{"id": "p1", "name": "P1"}, {"id": "p2", "name": "P2"}],
+        "cards": [
+            {"id": "src", "baseCardId": "base_src", "ownerId": "p1", "zone": "Field",
+             "effectList": [
+                 {"trigger": "OnPlay", "actions": []},
+                 {"trigger": "OnSummon", "optional": optional, "name": "破壊",
+                  "actions": [
+                      {"type": "Select", "target": "EnemyField", "selectionKey": "k"},
+                      {"type": "Destroy", "selectionKey": "k", "deferred": True},
+                  ]},
+             ]},
+            {"id": "t1", "ownerId": "p2", "zone": "Field"},
+        ],
+        "choiceRequests": [],
+        "choiceResponses": [],
+        "pendingDeferred": [],
+    }
+
+
+def _submit(item, body):
+    event = {"info": {"fieldName": "submitChoiceResponse"},
+             "arguments": {"matchId": "m1", "json": json.dumps(body)}}
+    with patch("lambda_function.table") as mock_table:
+        mock_table.get_item.return_value = {"Item": item}
+        return lambda_handler(event, None)
+
+
+def test_select_stores_continuation_not_action_copy():
+    """Select の後続 deferred アクションは effectList 内の位置として保存されること"""
+    item = _item()
+    handle_trigger(item["cards"][0], "OnSummon", item)
+
+    assert len(item["pendingDeferred"]) == 1
+    cont = item["pendingDeferred"][0]
+    assert cont == {
+        "type": "Destroy",
+        "sourceCardId": "src",
+        "baseCardId": "base_src",
+        "trigger": "OnSummon",
+        "effectIndex": 1,
+        "actionIndex": 1,
+        "selectionKey": "k",
+        "selectionType": "card",
+    }
+
+    result = _submit(item, {"requestId": "k", "playerId": "p1", "selectedIds": ["t1"]})
+    destroyed = [e["payload"]["cardId"] for e in result["events"] if e["type"] == "Destroy"]
+    assert destroyed == ["t1"]
+    assert result["match"]["pendingDeferred"] == []
+
+
+def test_optional_ability_resumes_from_cursor():
+    """オプション能力の Yes 応答で効果が再開され、Select の継続が登録されること"""
+    item = _item(optional=True)
+    handle_trigger(item["cards"][0], "OnSummon", item)
+    req_id = item["choiceRequests"][0]["requestId"]
+
+    result = _submit(item, {"requestId": req_id, "playerId": "p1", "selectedValue": "Yes"})
+    match = result["match"]
+    assert [r["requestId"] for r in match["choiceRequests"]] == ["k"]
+    assert match["choiceRequests"][0]["options"] == ["t1"]
+    assert [(p["type"], p["actionIndex"]) for p in match["pendingDeferred"]] == [("Destroy", 1)]
+
+
+def test_legacy_pending_action_copy_still_runs():
+    """旧形式（アクションのコピー）の pendingDeferred も実行できること"""
+    item = _item()
+    item["pendingDeferred"] = [{"type": "Destroy", "selectionKey": "k", "sourceCardId": "src"}]
+
+    result = _submit(item, {"requestId": "k", "playerId": "p1", "selectedIds": ["t1"]})
+    assert [e["payload"]["cardId"] for e in result["events"] if e["type"] == "Destroy"] == ["t1"]
+
+
+def test_continuation_skipped_when_effect_changed():
+    """保留中に effectList が変わり、継続レコードの位置が別のアクションを指していたら実行しないこと"""
+    item = _item()
+    handle_trigger(item["cards"][0], "OnSummon", item)
+    # Transform 等で同じ位置に別のアクションが入った
+    item["cards"][0]["effectList"][1]["actions"][1] = {"type": "Draw", "value": 1, "deferred": True}
+
+    result = _submit(item, {"requestId": "k", "playerId": "p1", "selectedIds": ["t1"]})
+    assert not [e for e in result["events"] if e["type"] in ("Destroy", "Draw")]
+    assert result["match"]["pendingDeferred"] == []
+
+
+def test_optional_continuation_skipped_when_trigger_changed():
+    """オプション能力の継続が指す効果のトリガーが変わっていたら再開しないこと"""
+    item = _item(optional=True)
+    handle_trigger(item["cards"][0], "OnSummon", item)
+    req_id = item["choiceRequests"][0]["requestId"]
+    item["cards"][0]["effectList"][1]["trigger"] = "OnAttack"
+
+    result = _submit(item, {"requestId": req_id, "playerId": "p1", "selectedValue": "Yes"})
+    assert result["match"]["choiceRequests"] == []
+    assert result["match"]["pendingDeferred"] == []
@@ -0,0 +1,46 @@
+# tests/test_hot_counters.py
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from metrics import counters, start_invocation, build_emf, set_metric
+
+
+def test_counters_track_hot_paths():
+    from lambda_function import apply_action, find_card, evaluate_condition
+    item = {
+        "players": [{"id": "p1"}, {"id": "p2"}],
+        "cards": [
+            {"id": "a", "ownerId": "p1", "zone": "Field", "statuses": [], "tempStatuses": []},
+            {"id": "b", "ownerId": "p2", "zone": "Field", "statuses": [], "tempStatuses": []},
+            {"id": "c", "ownerId": "p2", "zone": "Field", "statuses": [], "tempStatuses": []},
+        ],
+    }
+    start_invocation("test", enabled=False)
+    find_card(item, "b")
+    evaluate_condition("", item["cards"][0], item)
+    apply_action(item["cards"][0], {"type": "BattleBuff", "target": "EnemyField",
+                                  "keyword": "Power", "value": 1, "duration": 1}, item, "p1")
+
+    c = counters()
+    assert c["FindCardCalls"] == 1
+    assert c["EvaluateConditionCalls"] == 1
+    assert c["ApplyActionCalls"] == 1
+    assert c["ResolveTargetsCalls"] == 1
+    assert c["GetTargetCardsCalls"] == 1
+    assert c["HandlerCalls"] == 2
+    assert c["CardScans"] >= 6
+
+    # 次の呼び出しでリセットされる
+    start_invocation("test", enabled=False)
+    assert counters() == {}
+
+
+def test_counters_in_emf_with_scan_ratio():
+    from metrics import count
+    start_invocation("moveCards", enabled=True)
+    count("CardScans", 400)
+    set_metric("CardCount", 40)
+    doc = build_emf()
+    assert doc["CardScans"] == 400
+    assert doc["ScanRatio"] == 10.0
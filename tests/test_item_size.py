@@ -0,0 +1,138 @@
+# tests/test_item_size.py
+import sys
+import os
+from decimal import Decimal
+from unittest.mock import patch
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from item_size import card_size, estimate_size, field_sizes, prepare_for_write, OVERFLOW_KEYS
+
+
+def test_estimate_size_rules():
+    assert estimate_size("abc") == 3
+    assert estimate_size("あ") == 3              # UTF-8 バイト数
+    assert estimate_size(True) == 1
+    assert estimate_size(Decimal("12345")) == 4  # (5 + 1) // 2 + 1
+    assert estimate_size({"a": "xy"}) == 3 + 1 + 1 + 2
+    assert estimate_size(["xy", "z"]) == 3 + (1 + 2) + (1 + 1)
+    assert field_sizes({"id": "m1"}) == {"id": 4}
+
+
+def _big_item():
+    cards = []
+    for i in range(60):
+        zone = "Graveyard" if i % 3 == 0 else "Field"
+        cards.append({
+            "id": f"c{i}", "ownerId": "p1", "zone": zone, "statuses": [],
+            "tempStatuses": [
+                {"key": "TempPowerBoost", "value": Decimal(1), "expireTurn": Decimal(1), "sourceId": "x" * 50},
+                {"key": "TempPowerBoost", "value": Decimal(1), "expireTurn": Decimal(-1), "sourceId": "y"},
+            ],
+        })
+    return {
+        "pk": "m1", "sk": "STATE", "id": "m1", "turnCount": Decimal(3), "cards": cards,
+        "choiceRequests": [{"requestId": "live"}],
+        "pendingDeferred": [],
+        "choiceResponses": [{"requestId": "live"}, {"requestId": "old", "selectedIds": ["a"] * 20}],
+    }
+
+
+def test_prepare_under_limit_is_noop():
+    item = _big_item()
+    persisted, chunks, report = prepare_for_write(dict(item), soft_limit=10 ** 9)
+    assert chunks == [] and report["before"] == report["after"]
+    assert persisted["cards"] is item["cards"]
+
+
+def test_prepare_compacts_and_offloads_without_touching_item():
+    item = _big_item()
+    persisted, chunks, report = prepare_for_write(dict(item), soft_limit=1000)
+
+    assert report["expiredStatuses"] == 60
+    assert report["resolvedChoices"] == 1
+    assert report["offloadedCards"] == 20
+    assert report["after"] < report["before"]
+    assert all(c["zone"] != "Graveyard" for c in persisted["cards"])
+    assert sum(len(ch) for ch in chunks) == 20
+    assert [r["requestId"] for r in persisted["choiceResponses"]] == ["live"]
+    # 処理中の item はそのまま
+    assert len(item["cards"]) == 60
+    assert len(item["cards"][1]["tempStatuses"]) == 2
+
+
+def test_save_and_load_round_trip_with_overflow():
+    from benchmarks.harness import backends
+    import lambda_function
+
+    item = _big_item()
+    with backends() as b, patch("item_size.SOFT_LIMIT", 1000), patch("item_size.OVERFLOW_CHUNK", 2000):
+        lambda_function.save_match(item)
+        main = b.table.load(pk="m1", sk="STATE")
+        assert len(main["cards"]) == 40
+        assert len(main[OVERFLOW_KEYS]) > 1
+
+        loaded = lambda_function.load_match("m1")
+        assert sorted(c["id"] for c in loaded["cards"]) == sorted(c["id"] for c in item["cards"])
+
+        # 縮小が不要になったら古いオーバーフローを消す
+        loaded["cards"] = [c for c in loaded["cards"] if c["zone"] != "Graveyard"]
+        with patch("item_size.SOFT_LIMIT", 10 ** 9):
+            lambda_function.save_match(loaded)
+        assert OVERFLOW_KEYS not in b.table.load(pk="m1", sk="STATE")
+        assert all(b.table.load(pk="m1", sk=sk) is None for sk in main[OVERFLOW_KEYS])
+
+
+def test_failed_state_write_keeps_previous_overflow():
+    from benchmarks.harness import backends
+    import lambda_function
+
+    item = _big_item()
+    with backends() as b, patch("item_size.SOFT_LIMIT", 1000), patch("item_size.OVERFLOW_CHUNK", 2000):
+        lambda_function.save_match(item)
+        old_keys = b.table.load(pk="m1", sk="STATE")[OVERFLOW_KEYS]
+
+        loaded = lambda_function.load_match("m1")
+        put = b.table.put_item
+
+        def fail_state(Item):
+            if Item["sk"] == "STATE":
+                raise RuntimeError("throttled")
+            return put(Item)
+
+        with patch.object(b.table, "put_item", side_effect=fail_state):
+            try:
+                lambda_function.save_match(loaded)
+            except RuntimeError:
+                pass
+        # STATE は前の版のチャンクを指したまま、そのチャンクも残っている
+        assert b.table.load(pk="m1", sk="STATE")[OVERFLOW_KEYS] == old_keys
+        again = lambda_function.load_match("m1")
+        assert sorted(c["id"] for c in again["cards"]) == sorted(c["id"] for c in item["cards"])
+
+        # 次の保存が成功すれば新しい版に切り替わり、古い版は消える
+        lambda_function.save_match(again)
+        new_keys = b.table.load(pk="m1", sk="STATE")[OVERFLOW_KEYS]
+        assert set(new_keys).isdisjoint(old_keys)
+        assert all(b.table.load(pk="m1", sk=sk) is None for sk in old_keys)
+
+
+def test_compact_keeps_statuses_expiring_this_turn():
+    item = _big_item()
+    buff = {"key": "TempPowerBoost", "value": Decimal(1), "expireTurn": Decimal(3), "sourceId": "b"}
+    item["cards"][1]["tempStatuses"].append(buff)  # turnCount == 3 に付けた 1 ターンの BattleBuff
+    persisted, _, report = prepare_for_write(dict(item), soft_limit=1000)
+    assert report["expiredStatuses"] == 60
+    kept = next(c for c in persisted["cards"] if c["id"] == "c1")["tempStatuses"]
+    assert buff in kept
+
+
+def test_card_size_recounts_changed_effect_list():
+    small = {"id": "a", "baseCardId": "B1", "effectList": [{"trigger": "OnPlay", "actions": []}]}
+    big = {"id": "b", "baseCardId": "B1",
+           "effectList": [{"trigger": "OnPlay", "actions": [{"type": "Draw", "value": "x" * 500}]}]}
+    assert card_size(small) == 1 + estimate_size(small)
+    # 同じ baseCardId・同じ効果数でも内容が違えば数え直す
+    assert card_size(big) == 1 + estimate_size(big)
+    big["effectList"][0]["actions"][0]["value"] = "y" * 800  # その場で書き換えても同じ
+    assert card_size(big) == 1 + estimate_size(big)
+    assert card_size(small) == 1 + estimate_size(small)
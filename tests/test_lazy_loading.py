@@ -0,0 +1,81 @@
+# tests/test_lazy_loading.py
+import sys
+import os
+import subprocess
+from unittest.mock import patch
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import action_registry
+from aws_clients import lazy
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+
+def test_import_does_not_load_boto3_or_actions():
+    code = ("import sys, lambda_function; "
+            "print(int('boto3' in sys.modules), sum(m.startswith('actions.') for m in sys.modules))")
+    env = {**os.environ, "MATCH_TABLE": "m", "LEADER_MASTER_TABLE": "l",
+           "CARD_MASTER_TABLE": "c", "AWS_DEFAULT_REGION": "us-east-1"}
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout.split()
+    assert out == ["0", "0"]
+
+
+def test_manifest_entries_resolve_to_handlers():
+    registry = action_registry.load_all()
+    for name in action_registry.MANIFEST:
+        assert callable(registry[name]), name
+    assert action_registry.get("NoSuchAction") is None
+
+
+def test_zone_movers_inject_destination():
+    import actions.move_zone as mz
+    seen = {}
+    orig = mz.handle_move_zone
+    try:
+        action_registry._registry.pop("Discard", None)
+        mz.handle_move_zone = lambda c, a, i, o: seen.update(act=a) or []
+        action_registry.get("Discard")({"id": "c1"}, {"type": "Discard"}, {}, "p1")
+    finally:
+        mz.handle_move_zone = orig
+        action_registry._registry.pop("Discard", None)
+    assert seen["act"]["toZone"] == "Graveyard"
+
+
+def test_lazy_proxy_builds_once():
+    calls = []
+
+    class Target:
+        value = 42
+
+    proxy = lazy(lambda: calls.append(1) or Target())
+    assert calls == []
+    assert proxy.value == 42 and proxy.value == 42
+    assert calls == [1]
+
+
+def test_dynamodb_client_sends_low_level_shape():
+    from botocore.stub import Stubber
+    import aws_clients
+    import helper
+
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    aws_clients.reset()
+    try:
+        real = aws_clients.client("dynamodb")
+        # リソースの meta.client（高水準の型変換付き）を使い回していないこと
+        assert real is not aws_clients.resource("dynamodb").meta.client
+        table = os.environ.setdefault("CARD_MASTER_TABLE", "c")
+        with Stubber(real) as stub, \
+                patch.object(helper, "dynamodb", lazy(aws_clients.client, "dynamodb")), \
+                patch.dict(helper._master_items, clear=True):
+            stub.add_response(
+                "batch_get_item",
+                {"Responses": {table: [{"cardId": {"S": "c1"}, "power": {"N": "3"}}]}},
+                {"RequestItems": {table: {"Keys": [{"cardId": {"S": "c1"}}]}}},
+            )
+            assert helper.preload_card_masters(["c1"]) == 1
+            assert helper._master_items["c1"]["power"] == {"N": "3"}
+            stub.assert_no_pending_responses()
+    finally:
+        aws_clients.reset()
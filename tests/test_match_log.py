@@ -0,0 +1,44 @@
+# tests/test_match_log.py
+import sys
+import os
+import json
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from match_log import configure_logging, log_debug, log_info
+
+
+def test_debug_disabled_skips_formatting(capsys, monkeypatch):
+    """無効時は出力せず、callable の値も評価しないこと"""
+    monkeypatch.delenv("DEBUG_MATCH_IDS", raising=False)
+    monkeypatch.delenv("LOG_SAMPLE_RATE", raising=False)
+    configure_logging({}, "m1", "moveCards")
+
+    called = []
+    log_debug("resolve_targets", targets=lambda: called.append(1))
+
+    assert called == []
+    assert capsys.readouterr().out == ""
+
+
+def test_debug_enabled_by_match_allow_list(capsys, monkeypatch):
+    """DEBUG_MATCH_IDS に含まれるマッチは JSON 1 行で出力されること"""
+    monkeypatch.setenv("DEBUG_MATCH_IDS", "m0, m1")
+    assert configure_logging({}, "m1", "summonCard")
+
+    log_debug("apply_action", cardId="c1", targets=lambda: ["t1", "t2"])
+    rec = json.loads(capsys.readouterr().out.strip())
+    assert rec == {"level": "DEBUG", "msg": "apply_action", "matchId": "m1",
+                   "field": "summonCard", "cardId": "c1", "targets": ["t1", "t2"]}
+
+
+def test_debug_enabled_by_event_flag(monkeypatch):
+    monkeypatch.delenv("DEBUG_MATCH_IDS", raising=False)
+    assert configure_logging({"debug": True}, "m9", "advancePhase")
+    assert not configure_logging({}, "m9", "advancePhase")
+
+
+def test_info_always_emitted(capsys, monkeypatch):
+    monkeypatch.delenv("DEBUG_MATCH_IDS", raising=False)
+    configure_logging({}, "m2", "getMatch")
+    log_info("invoke")
+    assert json.loads(capsys.readouterr().out)["msg"] == "invoke"
@@ -0,0 +1,119 @@
+# tests/test_match_rng.py
+import copy
+import sys
+import os
+from unittest.mock import patch
+from decimal import Decimal
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from match_rng import match_random, next_id, next_ids, seed_match
+from helper import weighted_random_select
+
+
+def _draws(item, n=20):
+    rng = match_random(item)
+    return [rng.randint(1, 100) for _ in range(n)]
+
+
+def test_same_seed_same_stream():
+    a, b = {}, {}
+    seed_match(a, 42)
+    seed_match(b, 42)
+    assert _draws(a) == _draws(b)
+    assert a["rng"] == {"seed": 42, "n": 20}
+
+    c = {}
+    seed_match(c, 43)
+    seed_match(a, 42)
+    assert _draws(c) != _draws(a)
+
+
+def test_stream_resumes_from_persisted_state():
+    """途中の状態（DynamoDB から読んだ Decimal）から続きを引ける"""
+    item = {}
+    seed_match(item, 7)
+    whole = _draws(item, 10)
+
+    item = {}
+    seed_match(item, 7)
+    first = _draws(item, 4)
+    restored = {"rng": {"seed": Decimal(item["rng"]["seed"]), "n": Decimal(item["rng"]["n"])}}
+    assert first + _draws(restored, 6) == whole
+
+
+def test_unseeded_match_is_seeded_lazily():
+    item = {}
+    match_random(item).choice(["a", "b"])
+    assert item["rng"]["n"] == 1 and isinstance(item["rng"]["seed"], int)
+
+
+def test_ranges():
+    item = {}
+    seed_match(item, 1)
+    rng = match_random(item)
+    vals = [rng.randint(3, 5) for _ in range(300)]
+    assert set(vals) == {3, 4, 5}
+    assert all(0.0 <= rng.random() < 1.0 for _ in range(100))
+    seq = list(range(10))
+    rng.shuffle(seq)
+    assert sorted(seq) == list(range(10))
+
+
+def test_weighted_select_with_match_stream():
+    a, b = {}, {}
+    seed_match(a, 5)
+    seed_match(b, 5)
+    opts, weights = ["A", "B", "C"], [10, 30, 60]
+    picks_a = [weighted_random_select(opts, weights, match_random(a)) for _ in range(50)]
+    picks_b = [weighted_random_select(opts, weights, match_random(b)) for _ in range(50)]
+    assert picks_a == picks_b
+    assert set(picks_a) <= set(opts)
+
+
+def test_next_id_unique_and_reproducible():
+    a = {}
+    seed_match(a, 9)
+    b = copy.deepcopy(a)
+    ids = [next_id(a, "token") for _ in range(100)]
+    assert len(set(ids)) == 100
+    assert ids[0].startswith("token_")
+    assert [next_id(b, "token") for _ in range(100)] == ids
+
+    # まとめて予約しても同じ ID 列
+    c = {}
+    seed_match(c, 9)
+    assert next_ids(c, "token", 100) == ids
+    assert c["rng"]["n"] == 100
+
+
+def test_next_id_does_not_expose_seed_bits():
+    item = {}
+    seed = 0x0123456789ABCDEF
+    seed_match(item, seed)
+    tag = next_id(item, "token").split("_")[1]
+    assert len(tag) == 8
+    assert tag not in (f"{seed & 0xFFFFFFFF:08x}", f"{seed >> 32:08x}")
+    # DynamoDB から読んだ Decimal の seed でも同じ接頭辞
+    other = {"rng": {"seed": Decimal(seed), "n": Decimal(0)}}
+    assert next_id(other, "token").split("_")[1] == tag
+
+
+def test_create_token_and_damage_color_are_reproducible():
+    from actions.create_token import handle_create_token
+    from actions.process_damage import process_to_selection_result
+
+    masters = {t: {"id": t, "name": t, "availableColors": ["Red", "Blue", "Green"]} for t in ("tA", "tB", "tC")}
+
+    def run():
+        item = {"cards": []}
+        seed_match(item, 11)
+        act = {"type": "CreateToken", "target": "Field", "value": 3,
+               "tokenBaseIds": ["tA", "tB", "tC"], "weights": [1, 1, 1]}
+        handle_create_token({"id": "src", "ownerId": "p1"}, act, item, "p1")
+        dmg = {"id": "d1", "baseCardId": "tA", "ownerId": "p1", "zone": "DamageZone"}
+        process_to_selection_result(dmg, "not_use", item)
+        return [(c["id"], c["baseCardId"]) for c in item["cards"]], dmg["assignedColor"], item["rng"]
+
+    with patch('actions.create_token.fetch_card_masters', return_value=masters), \
+         patch('actions.process_damage.fetch_card_masters', return_value=masters):
+        assert run() == run()
@@ -0,0 +1,62 @@
+# tests/test_metrics.py
+import sys
+import os
+import json
+from unittest.mock import patch
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import metrics
+from metrics import span, set_metric, start_invocation, build_emf, flush
+
+
+def test_span_disabled_is_noop():
+    start_invocation("moveCards", enabled=False)
+    with span("resolve"):
+        pass
+    set_metric("CardCount", 10)
+    assert metrics._state["spans"] == {}
+    assert flush() is None
+
+
+def test_emf_document_shape():
+    start_invocation("summonCard", enabled=True)
+    with span("resolve"):
+        pass
+    with span("resolve"):
+        pass
+    set_metric("CardCount", 120)
+    set_metric("EventCount", 3)
+    doc = build_emf()
+
+    assert doc["fieldName"] == "summonCard"
+    assert doc["boardSize"] == "M"
+    assert doc["resolveMs"] >= 0
+    assert doc["CardCount"] == 120 and doc["EventCount"] == 3
+    cw = doc["_aws"]["CloudWatchMetrics"][0]
+    assert ["fieldName", "boardSize"] in cw["Dimensions"]
+    assert {m["Name"] for m in cw["Metrics"]} == {"resolveMs", "CardCount", "EventCount"}
+
+
+def test_handler_emits_phase_spans(capsys):
+    """lambda_handler が読み込み・保存・シリアライズの区間を計測すること"""
+    from lambda_function import lambda_handler
+
+    item = {
+        "id": "m1", "matchVersion": 0, "phase": "Main",
+        "players": [{"id": "p1"}, {"id": "p2"}],
+        "cards": [{"id": "c1", "ownerId": "p1", "zone": "Hand"}],
+    }
+    event = {"info": {"fieldName": "updatePhase"},
+             "arguments": {"matchId": "m1", "phase": "Battle"}}
+    with patch.dict(os.environ, {"METRICS_ENABLED": "1"}), \
+         patch("lambda_function.table") as mock_table:
+        mock_table.get_item.return_value = {"Item": item}
+        lambda_handler(event, None)
+
+    lines = [json.loads(l) for l in capsys.readouterr().out.splitlines() if '"_aws"' in l]
+    assert len(lines) == 1
+    doc = lines[0]
+    assert doc["fieldName"] == "updatePhase"
+    for key in ("get_itemMs", "put_itemMs", "serializationMs", "totalMs"):
+        assert key in doc
+    assert doc["CardCount"] == 1
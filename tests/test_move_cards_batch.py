@@ -0,0 +1,52 @@
+# tests/test_move_cards_batch.py
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from metrics import counters, start_invocation
+
+
+def _aura(source_id, key="TempPowerBoost", expire=-1):
+    return {"key": key, "value": 100, "expireTurn": expire, "sourceId": source_id}
+
+
+def _match():
+    cards = [
+        {"id": "src1", "ownerId": "p1", "zone": "Field", "tempStatuses": []},
+        {"id": "src2", "ownerId": "p1", "zone": "Field", "tempStatuses": []},
+        {"id": "stay", "ownerId": "p1", "zone": "Field",
+         "tempStatuses": [_aura("src1"), _aura("src2"), _aura("src1", expire=3), _aura("leader")]},
+        {"id": "h1", "ownerId": "p1", "zone": "Hand", "tempStatuses": []},
+        {"id": "h2", "ownerId": "p1", "zone": "Hand", "tempStatuses": []},
+    ]
+    cards += [{"id": f"x{i}", "ownerId": "p2", "zone": "Field", "tempStatuses": []} for i in range(20)]
+    return {"players": [{"id": "p1"}, {"id": "p2"}], "cards": cards}
+
+
+def test_apply_moves_detaches_leavers_in_one_sweep():
+    from lambda_function import apply_moves
+    item = _match()
+    untouched = item["cards"][5]["tempStatuses"]
+    moves = [{"cardId": "src1", "toZone": "Graveyard"},
+             {"cardId": "src2", "toZone": "Hand"},
+             {"cardId": "h1", "toZone": "Field"},
+             {"cardId": "h2", "toZone": "Deck"}]
+
+    start_invocation("test", enabled=False)
+    trig = apply_moves(item, moves)
+
+    stay = item["cards"][2]
+    # 永続オーラだけが外れ、期限付きの効果や他の source のオーラは残る
+    assert [(s["sourceId"], s["expireTurn"]) for s in stay["tempStatuses"]] == [("src1", 3), ("leader", -1)]
+    assert item["cards"][5]["tempStatuses"] is untouched
+    assert [t["type"] for t in trig] == ["OnPlay", "OnEnterField"]
+    assert item["decks"]["p1"][0] == "h2"
+    # 場を離れたカードが複数でも盤面の走査は 1 回
+    assert counters()["CardScans"] == len(item["cards"])
+
+
+def test_detach_auras_single_leaver():
+    from lambda_function import detach_auras
+    item = _match()
+    detach_auras(item["cards"][0], item["cards"])
+    assert [s["sourceId"] for s in item["cards"][2]["tempStatuses"]] == ["src2", "src1", "leader"]
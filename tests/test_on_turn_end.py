@@ -6,7 +6,7 @@ import boto3
 from decimal import Decimal
 
 # テスト対象をインポート
-from lambda_function import handle_trigger, lambda_handler
+from lambda_function import handle_trigger, lambda_handler, run_turn_end
 from actions.handle_turn_end import handle_turn_end
 
 class TestOnTurnEnd:
@@ -196,6 +196,30 @@ class TestOnTurnEnd:
             
             assert len(on_turn_end_events) >= 1
     
+    def test_run_turn_end_single_sweep(self):
+        """OnTurnEnd 発動後に期限切れ削除と攻撃フラグのリセットを 1 回でまとめて行う"""
+        from helper import add_status, get_status
+        attacker = self.item["cards"][0]
+        add_status(attacker, "HasAttacked", True)
+        idle = {"id": "card_003", "ownerId": "player_1", "zone": "Field",
+                "statuses": [], "tempStatuses": [], "effectList": []}
+        self.item["cards"].append(idle)
+
+        events = run_turn_end(self.item)
+
+        assert self.item["turnCount"] == 2
+        types = [e["type"] for e in events]
+        assert types[0] == "AbilityActivated" and "TurnEndProcessed" in types
+        # 期限切れは 1 件のイベントにまとまる（永続の TempDamageBoost は残る）
+        expired = [e for e in events if e["type"] == "TempStatusExpired"]
+        assert len(expired) == 1
+        assert expired[0]["payload"] == {"turnCount": 2, "cards": [{"cardId": "card_001", "expiredCount": 1}]}
+        assert attacker["tempStatuses"] == []
+        assert len(self.item["cards"][1]["tempStatuses"]) == 1
+        # 攻撃済みのカードだけリセットされる
+        assert get_status(attacker, "HasAttacked") is False
+        assert idle["statuses"] == []
+
     def test_on_turn_end_no_effect_cards(self):
         """OnTurnEnd 効果を持たないカードでは何も起こらないことを確認"""
         card = self.item["cards"][1]  # OnTurnEnd 効果を持たないカード
@@ -300,4 +300,56 @@ def test_process_damage_both_leaders():
     assert len(ability_events) == 2
     target_player_ids = [e["payload"]["targetPlayerId"] for e in ability_events]
     assert "player1" in target_player_ids
-    assert "player2" in target_player_ids
\ No newline at end of file
+    assert "player2" in target_player_ids
+
+
+def _reflect_match(reflect_both):
+    cards = [{"id": f"{p}_d{i}", "cardId": f"m{i}", "zone": "Deck", "ownerId": p}
+             for p in ("player1", "player2") for i in range(10)]
+    cards.append({"id": "mirror2", "zone": "Field", "ownerId": "player2",
+                  "statuses": [{"key": "IsChainPainReflect", "value": 1}]})
+    if reflect_both:
+        cards.append({"id": "mirror1", "zone": "Field", "ownerId": "player1",
+                      "statuses": [{"key": "IsChainPainReflect", "value": 1}]})
+    return {"players": [{"id": "player1"}, {"id": "player2"}], "cards": cards}
+
+
+def _damage_zone(item, player_id):
+    return [c for c in item["cards"] if c["ownerId"] == player_id and c["zone"] == "DamageZone"]
+
+
+def test_reflection_chain_resolved_server_side():
+    """反射ダメージは同じ呼び出しの中で攻撃側にも解決される（マスター取得は 1 回）"""
+    item = _reflect_match(reflect_both=False)
+    masters = {f"m{i}": {"availableColors": ["Red"]} for i in range(10)}
+    with patch('actions.process_damage.fetch_card_masters', return_value=masters) as fetch:
+        events = handle_process_damage({"id": "atk", "ownerId": "player1"},
+                                       {"value": 2, "targetPlayerId": "player2"}, item, "player1")
+
+    assert len(_damage_zone(item, "player2")) == 2
+    assert len(_damage_zone(item, "player1")) == 2
+    assert fetch.call_count == 1
+    assert len(fetch.call_args.args[0]) == 4
+    on_damage = [e["payload"]["targetPlayerId"] for e in events
+                 if e["type"] == "AbilityActivated" and e["payload"].get("trigger") == "OnDamage"]
+    assert on_damage == ["player2", "player1"]
+
+
+def test_reflection_chain_stops_at_hop_limit():
+    """双方が反射を持つ場合も DAMAGE_CHAIN_MAX_HOPS 段で打ち切る"""
+    item = _reflect_match(reflect_both=True)
+    with patch('actions.process_damage.fetch_card_masters', return_value={}), \
+         patch.dict(os.environ, {"DAMAGE_CHAIN_MAX_HOPS": "3"}):
+        events = handle_process_damage({"id": "atk", "ownerId": "player1"},
+                                       {"value": 1, "targetPlayerId": "player2"}, item, "player1")
+
+    # player2 → player1 → player2 の 3 段
+    assert len(_damage_zone(item, "player2")) == 2
+    assert len(_damage_zone(item, "player1")) == 1
+    limit = [e for e in events if e["type"] == "DamageChainLimit"]
+    assert len(limit) == 1 and limit[0]["payload"]["maxHops"] == 3
+    # ProcessDamage（反射）は解決した段の分だけ。打ち切った 4 段目の分は返さない
+    reflected = [e["payload"]["targetPlayerId"] for e in events
+                 if e["type"] == "ProcessDamage" and e["payload"].get("isReflection")]
+    assert reflected == ["player1", "player2"]
+    assert events.index(limit[0]) > max(i for i, e in enumerate(events) if e["type"] == "ProcessDamage")
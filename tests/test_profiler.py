@@ -0,0 +1,50 @@
+# tests/test_profiler.py
+import sys
+import os
+from unittest.mock import patch
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from profiler import load_stats, profile_requested
+
+
+def _invoke(extra_event=None):
+    from lambda_function import lambda_handler
+    item = {
+        "id": "m1", "matchVersion": 0, "turnPlayerId": "p1",
+        "players": [{"id": "p1", "name": "P1"}, {"id": "p2", "name": "P2"}],
+        "cards": [],
+    }
+    event = {"info": {"fieldName": "resolveAck"}, "arguments": {"matchId": "m1"}, **(extra_event or {})}
+    with patch("lambda_function.table") as mock_table:
+        mock_table.get_item.return_value = {"Item": item}
+        return lambda_handler(event, None)
+
+
+def test_profile_requested_needs_sink_and_flag(tmp_path):
+    with patch.dict(os.environ, {"PROFILE_DIR": str(tmp_path), "PROFILE_MATCH_IDS": "m9"}):
+        assert profile_requested({"profile": True}, "m1")
+        assert profile_requested({}, "m9")
+        assert not profile_requested({}, "m1")
+    with patch.dict(os.environ, {}, clear=False):
+        os.environ.pop("PROFILE_DIR", None)
+        os.environ.pop("PROFILE_BUCKET", None)
+        assert not profile_requested({"profile": True}, "m1")
+
+
+def test_profiled_invocation_writes_pstats(tmp_path):
+    with patch.dict(os.environ, {"PROFILE_DIR": str(tmp_path)}):
+        result = _invoke({"profile": True})
+
+    pid = result["profileId"]
+    assert pid and pid.startswith("m1-")
+    path = tmp_path / f"{pid}.pstats.gz"
+    assert path.exists()
+    st = load_stats(str(path))
+    assert any(func[2] == "_dispatch" for func in st.stats)
+
+
+def test_normal_invocation_is_not_profiled(tmp_path):
+    with patch.dict(os.environ, {"PROFILE_DIR": str(tmp_path)}):
+        result = _invoke()
+    assert "profileId" not in result
+    assert list(tmp_path.iterdir()) == []
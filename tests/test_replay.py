@@ -0,0 +1,55 @@
+# tests/test_replay.py
+import sys
+import os
+import glob
+import json
+from unittest.mock import patch
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.harness import backends, generate_match, load_card_masters, cards_in
+from benchmarks.replay import replay_one, semantic_diff
+from trace_recorder import load_trace
+
+
+def test_semantic_diff_matches_cards_by_id():
+    a = {"cards": [{"id": "x", "zone": "Hand"}, {"id": "y", "zone": "Field"}], "updatedAt": "t1"}
+    b = {"cards": [{"id": "y", "zone": "Field"}, {"id": "x", "zone": "Field"}], "updatedAt": "t2"}
+    assert semantic_diff(a, b) == ["$.cards.x.zone: 'Hand' != 'Field'"]
+
+
+def _record_declare_attack(tmp_path):
+    masters = load_card_masters()
+    item = generate_match(40, masters, seed=3)
+    atk = cards_in(item, "p1", "Field")[0]["id"]
+    tgt = cards_in(item, "p2", "Field")[0]["id"]
+    event = {"info": {"fieldName": "declareAttack"},
+             "arguments": {"matchId": item["id"], "attackerId": atk, "targetId": tgt}}
+
+    from lambda_function import lambda_handler
+    with backends(masters) as b, \
+         patch.dict(os.environ, {"TRACE_RECORD": "1", "TRACE_DIR": str(tmp_path)}):
+        b.store(item)
+        lambda_handler(event, None)
+
+    paths = glob.glob(os.path.join(str(tmp_path), "**", "*.json.gz"), recursive=True)
+    assert len(paths) == 1
+    return masters, load_trace(paths[0])
+
+
+def test_record_then_replay_is_identical(tmp_path):
+    masters, trace = _record_declare_attack(tmp_path)
+    assert trace["field"] == "declareAttack"
+    assert "battleStep" not in trace["pre"]
+    assert trace["post"]["battleStep"] == "AttackAbility"
+
+    rep = replay_one(trace, masters)
+    assert rep["diffs"] == []
+    assert rep["replayMs"] > 0
+
+
+def test_replay_reports_behavior_change(tmp_path):
+    masters, trace = _record_declare_attack(tmp_path)
+    trace["post"]["battleStep"] = "BlockChoice"  # 記録時と異なる結果を想定
+
+    rep = replay_one(trace, masters)
+    assert "$post.battleStep: 'BlockChoice' != 'AttackAbility'" in rep["diffs"]
@@ -0,0 +1,85 @@
+# tests/test_resolve_chain_limit.py
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from lambda_function import resolve
+
+
+def _looping_item():
+    """Bounce されると自分自身を Bounce し続けるカード"""
+    return {
+        "cards": [{
+            "id": "loop",
+            "ownerId": "p1",
+            "zone": "Field",
+            "effectList": [{
+                "trigger": "Bounce",
+                "actions": [{"type": "Bounce", "target": "Self"}],
+            }],
+        }],
+        "players": [{"id": "p1"}, {"id": "p2"}],
+    }
+
+
+def test_chain_depth_limit():
+    """無限連鎖が深さ上限で打ち切られ ChainLimitExceeded が返ること"""
+    item = _looping_item()
+    evs = resolve([{"type": "Bounce", "payload": {"cardId": "loop"}}], item, max_depth=5)
+
+    assert evs[-1]["type"] == "ChainLimitExceeded"
+    assert evs[-1]["payload"]["reason"] == "depth"
+    assert sum(1 for e in evs if e["type"] == "ChainLimitExceeded") == 1
+
+
+def test_event_budget_limit():
+    """処理イベント数の上限で打ち切られること"""
+    item = _looping_item()
+    evs = resolve([{"type": "Bounce", "payload": {"cardId": "loop"}}], item,
+                  max_depth=1000, max_events=10)
+
+    assert evs[-1]["type"] == "ChainLimitExceeded"
+    assert evs[-1]["payload"]["reason"] == "budget"
+    assert evs[-1]["payload"]["processed"] == 10
+
+
+def test_event_budget_scales_with_board_size():
+    """盤面全体への効果（1000 枚）は既定の上限で打ち切られないこと"""
+    from lambda_function import MAX_RESOLVE_EVENTS, resolve_event_budget
+    cards = [{"id": f"c{i}", "ownerId": "p1", "zone": "Field", "effectList": [
+                 {"trigger": "OnSummon", "actions": [{"type": "SetStatus", "target": "Self", "keyword": "A"}]},
+             ]} for i in range(1000)]
+    item = {"cards": cards, "players": [{"id": "p1"}, {"id": "p2"}]}
+    assert resolve_event_budget({"cards": []}) == MAX_RESOLVE_EVENTS
+    assert resolve_event_budget(item) > MAX_RESOLVE_EVENTS
+
+    evs = resolve([{"type": "OnSummon", "payload": {"cardId": c["id"]}} for c in cards], item)
+    assert not any(e["type"] == "ChainLimitExceeded" for e in evs)
+    assert sum(1 for e in evs if e["type"] == "SetStatus") == 1000
+
+
+def test_fifo_order_and_json_payload():
+    """イベントは発生順（FIFO）で解決され、文字列ペイロードも扱えること"""
+    item = {
+        "cards": [
+            {"id": "a", "ownerId": "p1", "zone": "Field", "effectList": [
+                {"trigger": "OnSummon", "actions": [{"type": "SetStatus", "target": "Self", "keyword": "A"}]},
+            ]},
+            {"id": "b", "ownerId": "p1", "zone": "Field", "effectList": [
+                {"trigger": "OnSummon", "actions": [{"type": "SetStatus", "target": "Self", "keyword": "B"}]},
+            ]},
+        ],
+        "players": [{"id": "p1"}, {"id": "p2"}],
+    }
+    evs = resolve([
+        {"type": "OnSummon", "payload": '{"cardId": "a"}'},
+        {"type": "OnSummon", "payload": {"cardId": "b"}},
+    ], item)
+
+    types = [(e["type"], e["payload"].get("cardId") or e["payload"].get("sourceCardId"))
+             for e in evs[2:]]
+    assert types == [
+        ("AbilityActivated", "a"), ("SetStatus", "a"),
+        ("AbilityActivated", "b"), ("SetStatus", "b"),
+    ]
+    assert not any(e["type"] == "ChainLimitExceeded" for e in evs)
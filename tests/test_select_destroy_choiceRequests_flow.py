@@ -308,13 +308,15 @@ def test_optional_ability_activation():
     assert "破壊効果" in choice_request["promptText"]
     assert choice_request["options"] == ["Yes", "No"]
     
-    # pendingDeferred に効果全体が保存されることを確認
+    # pendingDeferred に効果の先頭を指す継続レコードが保存されることを確認
     assert len(test_item["pendingDeferred"]) == 1
     pending_effect = test_item["pendingDeferred"][0]
     assert pending_effect["effectType"] == "optionalAbility"
     assert pending_effect["sourceCardId"] == "optional-card"
     assert pending_effect["trigger"] == "OnSummon"
-    assert len(pending_effect["actions"]) == 2
+    assert pending_effect["effectIndex"] == 0
+    assert pending_effect["actionIndex"] == 0
+    assert "actions" not in pending_effect
     
     # Step 2: "Yes" を選択した場合のテスト
     choice_response = {
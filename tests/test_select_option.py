@@ -171,4 +171,35 @@ def test_select_option_result_event_processing():
     
     # 3. Destroy イベントが実行されている
     destroy_events = [e for e in result_events if e["type"] == "Destroy"]
-    assert len(destroy_events) >= 1
\ No newline at end of file
+    assert len(destroy_events) >= 1
+
+
+def test_weighted_random_sample_matches_sequential_selects():
+    """まとめて引いた結果は 1 回ずつ引いた結果と同じ（同じ乱数ストリーム）"""
+    from helper import weighted_random_sample
+    from match_rng import match_random, seed_match
+
+    a, b = {}, {}
+    seed_match(a, 3)
+    seed_match(b, 3)
+    options, weights = ["A", "B", "C", "D"], [5, 0, 20, 75]
+    batch = weighted_random_sample(options, weights, 200, match_random(a))
+    single = [weighted_random_select(options, weights, match_random(b)) for _ in range(200)]
+    assert batch == single
+    assert "B" not in batch  # 重み 0 は選ばれない
+    assert a["rng"]["n"] == 200
+
+    assert weighted_random_sample(options, weights, 0) == []
+    assert weighted_random_sample([], [], 3) == ["", "", ""]
+
+
+def test_weighted_table_is_cached():
+    from helper import weighted_table
+
+    t1 = weighted_table(["A", "B"], [1, 3])
+    t2 = weighted_table(["A", "B"], [1, 3])
+    assert t1 is t2
+    assert t1[1:] == ([1, 4], 4)
+    # 負の重みは表にしない（従来の線形走査で選ぶ）
+    assert weighted_table(["A", "B"], [-1, 3]) is None
+    assert weighted_random_select(["A", "B"], [-1, 3]) == "B"
@@ -0,0 +1,30 @@
+# tests/test_simulate.py
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.harness import load_card_masters
+from benchmarks.simulate import new_match, run, winner
+
+
+def test_new_match_is_seeded():
+    masters = load_card_masters()
+    a, b = new_match(masters, 7), new_match(masters, 7)
+    assert [c["baseCardId"] for c in a["cards"]] == [c["baseCardId"] for c in b["cards"]]
+    assert sum(1 for c in a["cards"] if c["ownerId"] == "p1" and c["zone"] == "Hand") == 5
+
+
+def test_winner_rules():
+    item = new_match(load_card_masters(), 0)
+    assert winner(item, 7) is None
+    for c in [c for c in item["cards"] if c["ownerId"] == "p2"][:7]:
+        c["zone"] = "DamageZone"
+    assert winner(item, 7) == "p1"
+
+
+def test_games_play_to_completion():
+    report, profiles = run(games=3, jobs=1, p1="random", p2="greedy", max_turns=40)
+    assert report["errors"] == []
+    assert sum(report["outcomes"].values()) == 3
+    assert report["mutations"] > 0 and report["counters"]["ApplyActionCalls"] > 0
+    assert profiles == []
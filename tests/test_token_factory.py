@@ -0,0 +1,78 @@
+# tests/test_token_factory.py
+import sys
+import os
+from decimal import Decimal
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.harness import backends, load_card_masters
+from match_rng import seed_match
+
+
+def _create(item, base_ids, value, zone="Field"):
+    from actions.create_token import handle_create_token
+    act = {"type": "CreateToken", "target": zone, "value": value, "tokenBaseIds": base_ids}
+    return handle_create_token({"id": "src", "ownerId": "p1"}, act, item, "p1")
+
+
+def test_tokens_stamped_from_master_template():
+    with backends(load_card_masters()):
+        item = {"cards": [{"id": "x"}]}
+        seed_match(item, 1)
+        events = _create(item, ["test_01"], 5)
+
+        tokens = item["cards"][1:]
+        assert [e["payload"]["tokenId"] for e in events] == [t["id"] for t in tokens]
+        assert len({t["id"] for t in tokens}) == 5
+        t = tokens[0]
+        assert list(t) == ["id", "baseCardId", "ownerId", "zone", "isFaceUp", "level", "currentLevel",
+                           "power", "currentPower", "damage", "currentDamage", "statuses",
+                           "tempStatuses", "effectList"]
+        assert (t["level"], t["power"], t["damage"]) == (Decimal(5), Decimal(2000), Decimal(1))
+        assert t["ownerId"] == "p1" and t["zone"] == "Field"
+        assert len(t["effectList"]) == 1
+
+        # 可変なフィールドはトークンごとに別オブジェクト
+        t["statuses"].append({"key": "HasAttacked", "value": True})
+        assert tokens[1]["statuses"] == [{"key": "IsToken", "value": True}]
+        assert tokens[1]["tempStatuses"] is not t["tempStatuses"]
+
+
+def test_template_reused_across_calls():
+    from token_factory import token_template, _templates
+
+    with backends(load_card_masters()):
+        item = {"cards": []}
+        _create(item, ["test_01"], 1)
+        first = _templates["test_01"][1]
+        _create(item, ["test_01"], 1)
+        assert _templates["test_01"][1] is first
+        # effectList はトークンごとに別オブジェクト（書き換えてもテンプレート・他のトークンに漏れない）
+        a, b = item["cards"][0]["effectList"], item["cards"][1]["effectList"]
+        assert a == b and a is not b and a[0] is not b[0]
+        a[0]["trigger"] = "Changed"
+        _create(item, ["test_01"], 1)
+        assert item["cards"][2]["effectList"] == b
+        # テンプレートは書き換えられない
+        try:
+            first["power"] = Decimal(0)
+            assert False, "template must be read-only"
+        except TypeError:
+            pass
+
+    # マスターが無い ID は既定値で、キャッシュしない
+    tpl = token_template("no_such_card", None)
+    assert (tpl["level"], tpl["power"], tpl["damage"]) == (Decimal(1), Decimal(1000), Decimal(0))
+    assert "no_such_card" not in _templates
+
+
+def test_transform_token_uses_factory():
+    from actions.transform import _create_transform_token
+
+    with backends(load_card_masters()):
+        item = {"cards": []}
+        seed_match(item, 2)
+        events = _create_transform_token("test_01", {"id": "orig"}, item, "p2", "Hand")
+        token = item["cards"][0]
+        assert events[0]["payload"]["tokenId"] == token["id"]
+        assert token["zone"] == "Hand" and token["ownerId"] == "p2"
+        assert token["power"] == Decimal(2000)
@@ -0,0 +1,44 @@
+# tests/test_warmup.py
+import sys
+import os
+from unittest.mock import patch
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.harness import BENCH_LEADER_ID, backends
+
+
+def test_warmup_preloads_without_touching_matches():
+    from lambda_function import lambda_handler, leader_cache
+    import helper
+    with backends() as b:
+        card_ids = sorted(b.masters)  # 100 件を超える
+        result = lambda_handler({"warmup": {"leaderIds": [BENCH_LEADER_ID], "cardIds": card_ids}}, None)
+        assert result["warmup"] is True
+        assert set(result["stages"]) == {"clients", "actions", "leaders", "cardMasters"}
+        assert result["leaders"] == 1 and result["cardMasters"] == len(card_ids) > 100
+        assert result["errors"] == []
+        assert BENCH_LEADER_ID in leader_cache
+        assert b.dynamodb.calls == 2      # 100 件ずつに分割
+        assert b.table.writes == 0
+
+        # 先読み済みのマスターは再取得しない
+        masters = helper.fetch_card_masters(card_ids[:3])
+        assert set(masters) == set(card_ids[:3]) and b.dynamodb.calls == 2
+
+
+def test_warmup_defaults_from_env():
+    from lambda_function import lambda_handler
+    with backends() as b, patch.dict(os.environ, {"WARMUP_LEADER_IDS": BENCH_LEADER_ID,
+                                                  "WARMUP_CARD_IDS": ",".join(sorted(b.masters)[:2])}):
+        result = lambda_handler({"warmup": True}, None)
+    assert result["leaders"] == 1 and result["cardMasters"] == 2
+
+
+def test_fetch_card_masters_returns_fresh_dicts():
+    import helper
+    with backends() as b:
+        cid = sorted(b.masters)[0]
+        first = helper.fetch_card_masters([cid])[cid]
+        first["effectList"] = "mutated"
+        assert helper.fetch_card_masters([cid])[cid]["effectList"] != "mutated"
+        assert b.dynamodb.calls == 1
@@ -0,0 +1,104 @@
+# token_factory.py
+"""
+トークンカードの生成（CreateToken / Transform 共通）。
+
+baseCardId ごとにマスターから変換済みのテンプレート（Decimal 化した
+level / power / damage と effectList）を 1 度だけ作っておき、トークンは
+テンプレートの浅いコピーに ID・所有者・ゾーン・statuses を差し込むだけで作る。
+ID は match_rng.next_ids（マッチ内カウンタ）で振り、まとめて item["cards"] に追加する。
+
+テンプレートはコンテナ内で共有するので書き換えない。effectList は呼び出し側が
+書き換えることがある（fetch_card_masters が毎回パースし直すのと同じ理由）ため、
+トークンごとに複製して渡し、カード間・マッチ間で共有しない。
+"""
+from types import MappingProxyType
+from typing import Dict, List
+
+import deck_stack
+import helper
+from helper import d
+from match_rng import next_ids
+
+# baseCardId → (テンプレートの元になったマスターの生アイテム, テンプレート)
+_templates: Dict[str, tuple] = {}
+
+_DEFAULTS = {"level": 1, "power": 1000, "damage": 0}
+
+
+def _clone(obj):
+    """マスター由来の dict / list の入れ子を複製する（copy.deepcopy より数倍速い）"""
+    if isinstance(obj, dict):
+        return {k: _clone(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_clone(v) for v in obj]
+    return obj  # str / Decimal / bool などは不変
+
+
+def _build(base_id, master):
+    master = master or {}
+    level, power, damage = (d(master.get(k, v)) for k, v in _DEFAULTS.items())
+    # キー順は従来のトークン dict と同じ
+    return MappingProxyType({
+        "id": None,
+        "baseCardId": base_id,
+        "ownerId": None,
+        "zone": None,
+        "isFaceUp": True,
+        "level": level,
+        "currentLevel": level,
+        "power": power,
+        "currentPower": power,
+        "damage": damage,
+        "currentDamage": damage,
+        "statuses": None,
+        "tempStatuses": None,
+        "effectList": master.get("effectList", []),
+    })
+
+
+def token_template(base_id, master):
+    """
+    base_id のテンプレート。helper のマスターキャッシュに同じ生アイテムがある間は
+    使い回し、キャッシュに無い（取得できなかった・差し替えられた）ときは毎回作る。
+    """
+    raw = helper._master_items.get(base_id)
+    hit = _templates.get(base_id)
+    if hit is not None and raw is not None and hit[0] is raw:
+        return hit[1]
+    template = _build(base_id, master)
+    if raw is not None and master is not None:
+        _templates[base_id] = (raw, template)
+    return template
+
+
+def stamp_tokens(item, base_ids: List[str], owner_id, zone, masters: Dict[str, Dict]):
+    """
+    base_ids の順にトークンを作って item["cards"] にまとめて追加し、作ったカードを返す。
+    masters は fetch_card_masters(base_ids) の結果（無い ID は既定値のトークンになる）。
+    """
+    templates = {}
+    tokens = []
+    ids = next_ids(item, "token", len(base_ids))
+    for token_id, base_id in zip(ids, base_ids):
+        template = templates.get(base_id)
+        if template is None:
+            template = templates[base_id] = token_template(base_id, masters.get(base_id))
+        tokens.append({
+            **template,
+            "id": token_id,
+            "ownerId": owner_id,
+            "zone": zone,
+            "statuses": [{"key": "IsToken", "value": True}],
+            "tempStatuses": [],
+            "effectList": _clone(template["effectList"]),
+        })
+    item["cards"].extend(tokens)
+    if zone == "Deck":  # 山札に生成したトークンは一番下へ
+        for token in tokens:
+            deck_stack.insert(item, token)
+    return tokens
+
+
+def reset_templates():
+    """テンプレートを破棄する（ベンチ・テスト用）"""
+    _templates.clear()
@@ -0,0 +1,119 @@
+# trace_recorder.py
+"""
+lambda_handler 呼び出しの記録（リプレイ用トレース）。
+
+1 呼び出し = 1 レコード:
+    {"version", "recordedAt", "field", "event", "pre", "post", "result",
+     "error", "durationMs", "leaders"}
+
+pre は読み込み直後、post は最後に保存した STATE（いずれも JSON 互換の形）。
+オフラインでの再実行・比較は benchmarks/replay.py で行う。
+
+有効化条件（lambda_handler 冒頭の start_trace で判定）:
+  - TRACE_RECORD=1（全呼び出し）
+  - TRACE_MATCH_IDS（カンマ区切り）に matchId が含まれる
+  - event["trace"] が真
+出力先:
+  - TRACE_DIR が設定されていればローカルディレクトリ（gzip JSON）
+  - TRACE_BUCKET が設定されていれば S3（TRACE_PREFIX 配下）
+記録処理の失敗はハンドラの結果に影響させない。
+"""
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+
+from helper import DecimalEncoder
+from aws_clients import lazy, client
+
+TRACE_VERSION = 1
+
+logger = logging.getLogger()
+
+_ctx = {"on": False, "matchId": None, "pre": None, "post": None, "t0": 0.0}
+_s3 = lazy(client, "s3")
+
+
+def start_trace(event, match_id):
+    """呼び出し単位で記録の有効／無効を決める"""
+    event = event or {}
+    allow = {m.strip() for m in os.environ.get("TRACE_MATCH_IDS", "").split(",") if m.strip()}
+    on = bool(
+        os.environ.get("TRACE_RECORD", "").lower() in ("1", "true", "yes")
+        or (match_id and match_id in allow)
+        or event.get("trace")
+    ) and bool(os.environ.get("TRACE_DIR") or os.environ.get("TRACE_BUCKET"))
+
+    _ctx.update(on=on, matchId=match_id, pre=None, post=None, t0=time.perf_counter())
+    return on
+
+
+def recording():
+    return _ctx["on"]
+
+
+def plain(obj):
+    """Decimal / 索引を含む値を JSON 互換の形にする"""
+    return json.loads(json.dumps(obj, cls=DecimalEncoder))
+
+
+def capture_pre(item):
+    if _ctx["on"] and _ctx["pre"] is None:
+        _ctx["pre"] = plain(item)
+
+
+def capture_post(item):
+    if _ctx["on"]:
+        _ctx["post"] = plain(item)
+
+
+def finish_trace(event, result=None, error=None, leaders=None):
+    """記録を組み立てて出力先へ書き出す。書き出したキー（パス）を返す"""
+    if not _ctx["on"]:
+        return None
+    record = {
+        "version":    TRACE_VERSION,
+        "recordedAt": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "field":      event.get("info", {}).get("fieldName"),
+        "event":      event,
+        "pre":        _ctx["pre"],
+        "post":       _ctx["post"],
+        "result":     plain(result) if result is not None else None,
+        "error":      repr(error) if error is not None else None,
+        "durationMs": round((time.perf_counter() - _ctx["t0"]) * 1000.0, 3),
+        "leaders":    plain(leaders or {}),
+    }
+    _ctx["on"] = False
+    try:
+        return _write(record)
+    except Exception as e:  # 記録失敗で本処理を落とさない
+        logger.warning(f"trace_recorder: failed to write trace: {e}")
+        return None
+
+
+def _write(record):
+    body = gzip.compress(json.dumps(record, ensure_ascii=False).encode("utf-8"))
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    name = f"{_ctx['matchId'] or 'none'}/{stamp}-{record['field']}.json.gz"
+
+    trace_dir = os.environ.get("TRACE_DIR")
+    if trace_dir:
+        path = os.path.join(trace_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(body)
+        return path
+
+    key = os.environ.get("TRACE_PREFIX", "traces/") + name
+    _s3.put_object(Bucket=os.environ["TRACE_BUCKET"], Key=key, Body=body,
+                   ContentType="application/json", ContentEncoding="gzip")
+    return key
+
+
+def load_trace(path):
+    """記録ファイル（.json.gz / .json）を読み込む"""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        return json.load(f)